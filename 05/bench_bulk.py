@@ -0,0 +1,90 @@
+"""Сравнение стоимости пакетных и поштучных операций LRU-кэша.
+
+Пример запуска:
+    python bench_bulk.py --batch 32 --rounds 2000
+"""
+
+import argparse
+import random
+import time
+
+from lru_cache import LRUCache, ShardedLRUCache
+
+
+def per_key_ns(func, batches, batch_size):
+    """Замеряет среднее время обработки одного ключа.
+
+    Args:
+        func: Функция, обрабатывающая один пакет ключей
+        batches (list): Список пакетов
+        batch_size (int): Размер пакета
+
+    Returns:
+        float: Наносекунд на ключ
+    """
+    start = time.perf_counter_ns()
+    for batch in batches:
+        func(batch)
+    elapsed = time.perf_counter_ns() - start
+    return elapsed / (len(batches) * batch_size)
+
+
+def bench(cache, batches, batch_size):
+    """Запускает четыре варианта операций на одном кэше.
+
+    Args:
+        cache: LRUCache или ShardedLRUCache
+        batches (list): Список пакетов ключей
+        batch_size (int): Размер пакета
+
+    Returns:
+        dict: Название операции -> наносекунд на ключ
+    """
+    def set_single(batch):
+        for key in batch:
+            cache.set(key, key)
+
+    def get_single(batch):
+        for key in batch:
+            cache.get(key)
+
+    return {
+        "set": per_key_ns(set_single, batches, batch_size),
+        "set_many": per_key_ns(
+            lambda batch: cache.set_many([(key, key) for key in batch]),
+            batches, batch_size),
+        "get": per_key_ns(get_single, batches, batch_size),
+        "get_many": per_key_ns(cache.get_many, batches, batch_size),
+    }
+
+
+def main():
+    """Точка входа бенчмарка."""
+    parser = argparse.ArgumentParser(description="Bulk vs single-key ops")
+    parser.add_argument("--batch", type=int, default=32,
+                        help="Keys per batch")
+    parser.add_argument("--rounds", type=int, default=2000,
+                        help="Number of batches")
+    parser.add_argument("--limit", type=int, default=10000,
+                        help="Cache capacity")
+    args = parser.parse_args()
+
+    rnd = random.Random(0)
+    batches = [
+        [rnd.randrange(args.limit * 2) for _ in range(args.batch)]
+        for _ in range(args.rounds)
+    ]
+    caches = {
+        "LRUCache": LRUCache(args.limit),
+        "ShardedLRUCache": ShardedLRUCache(args.limit),
+    }
+    print(f"{'cache':>16} {'set':>8} {'set_many':>9} {'get':>8} "
+          f"{'get_many':>9}  (ns/key)")
+    for name, cache in caches.items():
+        res = bench(cache, batches, args.batch)
+        print(f"{name:>16} {res['set']:>8.0f} {res['set_many']:>9.0f} "
+              f"{res['get']:>8.0f} {res['get_many']:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
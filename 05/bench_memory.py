@@ -0,0 +1,49 @@
+"""Замер памяти, занимаемой одной записью LRU-кэша.
+
+Пример запуска:
+    python bench_memory.py --entries 1000000
+"""
+
+import argparse
+import tracemalloc
+
+from lru_cache import CompactLRUCache, LRUCache
+
+
+def bytes_per_entry(cache_cls, entries):
+    """Считает прирост памяти на одну запись при заполнении кэша.
+
+    Ключи создаются заранее, а значения - None, поэтому в замер
+    попадают только накладные расходы самого кэша.
+
+    Args:
+        cache_cls: Класс кэша
+        entries (int): Количество записей
+
+    Returns:
+        float: Байт на запись
+    """
+    keys = [f"key{i}" for i in range(entries)]
+    tracemalloc.start()
+    cache = cache_cls(entries)
+    for key in keys:
+        cache.set(key, None)
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return used / entries
+
+
+def main():
+    """Точка входа бенчмарка."""
+    parser = argparse.ArgumentParser(description="LRU cache memory per entry")
+    parser.add_argument("--entries", type=int, default=200000,
+                        help="Number of cache entries")
+    args = parser.parse_args()
+
+    for cache_cls in (LRUCache, CompactLRUCache):
+        per_entry = bytes_per_entry(cache_cls, args.entries)
+        print(f"{cache_cls.__name__:>16}: {per_entry:.1f} bytes/entry")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Бенчмарк конкурентного доступа к LRU-кэшу.
+
+Сравнивает обычный LRUCache под одной глобальной блокировкой с
+ShardedLRUCache при числе потоков от 1 до 32.
+
+Пример запуска:
+    python bench_sharded.py --ops 20000 --shards 16
+"""
+
+import argparse
+import random
+import threading
+import time
+
+from lru_cache import LRUCache, ShardedLRUCache
+
+
+class GlobalLockCache:
+    """LRUCache под одной общей блокировкой (текущий вариант использования)."""
+
+    def __init__(self, limit):
+        self._cache = LRUCache(limit)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            return self._cache.get(key)
+
+    def set(self, key, value):
+        with self._lock:
+            self._cache.set(key, value)
+
+
+def run_threads(cache, num_threads, ops, keyspace, read_ratio):
+    """Запускает потоки, выполняющие смесь get/set, и замеряет время.
+
+    Args:
+        cache: Кэш с методами get и set
+        num_threads (int): Количество потоков
+        ops (int): Количество операций на поток
+        keyspace (int): Количество различных ключей
+        read_ratio (float): Доля операций чтения
+
+    Returns:
+        float: Пропускная способность, операций в секунду
+    """
+    barrier = threading.Barrier(num_threads + 1)
+
+    def worker(seed):
+        rnd = random.Random(seed)
+        keys = [rnd.randrange(keyspace) for _ in range(ops)]
+        reads = [rnd.random() < read_ratio for _ in range(ops)]
+        barrier.wait()
+        for key, is_read in zip(keys, reads):
+            if is_read:
+                cache.get(key)
+            else:
+                cache.set(key, key)
+
+    threads = [
+        threading.Thread(target=worker, args=(seed,))
+        for seed in range(num_threads)
+    ]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return num_threads * ops / elapsed
+
+
+def main():
+    """Точка входа бенчмарка."""
+    parser = argparse.ArgumentParser(description="LRU cache contention bench")
+    parser.add_argument("--ops", type=int, default=20000,
+                        help="Operations per thread")
+    parser.add_argument("--limit", type=int, default=10000,
+                        help="Cache capacity")
+    parser.add_argument("--keyspace", type=int, default=20000,
+                        help="Number of distinct keys")
+    parser.add_argument("--shards", type=int, default=16,
+                        help="Number of shards for ShardedLRUCache")
+    parser.add_argument("--read-ratio", type=float, default=0.8,
+                        help="Share of get operations")
+    args = parser.parse_args()
+
+    print(f"{'threads':>8} {'global lock':>14} {'sharded':>14} {'ratio':>7}")
+    for num_threads in (1, 2, 4, 8, 16, 32):
+        single = run_threads(GlobalLockCache(args.limit), num_threads,
+                             args.ops, args.keyspace, args.read_ratio)
+        sharded = run_threads(ShardedLRUCache(args.limit, args.shards),
+                              num_threads, args.ops, args.keyspace,
+                              args.read_ratio)
+        print(f"{num_threads:>8} {single:>14,.0f} {sharded:>14,.0f} "
+              f"{sharded / single:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
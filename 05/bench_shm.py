@@ -0,0 +1,90 @@
+"""Бенчмарк общего кэша в разделяемой памяти под нагрузкой процессов.
+
+Пример запуска:
+    python bench_shm.py --ops 20000 --processes 1 2 4 8
+"""
+
+import argparse
+import multiprocessing
+import random
+import time
+
+from shm_cache import SharedLRUCache
+
+
+def worker(cache, seed, ops, keyspace, read_ratio, start_event):
+    """Выполняет смесь get/set над общим кэшем.
+
+    Args:
+        cache (SharedLRUCache): Общий кэш
+        seed (int): Зерно генератора
+        ops (int): Количество операций
+        keyspace (int): Количество различных ключей
+        read_ratio (float): Доля операций чтения
+        start_event: Событие одновременного старта
+    """
+    rnd = random.Random(seed)
+    keys = [f"key{rnd.randrange(keyspace)}" for _ in range(ops)]
+    reads = [rnd.random() < read_ratio for _ in range(ops)]
+    start_event.wait()
+    for key, is_read in zip(keys, reads):
+        if is_read:
+            cache.get(key)
+        else:
+            cache.set(key, key)
+    cache.close()
+
+
+def run(num_processes, args):
+    """Запускает процессы и замеряет суммарную пропускную способность.
+
+    Args:
+        num_processes (int): Количество процессов
+        args: Аргументы командной строки
+
+    Returns:
+        tuple: (операций в секунду, доля попаданий после прогона)
+    """
+    with SharedLRUCache(args.limit) as cache:
+        start_event = multiprocessing.Event()
+        processes = [
+            multiprocessing.Process(
+                target=worker,
+                args=(cache, seed, args.ops, args.keyspace,
+                      args.read_ratio, start_event))
+            for seed in range(num_processes)
+        ]
+        for process in processes:
+            process.start()
+        start = time.perf_counter()
+        start_event.set()
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - start
+        hits = sum(f"key{i}" in cache for i in range(args.keyspace))
+        return num_processes * args.ops / elapsed, hits / args.keyspace
+
+
+def main():
+    """Точка входа бенчмарка."""
+    parser = argparse.ArgumentParser(description="Shared-memory cache bench")
+    parser.add_argument("--ops", type=int, default=20000,
+                        help="Operations per process")
+    parser.add_argument("--limit", type=int, default=10000,
+                        help="Cache capacity")
+    parser.add_argument("--keyspace", type=int, default=20000,
+                        help="Number of distinct keys")
+    parser.add_argument("--read-ratio", type=float, default=0.8,
+                        help="Share of get operations")
+    parser.add_argument("--processes", type=int, nargs="+",
+                        default=[1, 2, 4, 8], help="Process counts to test")
+    args = parser.parse_args()
+
+    print(f"{'processes':>9} {'ops/sec':>12} {'resident keys':>14}")
+    for num_processes in args.processes:
+        ops, resident = run(num_processes, args)
+        print(f"{num_processes:>9} {ops:>12,.0f} {resident:>14.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Замер времени сохранения и загрузки снимка LRUCache.
+
+Пример запуска:
+    python bench_snapshot.py --entries 1000000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from lru_cache import LRUCache
+
+
+def main():
+    """Точка входа бенчмарка."""
+    parser = argparse.ArgumentParser(description="LRUCache snapshot bench")
+    parser.add_argument("--entries", type=int, default=1000000,
+                        help="Number of cache entries")
+    args = parser.parse_args()
+
+    cache = LRUCache(args.entries)
+    for i in range(args.entries):
+        cache.set(f"key{i}", f"value{i}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cache.snap")
+        start = time.perf_counter()
+        cache.dump(path)
+        dump_time = time.perf_counter() - start
+        size = os.path.getsize(path)
+        print(f"dump: {dump_time:.2f} s, {size / 2 ** 20:.1f} MiB, "
+              f"{size / args.entries:.1f} bytes/entry")
+
+        for use_mmap in (False, True):
+            restored = LRUCache(args.entries)
+            start = time.perf_counter()
+            restored.load(path, use_mmap=use_mmap)
+            load_time = time.perf_counter() - start
+            mode = "mmap" if use_mmap else "read"
+            print(f"load ({mode}): {load_time:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
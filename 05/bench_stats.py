@@ -0,0 +1,65 @@
+"""Замер накладных расходов статистики LRUCache.
+
+Пример запуска:
+    python bench_stats.py --ops 500000
+"""
+
+import argparse
+import random
+import timeit
+
+from lru_cache import LRUCache
+
+
+def measure(stats, keys, repeat):
+    """Замеряет время get и set с включенной или выключенной статистикой.
+
+    Args:
+        stats (bool): Включить ли статистику
+        keys (list): Ключи для операций
+        repeat (int): Количество повторов, берется лучший результат
+
+    Returns:
+        tuple: (нс на get, нс на set)
+    """
+    cache = LRUCache(len(keys) // 2, stats=stats)
+    for key in keys:
+        cache.set(key, key)
+
+    def run_get():
+        get = cache.get
+        for key in keys:
+            get(key)
+
+    def run_set():
+        set_ = cache.set
+        for key in keys:
+            set_(key, key)
+
+    get_time = min(timeit.repeat(run_get, number=1, repeat=repeat))
+    set_time = min(timeit.repeat(run_set, number=1, repeat=repeat))
+    return get_time / len(keys) * 1e9, set_time / len(keys) * 1e9
+
+
+def main():
+    """Точка входа бенчмарка."""
+    parser = argparse.ArgumentParser(description="Stats overhead bench")
+    parser.add_argument("--ops", type=int, default=200000,
+                        help="Operations per run")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="Repetitions, best is reported")
+    args = parser.parse_args()
+
+    rnd = random.Random(0)
+    keys = [rnd.randrange(args.ops) for _ in range(args.ops)]
+    off_get, off_set = measure(False, keys, args.repeat)
+    on_get, on_set = measure(True, keys, args.repeat)
+    print(f"{'':>10} {'get ns':>8} {'set ns':>8}")
+    print(f"{'stats off':>10} {off_get:>8.0f} {off_set:>8.0f}")
+    print(f"{'stats on':>10} {on_get:>8.0f} {on_set:>8.0f}")
+    print(f"{'overhead':>10} {on_get / off_get - 1:>8.1%} "
+          f"{on_set / off_set - 1:>8.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+"""Набор бенчмарков модуля LRU-кэша.
+
+Сравнивает LRUCache и CompactLRUCache с LRU на collections.OrderedDict
+и functools.lru_cache на нескольких нагрузках и емкостях. Для каждого
+прогона замеряются операции в секунду и пиковая память (tracemalloc,
+отдельным прогоном, чтобы трассировка не искажала скорость).
+Результаты сохраняются в JSON, который можно сравнить с предыдущим.
+
+Пример запуска:
+    python bench_suite.py --output new.json
+    python bench_suite.py --output new.json --compare old.json
+"""
+
+import argparse
+import bisect
+import functools
+import itertools
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from collections import OrderedDict
+
+from lru_cache import CompactLRUCache, LRUCache
+
+
+class OrderedDictLRU:
+    """Эталонный LRU-кэш на OrderedDict."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.data = OrderedDict()
+
+    def get(self, key):
+        """Возвращает значение и делает ключ самым новым."""
+        try:
+            self.data.move_to_end(key)
+        except KeyError:
+            return None
+        return self.data[key]
+
+    def set(self, key, value):
+        """Записывает значение, вытесняя самый старый ключ."""
+        data = self.data
+        if key in data:
+            data.move_to_end(key)
+        elif len(data) >= self.limit:
+            data.popitem(last=False)
+        data[key] = value
+
+
+class FunctoolsLRU:
+    """Обертка functools.lru_cache для сквозного чтения.
+
+    functools.lru_cache нельзя заполнить напрямую, поэтому он
+    участвует только в нагрузках со сквозным чтением (fetch).
+    """
+
+    read_through_only = True
+
+    def __init__(self, limit):
+        self.fetch = functools.lru_cache(maxsize=limit)(_load)
+
+
+def _load(key):
+    """Имитация загрузки значения при промахе."""
+    return key
+
+
+IMPLEMENTATIONS = {
+    "LRUCache": LRUCache,
+    "CompactLRUCache": CompactLRUCache,
+    "OrderedDict": OrderedDictLRU,
+    "functools.lru_cache": FunctoolsLRU,
+}
+
+
+def _zipf_keys(rnd, count, keyspace, skew=1.0):
+    """Генерирует ключи с распределением Зипфа.
+
+    Args:
+        rnd (random.Random): Генератор
+        count (int): Количество ключей
+        keyspace (int): Количество различных ключей
+        skew (float): Параметр распределения
+
+    Returns:
+        list: Ключи
+    """
+    weights = [1 / rank ** skew for rank in range(1, keyspace + 1)]
+    cumulative = list(itertools.accumulate(weights))
+    total = cumulative[-1]
+    return [
+        min(bisect.bisect_left(cumulative, rnd.random() * total),
+            keyspace - 1)
+        for _ in range(count)
+    ]
+
+
+def make_workload(name, capacity, ops, seed=0):
+    """Строит последовательность операций нагрузки.
+
+    Операции - пары (вид, ключ), где вид: "get", "set" или "fetch"
+    (сквозное чтение: get, при промахе set).
+
+    Args:
+        name (str): Название нагрузки
+        capacity (int): Емкость кэша
+        ops (int): Количество операций
+        seed (int): Зерно генератора
+
+    Returns:
+        list: Операции нагрузки
+    """
+    rnd = random.Random(seed)
+    keyspace = capacity * 2
+    if name in ("get-heavy", "set-heavy", "mixed"):
+        read_ratio = {"get-heavy": 0.9, "set-heavy": 0.1, "mixed": 0.5}[name]
+        return [
+            ("get" if rnd.random() < read_ratio else "set",
+             rnd.randrange(keyspace))
+            for _ in range(ops)
+        ]
+    if name == "zipf":
+        return [("fetch", key)
+                for key in _zipf_keys(rnd, ops, keyspace * 5)]
+    if name == "scan":
+        # Циклический проход по набору чуть больше емкости -
+        # худший случай для LRU
+        return [("fetch", i % (capacity + capacity // 10))
+                for i in range(ops)]
+    raise ValueError(f"Unknown workload: {name}")
+
+
+WORKLOADS = ["get-heavy", "set-heavy", "mixed", "zipf", "scan"]
+
+
+def run_ops(cache, operations):
+    """Выполняет операции над кэшем.
+
+    Args:
+        cache: Кэш
+        operations (list): Операции нагрузки
+
+    Returns:
+        int: Количество попаданий
+    """
+    hits = 0
+    if getattr(cache, "read_through_only", False):
+        fetch = cache.fetch
+        for _, key in operations:
+            fetch(key)
+        return fetch.cache_info().hits
+    get = cache.get
+    set_ = cache.set
+    for kind, key in operations:
+        if kind == "set":
+            set_(key, key)
+        elif get(key) is not None:
+            hits += 1
+        elif kind == "fetch":
+            set_(key, key)
+    return hits
+
+
+def bench_one(impl, workload, capacity, operations, repeat):
+    """Замеряет одну реализацию на одной нагрузке.
+
+    Args:
+        impl (str): Название реализации
+        workload (str): Название нагрузки
+        capacity (int): Емкость кэша
+        operations (list): Операции нагрузки
+        repeat (int): Количество повторов, берется лучший
+
+    Returns:
+        dict: Результат прогона или None, если реализация
+            не поддерживает нагрузку
+    """
+    cache_cls = IMPLEMENTATIONS[impl]
+    read_through = getattr(cache_cls, "read_through_only", False)
+    if read_through and operations[0][0] != "fetch":
+        return None
+
+    best = float("inf")
+    hits = 0
+    for _ in range(repeat):
+        cache = cache_cls(capacity)
+        start = time.perf_counter()
+        hits = run_ops(cache, operations)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    run_ops(cache_cls(capacity), operations)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "impl": impl,
+        "workload": workload,
+        "capacity": capacity,
+        "ops": len(operations),
+        "ops_per_sec": len(operations) / best,
+        "peak_bytes": peak,
+        "hit_ratio": hits / len(operations),
+    }
+
+
+def compare(results, baseline_path):
+    """Печатает изменение скорости и памяти относительно прошлого прогона.
+
+    Args:
+        results (list): Текущие результаты
+        baseline_path (str): Путь к JSON прошлого прогона
+    """
+    with open(baseline_path, "r", encoding="utf-8") as file:
+        baseline = json.load(file)["results"]
+    index = {(r["impl"], r["workload"], r["capacity"]): r for r in baseline}
+    print(f"\nCompared with {baseline_path}:")
+    for res in results:
+        old = index.get((res["impl"], res["workload"], res["capacity"]))
+        if old is None:
+            continue
+        speed = res["ops_per_sec"] / old["ops_per_sec"] - 1
+        memory = res["peak_bytes"] / max(old["peak_bytes"], 1) - 1
+        print(f"{res['impl']:>20} {res['workload']:>10} "
+              f"{res['capacity']:>8} speed {speed:>+7.1%} "
+              f"memory {memory:>+7.1%}")
+
+
+def main():
+    """Точка входа бенчмарка."""
+    parser = argparse.ArgumentParser(description="LRU cache benchmark suite")
+    parser.add_argument("--ops", type=int, default=100000,
+                        help="Operations per run")
+    parser.add_argument("--capacities", type=int, nargs="+",
+                        default=[1000, 10000, 100000],
+                        help="Cache capacities")
+    parser.add_argument("--workloads", nargs="+", default=WORKLOADS,
+                        choices=WORKLOADS, help="Workloads to run")
+    parser.add_argument("--impls", nargs="+", default=list(IMPLEMENTATIONS),
+                        choices=list(IMPLEMENTATIONS),
+                        help="Implementations to run")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Repetitions per run, best is reported")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Workload random seed")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Baseline JSON to diff against")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'impl':>20} {'workload':>10} {'capacity':>8} "
+          f"{'ops/sec':>12} {'peak KiB':>10} {'hit ratio':>9}")
+    for capacity in args.capacities:
+        for workload in args.workloads:
+            operations = make_workload(workload, capacity, args.ops,
+                                       args.seed)
+            for impl in args.impls:
+                res = bench_one(impl, workload, capacity, operations,
+                                args.repeat)
+                if res is None:
+                    continue
+                results.append(res)
+                print(f"{impl:>20} {workload:>10} {capacity:>8} "
+                      f"{res['ops_per_sec']:>12,.0f} "
+                      f"{res['peak_bytes'] / 1024:>10,.0f} "
+                      f"{res['hit_ratio']:>9.3f}")
+
+    if args.output:
+        report = {
+            "meta": {
+                "python": sys.version,
+                "platform": platform.platform(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "ops": args.ops,
+                "seed": args.seed,
+                "repeat": args.repeat,
+            },
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,39 +1,178 @@
 """Модуль реализации LRU-кэша."""
 
+import gc
+import mmap
+import pickle
+import struct
+import sys
+import threading
+import time
+from array import array
+from collections import namedtuple
+
+
 class Node:
     """Узел двусвязного списка для LRU-кэша."""
-    
-    def __init__(self, key, value):
+
+    # Без __dict__ каждый узел занимает в несколько раз меньше памяти
+    __slots__ = ("key", "value", "prev", "next", "expires_at", "weight",
+                 "heap_index")
+
+    def __init__(self, key, value, expires_at=None, weight=0):
         """Инициализация узла.
         
         Args:
             key: Ключ для доступа к узлу
             value: Значение, хранимое в узле
+            expires_at (float): Момент истечения срока жизни по часам
+                кэша или None, если срок не ограничен
+            weight (int): Вес значения в режиме ограничения по весу
         """
         self.key = key
         self.value = value
         self.prev = None  # Ссылка на предыдущий узел
         self.next = None  # Ссылка на следующий узел
+        self.expires_at = expires_at
+        self.weight = weight
+        # Позиция в куче сроков или -1, если узла в куче нет
+        self.heap_index = -1
+
+
+def default_weigher(value):
+    """Оценивает вес значения для кэша с ограничением по весу.
+
+    Для коллекций, строк и байтов вес равен длине, для остальных
+    объектов - размеру объекта по sys.getsizeof.
+
+    Args:
+        value: Значение
+
+    Returns:
+        int: Вес значения
+    """
+    try:
+        return len(value)
+    except TypeError:
+        return sys.getsizeof(value)
+
+
+# Заголовок файла снимка и формат длины кадра
+SNAPSHOT_MAGIC = b"LRUSNAP1"
+_FRAME_HEADER = struct.Struct("<I")
+# Количество записей в одном кадре снимка
+_FRAME_SIZE = 4096
+
+# Маркер отсутствующего значения (None может быть значением в кэше)
+_MISSING = object()
+
+CacheStats = namedtuple(
+    "CacheStats",
+    ["hits", "misses", "inserts", "updates", "evictions", "expirations",
+     "size", "weight"],
+)
+
+
+class _Counters:
+    """Изменяемые счетчики статистики кэша."""
+
+    __slots__ = ("hits", "misses", "inserts", "updates", "evictions",
+                 "expirations")
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.inserts = 0
+        self.updates = 0
+        self.evictions = 0
+        self.expirations = 0
 
 
 class LRUCache:
     """LRU-кэш с фиксированной емкостью.
+
+    Записи могут иметь срок жизни (TTL). Просроченная запись удаляется
+    лениво при обращении к ней, а также порциями при каждой вставке:
+    моменты истечения хранятся в куче, и set разбирает не более
+    sweep_batch просроченных записей с ее вершины.
+
+    Если задан max_weight, кэш дополнительно ограничен суммарным весом
+    значений: при вставке вытесняется столько старых записей, сколько
+    нужно, чтобы новая запись поместилась.
+
+    При stats=True кэш ведет счетчики попаданий, промахов, вставок и
+    вытеснений. Для этого методы get, set, get_many и set_many
+    экземпляра подменяются обертками со счетчиками, поэтому с
+    выключенной статистикой эти операции не платят ничего.
     
     Attributes:
-        limit (int): Максимальное количество элементов в кэше
+        limit (int): Максимальное количество элементов в кэше или None
         cache (dict): Словарь для быстрого доступа к узлам по ключу
         head (Node): Фиктивный узел-голова двусвязного списка
         tail (Node): Фиктивный узел-хвост двусвязного списка
+        ttl (float): Срок жизни записей по умолчанию в секундах или None
+        clock: Функция без аргументов, возвращающая текущее время
+        sweep_batch (int): Максимум просроченных записей,
+            удаляемых за одну вставку
+        max_weight (int): Максимальный суммарный вес значений или None
+        weigher: Функция, вычисляющая вес значения
+        oversize (str): Поведение при вставке значения тяжелее
+            max_weight: "skip" - не сохранять, "raise" - ValueError
+        weight (int): Текущий суммарный вес значений
+        on_evict: Функция on_evict(key, value, reason), вызываемая при
+            вытеснении ("capacity") и истечении срока ("expired")
     """
     
-    def __init__(self, limit=42):
+    def __init__(self, limit=42, ttl=None, clock=time.monotonic,
+                 sweep_batch=8, max_weight=None, weigher=default_weigher,
+                 oversize="skip", stats=False, on_evict=None):
         """Инициализация LRU-кэша.
         
         Args:
             limit (int): Максимальный размер кэша. По умолчанию 42.
+                None - количество элементов не ограничено.
+            ttl (float): Срок жизни записей по умолчанию в секундах.
+                None - записи не устаревают.
+            clock: Источник времени. Можно подменить в тестах.
+            sweep_batch (int): Максимум просроченных записей,
+                удаляемых за одну вставку.
+            max_weight (int): Максимальный суммарный вес значений.
+                None - вес не ограничен.
+            weigher: Функция вычисления веса значения.
+            oversize (str): "skip" или "raise" - что делать со
+                значением, которое тяжелее max_weight.
+            stats (bool): Вести ли счетчики статистики.
+            on_evict: Функция, вызываемая для вытесненных и
+                просроченных записей.
+
+        Raises:
+            ValueError: Если задана неизвестная политика oversize
         """
+        if oversize not in ("skip", "raise"):
+            raise ValueError(f"Unknown oversize policy: {oversize!r}")
         self.limit = limit
         self.cache = {}
+        self.ttl = ttl
+        self.clock = clock
+        self.sweep_batch = sweep_batch
+        self.max_weight = max_weight
+        # Порог для политики oversize; у сегментов ShardedLRUCache он
+        # равен общему бюджету, а не доле сегмента
+        self._max_item_weight = max_weight
+        self.weigher = weigher
+        self.oversize = oversize
+        self.weight = 0
+        self.on_evict = on_evict
+        self._stats = None
+        if stats:
+            self._stats = _Counters()
+            self.get = self._counted_get
+            self.set = self._counted_set
+            self.get_many = self._counted_get_many
+            self.set_many = self._counted_set_many
+        # Куча узлов с ограниченным сроком по expires_at. Узел хранит
+        # свою позицию, поэтому покидает кучу сразу при удалении из кэша
+        # и устаревших записей в ней не бывает
+        self._expiry_heap = []
         # Создаем фиктивные узлы головы и хвоста для упрощения логики
         self.head = Node(0, 0)
         self.tail = Node(0, 0)
@@ -63,6 +202,157 @@ class LRUCache:
         self.head.next.prev = node
         self.head.next = node
 
+    def _discard(self, node):
+        """Удаляет узел из списка и словаря.
+
+        Args:
+            node (Node): Узел для удаления
+        """
+        self._remove(node)
+        del self.cache[node.key]
+        self.weight -= node.weight
+        if node.heap_index >= 0:
+            self._heap_remove(node)
+
+    def _evict(self, node, reason):
+        """Удаляет узел по решению кэша и сообщает об этом.
+
+        Args:
+            node (Node): Узел для удаления
+            reason (str): "capacity" или "expired"
+        """
+        self._discard(node)
+        stats = self._stats
+        if stats is not None:
+            if reason == "expired":
+                stats.expirations += 1
+            else:
+                stats.evictions += 1
+        if self.on_evict is not None:
+            self.on_evict(node.key, node.value, reason)
+
+    def _sweep(self, now, max_items):
+        """Удаляет просроченные записи с вершины кучи сроков.
+
+        Args:
+            now (float): Текущее время
+            max_items (int): Максимум удаляемых записей или None
+
+        Returns:
+            int: Количество удаленных из кэша записей
+        """
+        heap = self._expiry_heap
+        removed = 0
+        while heap and heap[0].expires_at <= now:
+            if max_items is not None and removed >= max_items:
+                break
+            # _discard убирает узел и из кучи
+            self._evict(heap[0], "expired")
+            removed += 1
+        return removed
+
+    def _set_expiry(self, node, expires_at):
+        """Меняет срок жизни узла и его положение в куче сроков.
+
+        Args:
+            node (Node): Узел
+            expires_at (float): Новый момент истечения или None
+        """
+        node.expires_at = expires_at
+        if expires_at is None:
+            if node.heap_index >= 0:
+                self._heap_remove(node)
+        elif node.heap_index >= 0:
+            self._heap_fix(node.heap_index)
+        else:
+            heap = self._expiry_heap
+            heap.append(node)
+            self._sift_up(len(heap) - 1)
+
+    def _heap_remove(self, node):
+        """Удаляет узел из кучи сроков за O(log n).
+
+        Args:
+            node (Node): Узел, находящийся в куче
+        """
+        heap = self._expiry_heap
+        index = node.heap_index
+        node.heap_index = -1
+        last = heap.pop()
+        if last is not node:
+            heap[index] = last
+            last.heap_index = index
+            self._heap_fix(index)
+
+    def _heap_fix(self, index):
+        """Восстанавливает кучу после изменения срока элемента.
+
+        Args:
+            index (int): Позиция измененного элемента
+        """
+        if not self._sift_up(index):
+            self._sift_down(index)
+
+    def _sift_up(self, index):
+        """Поднимает элемент кучи к корню, пока он раньше родителя.
+
+        Args:
+            index (int): Позиция элемента
+
+        Returns:
+            bool: True, если элемент сдвинулся
+        """
+        heap = self._expiry_heap
+        node = heap[index]
+        start = index
+        while index > 0:
+            parent = (index - 1) >> 1
+            other = heap[parent]
+            if other.expires_at <= node.expires_at:
+                break
+            heap[index] = other
+            other.heap_index = index
+            index = parent
+        heap[index] = node
+        node.heap_index = index
+        return index != start
+
+    def _sift_down(self, index):
+        """Опускает элемент кучи на место.
+
+        Как в heapq: элемент сначала спускается до листа по меньшим
+        потомкам, затем поднимается - так на уровень нужно одно
+        сравнение вместо двух.
+
+        Args:
+            index (int): Позиция элемента
+        """
+        heap = self._expiry_heap
+        size = len(heap)
+        node = heap[index]
+        child = 2 * index + 1
+        while child < size:
+            right = child + 1
+            if right < size and \
+                    heap[right].expires_at < heap[child].expires_at:
+                child = right
+            other = heap[child]
+            heap[index] = other
+            other.heap_index = index
+            index = child
+            child = 2 * index + 1
+        heap[index] = node
+        node.heap_index = index
+        self._sift_up(index)
+
+    def expire(self):
+        """Удаляет из кэша все просроченные записи.
+
+        Returns:
+            int: Количество удаленных записей
+        """
+        return self._sweep(self.clock(), None)
+
     def get(self, key):
         """Получает значение по ключу из кэша.
         
@@ -74,15 +364,19 @@ class LRUCache:
         Returns:
             Значение, связанное с ключом, или None если ключ не найден
         """
-        if key in self.cache:
-            node = self.cache[key]
-            # Перемещаем узел в начало (самый новый)
-            self._remove(node)
-            self._add_to_head(node)
-            return node.value
-        return None
+        node = self.cache.get(key)
+        if node is None:
+            return None
+        if node.expires_at is not None and node.expires_at <= self.clock():
+            # Ленивое удаление просроченной записи
+            self._evict(node, "expired")
+            return None
+        # Перемещаем узел в начало (самый новый)
+        self._remove(node)
+        self._add_to_head(node)
+        return node.value
 
-    def set(self, key, value):
+    def set(self, key, value, ttl=None):
         """Устанавливает значение по ключу в кэше.
         
         Если ключ уже существует, обновляет значение и делает элемент самым новым.
@@ -91,25 +385,484 @@ class LRUCache:
         Args:
             key: Ключ для установки
             value: Значение для установки
+            ttl (float): Срок жизни записи в секундах. Если не задан,
+                используется срок жизни кэша по умолчанию.
+
+        Raises:
+            ValueError: Если значение тяжелее max_weight, а политика
+                oversize равна "raise"
         """
-        if key in self.cache:
+        weight = self._weigh(key, value)
+        if weight is None:
+            return
+        if ttl is None:
+            ttl = self.ttl
+        now = None
+        if ttl is not None or self._expiry_heap:
+            now = self.clock()
+            if self._expiry_heap:
+                self._sweep(now, self.sweep_batch)
+        self._store(key, value, ttl, now, weight)
+
+    def _weigh(self, key, value):
+        """Вычисляет вес значения и применяет политику oversize.
+
+        Args:
+            key: Ключ
+            value: Значение
+
+        Returns:
+            int: Вес значения (0 без ограничения по весу) или None,
+                если значение не должно сохраняться
+
+        Raises:
+            ValueError: Если значение тяжелее max_weight, а политика
+                oversize равна "raise"
+        """
+        if self.max_weight is None:
+            return 0
+        weight = self.weigher(value)
+        if weight > self._max_item_weight:
+            if self.oversize == "raise":
+                raise ValueError(
+                    f"Value weight {weight} exceeds max_weight "
+                    f"{self._max_item_weight}"
+                )
+            # Старое значение ключа тоже устарело - удаляем его
+            node = self.cache.get(key)
+            if node is not None:
+                self._discard(node)
+            return None
+        return weight
+
+    def _store(self, key, value, ttl, now, weight):
+        """Записывает значение и выполняет вытеснение.
+
+        Args:
+            key: Ключ
+            value: Значение
+            ttl (float): Срок жизни записи или None
+            now (float): Текущее время (нужно только при заданном ttl)
+            weight (int): Вес значения
+        """
+        expires_at = None if ttl is None else now + ttl
+
+        node = self.cache.get(key)
+        if node is not None:
             # Обновление существующего ключа
-            node = self.cache[key]
             node.value = value
             self._remove(node)
             self._add_to_head(node)
         else:
             # Добавление нового ключа
-            if len(self.cache) >= self.limit:
+            if self.limit is not None and len(self.cache) >= self.limit:
                 # Удаляем самый старый элемент (перед хвостом)
-                lru_node = self.tail.prev
-                self._remove(lru_node)
-                del self.cache[lru_node.key]
+                self._evict(self.tail.prev, "capacity")
             
             # Создаем и добавляем новый узел
-            new_node = Node(key, value)
-            self.cache[key] = new_node
-            self._add_to_head(new_node)
+            node = Node(key, value)
+            self.cache[key] = node
+            self._add_to_head(node)
+        if expires_at is not None or node.heap_index >= 0:
+            self._set_expiry(node, expires_at)
+
+        if self.max_weight is not None:
+            self.weight += weight - node.weight
+            node.weight = weight
+            # Новый узел в голове списка и не вытесняется: если он
+            # тяжелее бюджета сегмента, в сегменте остается только он
+            while self.weight > self.max_weight and \
+                    self.tail.prev is not node:
+                self._evict(self.tail.prev, "capacity")
+
+    def get_many(self, keys):
+        """Получает значения сразу для нескольких ключей.
+
+        Эквивалентно вызову get для каждого ключа по порядку, но время
+        запрашивается не больше одного раза, а перестановка узлов
+        выполняется без дополнительных вызовов методов.
+
+        Args:
+            keys: Итерируемый набор ключей
+
+        Returns:
+            dict: Найденные ключи и их значения. Отсутствующие и
+                просроченные ключи в результат не попадают.
+        """
+        cache = self.cache
+        head = self.head
+        result = {}
+        now = None
+        for key in keys:
+            node = cache.get(key)
+            if node is None:
+                continue
+            if node.expires_at is not None:
+                if now is None:
+                    now = self.clock()
+                if node.expires_at <= now:
+                    self._evict(node, "expired")
+                    continue
+            # Перемещаем узел в начало (самый новый)
+            node.prev.next = node.next
+            node.next.prev = node.prev
+            node.next = head.next
+            node.prev = head
+            head.next.prev = node
+            head.next = node
+            result[key] = node.value
+        return result
+
+    def set_many(self, mapping, ttl=None):
+        """Устанавливает значения сразу для нескольких ключей.
+
+        Эквивалентно вызову set для каждой пары по порядку, но время
+        запрашивается и просроченные записи очищаются один раз.
+
+        Args:
+            mapping: Словарь или итерируемый набор пар (ключ, значение)
+            ttl (float): Срок жизни записей в секундах. Если не задан,
+                используется срок жизни кэша по умолчанию.
+
+        Raises:
+            ValueError: Если значение тяжелее max_weight, а политика
+                oversize равна "raise"
+        """
+        items = mapping.items() if hasattr(mapping, "items") else mapping
+        ttl, now = self._begin_batch(ttl)
+        for key, value in items:
+            weight = self._weigh(key, value)
+            if weight is not None:
+                self._store(key, value, ttl, now, weight)
+
+    def _begin_batch(self, ttl):
+        """Готовит пакетную вставку: запрашивает время и чистит кэш.
+
+        Args:
+            ttl (float): Срок жизни записей или None
+
+        Returns:
+            tuple: (срок жизни с учетом значения по умолчанию,
+                текущее время или None, если оно не нужно)
+        """
+        if ttl is None:
+            ttl = self.ttl
+        now = None
+        if ttl is not None or self._expiry_heap:
+            now = self.clock()
+            if self._expiry_heap:
+                self._sweep(now, self.sweep_batch)
+        return ttl, now
+
+    def pop(self, key, default=None):
+        """Удаляет ключ из кэша и возвращает его значение.
+
+        Args:
+            key: Ключ для удаления
+            default: Значение, возвращаемое при отсутствии ключа
+
+        Returns:
+            Значение, связанное с ключом, или default
+        """
+        node = self.cache.get(key)
+        if node is None:
+            return default
+        if node.expires_at is not None and node.expires_at <= self.clock():
+            self._evict(node, "expired")
+            return default
+        self._discard(node)
+        return node.value
+
+    def __contains__(self, key):
+        """Проверяет наличие непросроченного ключа без изменения порядка.
+
+        Args:
+            key: Ключ для проверки
+
+        Returns:
+            bool: True, если ключ есть в кэше
+        """
+        node = self.cache.get(key)
+        if node is None:
+            return False
+        return node.expires_at is None or node.expires_at > self.clock()
+
+    def __len__(self):
+        """Возвращает количество записей в кэше.
+
+        Просроченные, но еще не удаленные записи тоже учитываются.
+
+        Returns:
+            int: Количество записей
+        """
+        return len(self.cache)
+
+    def __delitem__(self, key):
+        """Удаление ключа через синтаксис словаря.
+
+        Args:
+            key: Ключ для удаления
+
+        Raises:
+            KeyError: Если ключа нет в кэше или он просрочен
+        """
+        if self.pop(key, _MISSING) is _MISSING:
+            raise KeyError(key)
+
+    def _counted_get(self, key):
+        """get со счетчиками попаданий и промахов.
+
+        Args:
+            key: Ключ для поиска
+
+        Returns:
+            Значение, связанное с ключом, или None если ключ не найден
+        """
+        value = LRUCache.get(self, key)
+        # get удаляет только просроченные ключи, поэтому ключ остается
+        # в словаре ровно при попадании
+        if key in self.cache:
+            self._stats.hits += 1
+        else:
+            self._stats.misses += 1
+        return value
+
+    def _counted_set(self, key, value, ttl=None):
+        """set со счетчиками вставок и обновлений.
+
+        Args:
+            key: Ключ для установки
+            value: Значение для установки
+            ttl (float): Срок жизни записи в секундах
+        """
+        existed = key in self.cache
+        LRUCache.set(self, key, value, ttl)
+        if key in self.cache:
+            if existed:
+                self._stats.updates += 1
+            else:
+                self._stats.inserts += 1
+
+    def _counted_get_many(self, keys):
+        """get_many со счетчиками попаданий и промахов.
+
+        Args:
+            keys: Итерируемый набор ключей
+
+        Returns:
+            dict: Найденные ключи и их значения
+        """
+        keys = list(keys)
+        result = LRUCache.get_many(self, keys)
+        self._stats.hits += len(result)
+        self._stats.misses += len(keys) - len(result)
+        return result
+
+    def _counted_set_many(self, mapping, ttl=None):
+        """set_many со счетчиками вставок и обновлений.
+
+        Args:
+            mapping: Словарь или итерируемый набор пар (ключ, значение)
+            ttl (float): Срок жизни записей в секундах
+        """
+        items = mapping.items() if hasattr(mapping, "items") else mapping
+        ttl, now = self._begin_batch(ttl)
+        stats = self._stats
+        # Считаем по каждой паре, как _counted_set: повтор ключа в пакете
+        # - обновление, отброшенное тяжелое значение не учитывается
+        for key, value in items:
+            existed = key in self.cache
+            weight = self._weigh(key, value)
+            if weight is not None:
+                self._store(key, value, ttl, now, weight)
+            if key in self.cache:
+                if existed:
+                    stats.updates += 1
+                else:
+                    stats.inserts += 1
+
+    def dump(self, path):
+        """Сохраняет записи кэша в файл от самой старой к самой новой.
+
+        Файл состоит из заголовка SNAPSHOT_MAGIC и кадров: 4 байта длины
+        и pickle-список записей (ключ, значение, оставшийся TTL или
+        None). Записи сериализуются кадрами по мере обхода списка, так
+        что весь снимок в памяти не собирается. Просроченные записи
+        не сохраняются.
+
+        Args:
+            path (str): Путь к файлу снимка
+
+        Returns:
+            int: Количество сохраненных записей
+        """
+        now = self.clock()
+        saved = 0
+        with open(path, "wb") as file:
+            file.write(SNAPSHOT_MAGIC)
+            frame = []
+            node = self.tail.prev
+            while node is not self.head:
+                remaining = None
+                if node.expires_at is not None:
+                    remaining = node.expires_at - now
+                if remaining is None or remaining > 0:
+                    frame.append((node.key, node.value, remaining))
+                    if len(frame) >= _FRAME_SIZE:
+                        saved += self._write_frame(file, frame)
+                        frame = []
+                node = node.prev
+            if frame:
+                saved += self._write_frame(file, frame)
+        return saved
+
+    @staticmethod
+    def _write_frame(file, frame):
+        """Записывает один кадр снимка.
+
+        Args:
+            file: Файл, открытый на запись в бинарном режиме
+            frame (list): Записи кадра
+
+        Returns:
+            int: Количество записей в кадре
+        """
+        payload = pickle.dumps(frame, protocol=pickle.HIGHEST_PROTOCOL)
+        file.write(_FRAME_HEADER.pack(len(payload)))
+        file.write(payload)
+        return len(frame)
+
+    def load(self, path, use_mmap=False):
+        """Загружает записи из снимка, сохраненного методом dump.
+
+        Записи добавляются в порядке от самой старой к самой новой,
+        поэтому порядок вытеснения восстанавливается. Если записей
+        больше, чем вмещает кэш, самые старые вытесняются. Снимок
+        разбирается через pickle - загружать можно только файлы из
+        доверенного источника.
+
+        На время загрузки сборщик мусора отключается: при создании
+        миллионов узлов его проходы занимают заметную долю времени.
+
+        Args:
+            path (str): Путь к файлу снимка
+            use_mmap (bool): Читать файл через отображение в память
+                вместо последовательного чтения
+
+        Returns:
+            int: Количество прочитанных записей
+
+        Raises:
+            ValueError: Если файл не является снимком кэша
+        """
+        loaded = 0
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            with open(path, "rb") as file:
+                if use_mmap:
+                    with mmap.mmap(file.fileno(), 0,
+                                   access=mmap.ACCESS_READ) as mapped:
+                        with memoryview(mapped) as view:
+                            for frame in self._mapped_frames(view):
+                                loaded += self._restore_frame(frame)
+                else:
+                    for frame in self._file_frames(file):
+                        loaded += self._restore_frame(frame)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+        return loaded
+
+    @staticmethod
+    def _file_frames(file):
+        """Последовательно читает кадры снимка из файла.
+
+        Args:
+            file: Файл, открытый на чтение в бинарном режиме
+
+        Yields:
+            list: Записи очередного кадра
+
+        Raises:
+            ValueError: Если заголовок или кадр поврежден
+        """
+        if file.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+            raise ValueError("Not an LRUCache snapshot")
+        while True:
+            header = file.read(_FRAME_HEADER.size)
+            if not header:
+                return
+            if len(header) < _FRAME_HEADER.size:
+                raise ValueError("Truncated snapshot frame")
+            (size,) = _FRAME_HEADER.unpack(header)
+            payload = file.read(size)
+            if len(payload) < size:
+                raise ValueError("Truncated snapshot frame")
+            yield pickle.loads(payload)
+
+    @staticmethod
+    def _mapped_frames(view):
+        """Разбирает кадры снимка из отображенного в память файла.
+
+        Args:
+            view (memoryview): Содержимое файла
+
+        Yields:
+            list: Записи очередного кадра
+
+        Raises:
+            ValueError: Если заголовок или кадр поврежден
+        """
+        offset = len(SNAPSHOT_MAGIC)
+        if bytes(view[:offset]) != SNAPSHOT_MAGIC:
+            raise ValueError("Not an LRUCache snapshot")
+        end = len(view)
+        while offset < end:
+            if offset + _FRAME_HEADER.size > end:
+                raise ValueError("Truncated snapshot frame")
+            (size,) = _FRAME_HEADER.unpack_from(view, offset)
+            offset += _FRAME_HEADER.size
+            if offset + size > end:
+                raise ValueError("Truncated snapshot frame")
+            yield pickle.loads(view[offset:offset + size])
+            offset += size
+
+    def _restore_frame(self, frame):
+        """Добавляет в кэш записи одного кадра.
+
+        Args:
+            frame (list): Записи (ключ, значение, оставшийся TTL)
+
+        Returns:
+            int: Количество записей в кадре
+        """
+        now = self.clock()
+        store = self._store
+        if self.max_weight is None:
+            for key, value, ttl in frame:
+                store(key, value, ttl, now, 0)
+        else:
+            for key, value, ttl in frame:
+                weight = self._weigh(key, value)
+                if weight is not None:
+                    store(key, value, ttl, now, weight)
+        return len(frame)
+
+    def stats(self):
+        """Возвращает снимок статистики кэша.
+
+        Счетчики равны нулю, если кэш создан без stats=True.
+
+        Returns:
+            CacheStats: Значения счетчиков, текущий размер и вес
+        """
+        counters = self._stats or _Counters()
+        return CacheStats(
+            counters.hits, counters.misses, counters.inserts,
+            counters.updates, counters.evictions, counters.expirations,
+            len(self.cache), self.weight,
+        )
 
     def __getitem__(self, key):
         """Получение значения через синтаксис словаря.
@@ -129,4 +882,438 @@ class LRUCache:
             key: Ключ для установки
             value: Значение для установки
         """
-        self.set(key, value)
\ No newline at end of file
+        self.set(key, value)
+
+
+class CompactLRUCache:
+    """LRU-кэш с компактным хранением без объектов-узлов.
+
+    Список давности хранится в заранее выделенных массивах: для каждого
+    слота хранятся ключ, значение и индексы соседей. Слот 0 - фиктивный
+    узел, замыкающий список в кольцо (его next - самый новый элемент,
+    prev - самый старый). Освобожденные pop слоты связываются в список
+    через массив next и используются повторно. Поведение get/set/pop
+    совпадает с LRUCache.
+
+    Attributes:
+        limit (int): Максимальное количество элементов в кэше
+        cache (dict): Словарь ключ -> номер слота
+    """
+
+    def __init__(self, limit=42):
+        """Инициализация компактного LRU-кэша.
+
+        Args:
+            limit (int): Максимальный размер кэша. По умолчанию 42.
+        """
+        self.limit = limit
+        self.cache = {}
+        size = limit + 1
+        self._keys = [None] * size
+        self._values = [None] * size
+        self._prev = array("i", bytes(size * array("i").itemsize))
+        self._next = array("i", bytes(size * array("i").itemsize))
+        # Номер следующего ни разу не использованного слота
+        self._unused = 1
+        # Голова списка освобожденных слотов (0 - список пуст)
+        self._free = 0
+
+    def _unlink(self, slot):
+        """Исключает слот из списка давности.
+
+        Args:
+            slot (int): Номер слота
+        """
+        prev_slot = self._prev[slot]
+        next_slot = self._next[slot]
+        self._next[prev_slot] = next_slot
+        self._prev[next_slot] = prev_slot
+
+    def _link_to_head(self, slot):
+        """Вставляет слот в начало списка давности.
+
+        Args:
+            slot (int): Номер слота
+        """
+        first = self._next[0]
+        self._next[slot] = first
+        self._prev[slot] = 0
+        self._prev[first] = slot
+        self._next[0] = slot
+
+    def _allocate(self):
+        """Выделяет слот под новый элемент.
+
+        Если кэш заполнен, освобождает слот самого старого элемента.
+
+        Returns:
+            int: Номер свободного слота
+        """
+        if len(self.cache) >= self.limit:
+            slot = self._prev[0]
+            self._unlink(slot)
+            del self.cache[self._keys[slot]]
+            return slot
+        if self._free:
+            slot = self._free
+            self._free = self._next[slot]
+            return slot
+        slot = self._unused
+        self._unused += 1
+        return slot
+
+    def get(self, key):
+        """Получает значение по ключу из кэша.
+
+        Args:
+            key: Ключ для поиска
+
+        Returns:
+            Значение, связанное с ключом, или None если ключ не найден
+        """
+        slot = self.cache.get(key)
+        if slot is None:
+            return None
+        self._unlink(slot)
+        self._link_to_head(slot)
+        return self._values[slot]
+
+    def set(self, key, value):
+        """Устанавливает значение по ключу в кэше.
+
+        Args:
+            key: Ключ для установки
+            value: Значение для установки
+        """
+        slot = self.cache.get(key)
+        if slot is None:
+            slot = self._allocate()
+            self.cache[key] = slot
+            self._keys[slot] = key
+        else:
+            self._unlink(slot)
+        self._values[slot] = value
+        self._link_to_head(slot)
+
+    def pop(self, key, default=None):
+        """Удаляет ключ из кэша и возвращает его значение.
+
+        Освободившийся слот добавляется в список свободных слотов.
+
+        Args:
+            key: Ключ для удаления
+            default: Значение, возвращаемое при отсутствии ключа
+
+        Returns:
+            Значение, связанное с ключом, или default
+        """
+        slot = self.cache.pop(key, None)
+        if slot is None:
+            return default
+        self._unlink(slot)
+        value = self._values[slot]
+        # Не держим ссылки на удаленные ключ и значение
+        self._keys[slot] = None
+        self._values[slot] = None
+        self._next[slot] = self._free
+        self._free = slot
+        return value
+
+    def __delitem__(self, key):
+        """Удаление ключа через синтаксис словаря.
+
+        Args:
+            key: Ключ для удаления
+
+        Raises:
+            KeyError: Если ключа нет в кэше
+        """
+        if self.pop(key, _MISSING) is _MISSING:
+            raise KeyError(key)
+
+    def __getitem__(self, key):
+        """Получение значения через синтаксис словаря.
+
+        Args:
+            key: Ключ для поиска
+
+        Returns:
+            Значение, связанное с ключом, или None если ключ не найден
+        """
+        return self.get(key)
+
+    def __setitem__(self, key, value):
+        """Установка значения через синтаксис словаря.
+
+        Args:
+            key: Ключ для установки
+            value: Значение для установки
+        """
+        self.set(key, value)
+
+
+class ShardedLRUCache:
+    """Потокобезопасный LRU-кэш, разбитый на независимые сегменты.
+
+    Ключи распределяются по сегментам по значению hash(key). Каждый
+    сегмент - обычный LRUCache со своей блокировкой, поэтому потоки,
+    работающие с разными сегментами, не ждут друг друга. Порядок
+    вытеснения соблюдается внутри сегмента, а не глобально.
+
+    Бюджет max_weight делится между сегментами поровну. Политика
+    oversize применяется к общему бюджету: значение тяжелее доли
+    сегмента, но не тяжелее max_weight, сохраняется и вытесняет
+    остальные записи своего сегмента.
+
+    Attributes:
+        limit (int): Суммарная емкость всех сегментов или None
+        shards (int): Количество сегментов
+    """
+
+    def __init__(self, limit=42, shards=16, **options):
+        """Инициализация сегментированного кэша.
+
+        Args:
+            limit (int): Суммарный размер кэша. По умолчанию 42.
+                None - количество элементов не ограничено.
+            shards (int): Количество сегментов. Если limit меньше
+                количества сегментов, сегментов создается limit штук.
+            **options: Параметры LRUCache (ttl, clock и т.д.),
+                применяемые к каждому сегменту.
+
+        Raises:
+            ValueError: Если limit или shards меньше 1
+        """
+        if shards < 1 or (limit is not None and limit < 1):
+            raise ValueError("limit and shards must be positive")
+        self.limit = limit
+        self.shards = shards if limit is None else min(shards, limit)
+        max_weight = options.get("max_weight")
+        if max_weight is not None:
+            # Бюджет веса, как и емкость, делится между сегментами
+            options["max_weight"] = max_weight // self.shards
+        if limit is None:
+            limits = [None] * self.shards
+        else:
+            # Емкость распределяется между сегментами как можно
+            # равномернее
+            base, extra = divmod(limit, self.shards)
+            limits = [base + (1 if i < extra else 0)
+                      for i in range(self.shards)]
+        self._segments = [LRUCache(size, **options) for size in limits]
+        if max_weight is not None:
+            for segment in self._segments:
+                segment._max_item_weight = max_weight
+        self._locks = [threading.Lock() for _ in range(self.shards)]
+
+    def _index(self, key):
+        """Возвращает номер сегмента для ключа.
+
+        Args:
+            key: Ключ
+
+        Returns:
+            int: Номер сегмента
+        """
+        return hash(key) % self.shards
+
+    def get(self, key):
+        """Получает значение по ключу из соответствующего сегмента.
+
+        Args:
+            key: Ключ для поиска
+
+        Returns:
+            Значение, связанное с ключом, или None если ключ не найден
+        """
+        idx = self._index(key)
+        with self._locks[idx]:
+            return self._segments[idx].get(key)
+
+    def set(self, key, value, ttl=None):
+        """Устанавливает значение по ключу в соответствующем сегменте.
+
+        Args:
+            key: Ключ для установки
+            value: Значение для установки
+            ttl (float): Срок жизни записи в секундах
+        """
+        idx = self._index(key)
+        with self._locks[idx]:
+            self._segments[idx].set(key, value, ttl)
+
+    def _group(self, keys):
+        """Раскладывает ключи по сегментам.
+
+        Args:
+            keys: Итерируемый набор ключей
+
+        Returns:
+            dict: Номер сегмента -> список ключей в исходном порядке
+        """
+        shards = self.shards
+        groups = {}
+        for key in keys:
+            idx = hash(key) % shards
+            group = groups.get(idx)
+            if group is None:
+                group = groups[idx] = []
+            group.append(key)
+        return groups
+
+    def get_many(self, keys):
+        """Получает значения для нескольких ключей.
+
+        Блокировка каждого затронутого сегмента берется один раз.
+
+        Args:
+            keys: Итерируемый набор ключей
+
+        Returns:
+            dict: Найденные ключи и их значения
+        """
+        result = {}
+        for idx, group in self._group(keys).items():
+            with self._locks[idx]:
+                result.update(self._segments[idx].get_many(group))
+        return result
+
+    def set_many(self, mapping, ttl=None):
+        """Устанавливает значения для нескольких ключей.
+
+        Блокировка каждого затронутого сегмента берется один раз.
+
+        Args:
+            mapping: Словарь или итерируемый набор пар (ключ, значение)
+            ttl (float): Срок жизни записей в секундах
+        """
+        items = mapping.items() if hasattr(mapping, "items") else mapping
+        shards = self.shards
+        groups = {}
+        for item in items:
+            idx = hash(item[0]) % shards
+            group = groups.get(idx)
+            if group is None:
+                group = groups[idx] = []
+            group.append(item)
+        for idx, group in groups.items():
+            with self._locks[idx]:
+                self._segments[idx].set_many(group, ttl)
+
+    def pop(self, key, default=None):
+        """Удаляет ключ из кэша и возвращает его значение.
+
+        Args:
+            key: Ключ для удаления
+            default: Значение, возвращаемое при отсутствии ключа
+
+        Returns:
+            Значение, связанное с ключом, или default
+        """
+        idx = self._index(key)
+        with self._locks[idx]:
+            return self._segments[idx].pop(key, default)
+
+    def __contains__(self, key):
+        """Проверяет наличие непросроченного ключа.
+
+        Args:
+            key: Ключ для проверки
+
+        Returns:
+            bool: True, если ключ есть в кэше
+        """
+        idx = self._index(key)
+        with self._locks[idx]:
+            return key in self._segments[idx]
+
+    def __len__(self):
+        """Возвращает суммарное количество записей во всех сегментах.
+
+        Returns:
+            int: Количество записей
+        """
+        total = 0
+        for lock, segment in zip(self._locks, self._segments):
+            with lock:
+                total += len(segment)
+        return total
+
+    def __delitem__(self, key):
+        """Удаление ключа через синтаксис словаря.
+
+        Args:
+            key: Ключ для удаления
+
+        Raises:
+            KeyError: Если ключа нет в кэше
+        """
+        idx = self._index(key)
+        with self._locks[idx]:
+            del self._segments[idx][key]
+
+    def stats(self):
+        """Возвращает суммарную статистику всех сегментов.
+
+        Returns:
+            CacheStats: Сумма счетчиков сегментов
+        """
+        snapshots = []
+        for lock, segment in zip(self._locks, self._segments):
+            with lock:
+                snapshots.append(segment.stats())
+        return CacheStats(*map(sum, zip(*snapshots)))
+
+    def expire(self):
+        """Удаляет просроченные записи во всех сегментах.
+
+        Сегменты блокируются по очереди, поэтому метод удобно
+        вызывать из фонового потока.
+
+        Returns:
+            int: Количество удаленных записей
+        """
+        removed = 0
+        for lock, segment in zip(self._locks, self._segments):
+            with lock:
+                removed += segment.expire()
+        return removed
+
+    def start_sweeper(self, interval):
+        """Запускает фоновый поток, периодически вызывающий expire.
+
+        Args:
+            interval (float): Период очистки в секундах
+
+        Returns:
+            threading.Event: Событие, установка которого
+                останавливает поток
+        """
+        stop = threading.Event()
+
+        def sweep():
+            while not stop.wait(interval):
+                self.expire()
+
+        threading.Thread(target=sweep, daemon=True).start()
+        return stop
+
+    def __getitem__(self, key):
+        """Получение значения через синтаксис словаря.
+
+        Args:
+            key: Ключ для поиска
+
+        Returns:
+            Значение, связанное с ключом, или None если ключ не найден
+        """
+        return self.get(key)
+
+    def __setitem__(self, key, value):
+        """Установка значения через синтаксис словаря.
+
+        Args:
+            key: Ключ для установки
+            value: Значение для установки
+        """
+        self.set(key, value)
@@ -0,0 +1,232 @@
+"""Мемоизирующий декоратор на основе LRU-кэша."""
+
+import asyncio
+import functools
+import threading
+from collections import namedtuple
+
+from lru_cache import LRUCache
+
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+# Разделитель позиционных и именованных аргументов в ключе
+_KWD_MARK = object()
+
+
+def make_key(args, kwargs, typed=False):
+    """Строит ключ кэша из аргументов вызова.
+
+    Args:
+        args (tuple): Позиционные аргументы
+        kwargs (dict): Именованные аргументы
+        typed (bool): Различать ли аргументы разных типов (1 и 1.0)
+
+    Returns:
+        tuple: Хешируемый ключ
+    """
+    key = args
+    if kwargs:
+        key += (_KWD_MARK,) + tuple(kwargs.items())
+    if typed:
+        key += tuple(type(arg) for arg in args)
+        if kwargs:
+            key += tuple(type(value) for value in kwargs.values())
+    return key
+
+
+class _Call:
+    """Вычисление, выполняющееся в данный момент в синхронном режиме."""
+
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class _MemoState:
+    """Общее состояние мемоизированной функции.
+
+    Attributes:
+        maxsize (int): Емкость кэша
+        ttl (float): Срок жизни результатов или None
+        cache (LRUCache): Кэш результатов
+        lock (threading.Lock): Блокировка кэша и таблицы вычислений
+        in_flight (dict): Ключ -> выполняющееся вычисление
+        hits (int): Количество вызовов без вычисления функции
+        misses (int): Количество вычислений функции
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.cache = LRUCache(maxsize, ttl=ttl)
+        self.lock = threading.Lock()
+        self.in_flight = {}
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, key):
+        """Ищет готовый результат или выполняющееся вычисление.
+
+        Должен вызываться под self.lock.
+
+        Args:
+            key: Ключ кэша
+
+        Returns:
+            tuple: (найден ли результат, результат, вычисление или None)
+        """
+        found = self.cache.get_many((key,))
+        if found:
+            self.hits += 1
+            return True, found[key], None
+        call = self.in_flight.get(key)
+        if call is not None:
+            # Результат будет получен из чужого вычисления
+            self.hits += 1
+        return False, None, call
+
+    def info(self):
+        """Возвращает статистику кэша.
+
+        Returns:
+            CacheInfo: Снимок счетчиков
+        """
+        with self.lock:
+            return CacheInfo(self.hits, self.misses, self.maxsize,
+                             len(self.cache))
+
+    def clear(self):
+        """Очищает кэш и сбрасывает статистику."""
+        with self.lock:
+            self.cache = LRUCache(self.maxsize, ttl=self.ttl)
+            self.hits = 0
+            self.misses = 0
+
+
+def lru_memoize(maxsize=128, typed=False, key=None, ttl=None):
+    """Декоратор, кэширующий результаты функции в LRUCache.
+
+    Поддерживает обычные функции и корутины (async def). Одновременные
+    вызовы с одинаковым ключом разделяют одно вычисление: первый вызов
+    выполняет функцию, остальные ждут его результата или исключения.
+    Исключения не кэшируются.
+
+    Args:
+        maxsize (int): Емкость кэша
+        typed (bool): Различать ли аргументы разных типов
+        key: Функция, строящая ключ из аргументов вызова. По умолчанию
+            ключ строится из всех аргументов.
+        ttl (float): Срок жизни результатов в секундах
+
+    Returns:
+        Декоратор. У обернутой функции есть методы cache_info()
+        и cache_clear(), как у functools.lru_cache.
+    """
+    def decorator(func):
+        state = _MemoState(maxsize, ttl)
+
+        def build_key(args, kwargs):
+            if key is not None:
+                return key(*args, **kwargs)
+            return make_key(args, kwargs, typed)
+
+        if asyncio.iscoroutinefunction(func):
+            wrapper = _async_wrapper(func, state, build_key)
+        else:
+            wrapper = _sync_wrapper(func, state, build_key)
+        wrapper.cache_info = state.info
+        wrapper.cache_clear = state.clear
+        return wrapper
+
+    return decorator
+
+
+def _sync_wrapper(func, state, build_key):
+    """Создает обертку для обычной функции.
+
+    Args:
+        func: Исходная функция
+        state (_MemoState): Состояние кэша
+        build_key: Функция построения ключа
+
+    Returns:
+        Обернутая функция
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        cache_key = build_key(args, kwargs)
+        with state.lock:
+            found, result, call = state.lookup(cache_key)
+            if found:
+                return result
+            if call is None:
+                call = _Call()
+                state.in_flight[cache_key] = call
+                state.misses += 1
+                leader = True
+            else:
+                leader = False
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with state.lock:
+                if call.error is None:
+                    state.cache.set(cache_key, call.result)
+                del state.in_flight[cache_key]
+            call.event.set()
+        return call.result
+
+    return wrapper
+
+
+def _async_wrapper(func, state, build_key):
+    """Создает обертку для корутины.
+
+    Args:
+        func: Исходная корутинная функция
+        state (_MemoState): Состояние кэша
+        build_key: Функция построения ключа
+
+    Returns:
+        Обернутая корутинная функция
+    """
+    def finish(cache_key, task):
+        with state.lock:
+            if not task.cancelled() and task.exception() is None:
+                state.cache.set(cache_key, task.result())
+            del state.in_flight[cache_key]
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        cache_key = build_key(args, kwargs)
+        with state.lock:
+            found, result, task = state.lookup(cache_key)
+            if found:
+                return result
+            if task is None:
+                # Вычисление идет в отдельной задаче, которой не владеет
+                # ни один из вызывающих: отмена любого из них не
+                # прерывает результат для остальных
+                task = asyncio.ensure_future(func(*args, **kwargs))
+                task.add_done_callback(
+                    functools.partial(finish, cache_key))
+                state.in_flight[cache_key] = task
+                state.misses += 1
+
+        return await asyncio.shield(task)
+
+    return wrapper
@@ -0,0 +1,551 @@
+"""Подключаемые политики вытеснения для кэша.
+
+Политика отвечает только за выбор вытесняемых ключей, значения хранит
+PolicyCache. Интерфейс политики:
+    access(key) - обращение к ключу, который есть в кэше;
+    insert(key) - вставка нового ключа, возвращает список вытесненных
+        ключей (в нем может оказаться и сам key, если политика его
+        не приняла);
+    remove(key) - явное удаление ключа из кэша.
+"""
+
+from collections import OrderedDict
+
+
+class LRUPolicy:
+    """Вытеснение давно не использовавшихся ключей (Least Recently Used).
+
+    Attributes:
+        capacity (int): Емкость кэша
+    """
+
+    def __init__(self, capacity):
+        """Инициализация политики.
+
+        Args:
+            capacity (int): Емкость кэша
+        """
+        self.capacity = capacity
+        self._order = OrderedDict()
+
+    def access(self, key):
+        """Отмечает обращение к ключу.
+
+        Args:
+            key: Ключ
+        """
+        self._order.move_to_end(key)
+
+    def insert(self, key):
+        """Добавляет ключ, вытесняя самый старый при переполнении.
+
+        Args:
+            key: Ключ
+
+        Returns:
+            list: Вытесненные ключи
+        """
+        evicted = []
+        if len(self._order) >= self.capacity:
+            evicted.append(self._order.popitem(last=False)[0])
+        self._order[key] = None
+        return evicted
+
+    def remove(self, key):
+        """Удаляет ключ.
+
+        Args:
+            key: Ключ
+        """
+        del self._order[key]
+
+
+class LFUPolicy:
+    """Вытеснение редко используемых ключей (Least Frequently Used).
+
+    Все операции выполняются за O(1): ключи сгруппированы по частоте,
+    внутри группы при равной частоте вытесняется самый старый ключ.
+
+    Attributes:
+        capacity (int): Емкость кэша
+    """
+
+    def __init__(self, capacity):
+        """Инициализация политики.
+
+        Args:
+            capacity (int): Емкость кэша
+        """
+        self.capacity = capacity
+        self._freq = {}
+        # Частота -> ключи с этой частотой в порядке обращения
+        self._buckets = {}
+        self._min_freq = 0
+
+    def _bump(self, key):
+        """Увеличивает частоту ключа на единицу.
+
+        Args:
+            key: Ключ
+        """
+        freq = self._freq[key]
+        bucket = self._buckets[freq]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[freq]
+            if self._min_freq == freq:
+                self._min_freq = freq + 1
+        self._freq[key] = freq + 1
+        self._buckets.setdefault(freq + 1, OrderedDict())[key] = None
+
+    def access(self, key):
+        """Отмечает обращение к ключу.
+
+        Args:
+            key: Ключ
+        """
+        self._bump(key)
+
+    def insert(self, key):
+        """Добавляет ключ, вытесняя наименее частый при переполнении.
+
+        Args:
+            key: Ключ
+
+        Returns:
+            list: Вытесненные ключи
+        """
+        evicted = []
+        if len(self._freq) >= self.capacity:
+            bucket = self._buckets[self._min_freq]
+            victim, _ = bucket.popitem(last=False)
+            if not bucket:
+                del self._buckets[self._min_freq]
+            del self._freq[victim]
+            evicted.append(victim)
+        self._freq[key] = 1
+        self._buckets.setdefault(1, OrderedDict())[key] = None
+        self._min_freq = 1
+        return evicted
+
+    def remove(self, key):
+        """Удаляет ключ.
+
+        Args:
+            key: Ключ
+        """
+        freq = self._freq.pop(key)
+        bucket = self._buckets[freq]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[freq]
+            if self._min_freq == freq and self._buckets:
+                self._min_freq = min(self._buckets)
+
+
+class ARCPolicy:
+    """Адаптивная политика ARC (Adaptive Replacement Cache).
+
+    Кэш делится на список T1 (ключи, встреченные один раз) и T2
+    (встреченные повторно). Списки-призраки B1 и B2 хранят только ключи
+    недавно вытесненных записей и подстраивают целевой размер T1, что
+    делает политику устойчивой к однократным сканированиям.
+
+    Attributes:
+        capacity (int): Емкость кэша
+        target (float): Целевой размер списка T1
+    """
+
+    def __init__(self, capacity):
+        """Инициализация политики.
+
+        Args:
+            capacity (int): Емкость кэша
+        """
+        self.capacity = capacity
+        self.target = 0.0
+        self._t1 = OrderedDict()
+        self._t2 = OrderedDict()
+        self._b1 = OrderedDict()
+        self._b2 = OrderedDict()
+
+    def access(self, key):
+        """Переносит ключ в начало списка T2.
+
+        Args:
+            key: Ключ
+        """
+        if key in self._t1:
+            del self._t1[key]
+            self._t2[key] = None
+        else:
+            self._t2.move_to_end(key)
+
+    def _replace(self, key, evicted):
+        """Вытесняет запись из T1 или T2 в соответствующий список-призрак.
+
+        Args:
+            key: Вставляемый ключ
+            evicted (list): Список, в который добавляется вытесненный ключ
+        """
+        if len(self._t1) + len(self._t2) < self.capacity:
+            return
+        t1_len = len(self._t1)
+        if self._t1 and (not self._t2 or t1_len > self.target
+                         or (key in self._b2 and t1_len == self.target)):
+            victim, _ = self._t1.popitem(last=False)
+            self._b1[victim] = None
+        else:
+            victim, _ = self._t2.popitem(last=False)
+            self._b2[victim] = None
+        evicted.append(victim)
+
+    def insert(self, key):
+        """Добавляет ключ после промаха.
+
+        Args:
+            key: Ключ
+
+        Returns:
+            list: Вытесненные ключи
+        """
+        evicted = []
+        capacity = self.capacity
+        if key in self._b1:
+            delta = max(len(self._b2) / len(self._b1), 1)
+            self.target = min(capacity, self.target + delta)
+            self._replace(key, evicted)
+            del self._b1[key]
+            self._t2[key] = None
+            return evicted
+        if key in self._b2:
+            delta = max(len(self._b1) / len(self._b2), 1)
+            self.target = max(0.0, self.target - delta)
+            self._replace(key, evicted)
+            del self._b2[key]
+            self._t2[key] = None
+            return evicted
+
+        l1_len = len(self._t1) + len(self._b1)
+        total = l1_len + len(self._t2) + len(self._b2)
+        if l1_len >= capacity:
+            if len(self._t1) < capacity:
+                self._b1.popitem(last=False)
+                self._replace(key, evicted)
+            else:
+                victim, _ = self._t1.popitem(last=False)
+                evicted.append(victim)
+        elif total >= capacity:
+            if total >= 2 * capacity:
+                self._b2.popitem(last=False)
+            self._replace(key, evicted)
+        self._t1[key] = None
+        return evicted
+
+    def remove(self, key):
+        """Удаляет ключ.
+
+        Args:
+            key: Ключ
+        """
+        if key in self._t1:
+            del self._t1[key]
+        else:
+            del self._t2[key]
+
+
+class CountMinSketch:
+    """Приближенный счетчик частот с периодическим старением.
+
+    Счетчики ограничены значением 15. После sample_size увеличений все
+    счетчики делятся пополам, чтобы частоты отражали недавнюю историю.
+
+    Attributes:
+        width (int): Количество счетчиков в строке (степень двойки)
+        depth (int): Количество строк
+        sample_size (int): Период старения
+    """
+
+    _MULTIPLIERS = (
+        0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F,
+        0x165667B19E3779F9, 0xD6E8FEB86659FD93,
+    )
+    _MASK64 = (1 << 64) - 1
+
+    def __init__(self, capacity, depth=4):
+        """Инициализация счетчика.
+
+        Args:
+            capacity (int): Емкость кэша, под которую подбирается размер
+            depth (int): Количество строк (не больше 4)
+        """
+        self.width = 1 << max(4, (4 * capacity - 1).bit_length())
+        self.depth = depth
+        self.sample_size = 10 * capacity
+        self._table = bytearray(self.width * depth)
+        self._additions = 0
+        # Смещение строки в таблице и множитель хеша для каждой строки
+        self._rows = [
+            (row * self.width, mult)
+            for row, mult in enumerate(self._MULTIPLIERS[:depth])
+        ]
+
+    def _indexes(self, key):
+        """Возвращает индексы счетчиков ключа во всех строках.
+
+        Args:
+            key: Ключ
+
+        Returns:
+            list: Индексы в общей таблице
+        """
+        h = hash(key) & self._MASK64
+        mask = self.width - 1
+        # Биты произведения выше 64-го на результат не влияют
+        return [offset + (h * mult >> 32 & mask)
+                for offset, mult in self._rows]
+
+    def increment(self, key):
+        """Увеличивает оценку частоты ключа.
+
+        Args:
+            key: Ключ
+        """
+        table = self._table
+        for idx in self._indexes(key):
+            if table[idx] < 15:
+                table[idx] += 1
+        self._additions += 1
+        if self._additions >= self.sample_size:
+            self._table = bytearray(count >> 1 for count in table)
+            self._additions //= 2
+
+    def estimate(self, key):
+        """Возвращает оценку частоты ключа.
+
+        Args:
+            key: Ключ
+
+        Returns:
+            int: Оценка частоты
+        """
+        table = self._table
+        return min(table[idx] for idx in self._indexes(key))
+
+
+class WTinyLFUPolicy:
+    """Политика W-TinyLFU.
+
+    Новые ключи попадают в небольшое LRU-окно. Ключ, покидающий окно,
+    допускается в основной сегментированный LRU (probation и protected)
+    только если по оценке частотного скетча он встречается чаще, чем
+    кандидат на вытеснение из основной области.
+
+    Attributes:
+        capacity (int): Емкость кэша
+        sketch (CountMinSketch): Счетчик частот
+    """
+
+    def __init__(self, capacity, window_ratio=0.01, protected_ratio=0.8):
+        """Инициализация политики.
+
+        Args:
+            capacity (int): Емкость кэша
+            window_ratio (float): Доля емкости под окно
+            protected_ratio (float): Доля основной области
+                под защищенный сегмент
+        """
+        self.capacity = capacity
+        self._window_cap = max(1, int(capacity * window_ratio))
+        self._main_cap = capacity - self._window_cap
+        self._protected_cap = int(self._main_cap * protected_ratio)
+        self._window = OrderedDict()
+        self._probation = OrderedDict()
+        self._protected = OrderedDict()
+        self.sketch = CountMinSketch(capacity)
+
+    def access(self, key):
+        """Отмечает обращение к ключу.
+
+        Args:
+            key: Ключ
+        """
+        self.sketch.increment(key)
+        if key in self._window:
+            self._window.move_to_end(key)
+        elif key in self._probation:
+            del self._probation[key]
+            self._protected[key] = None
+            if len(self._protected) > self._protected_cap:
+                demoted, _ = self._protected.popitem(last=False)
+                self._probation[demoted] = None
+        else:
+            self._protected.move_to_end(key)
+
+    def insert(self, key):
+        """Добавляет ключ в окно и проводит отбор вышедшего из окна.
+
+        Args:
+            key: Ключ
+
+        Returns:
+            list: Вытесненные ключи
+        """
+        self.sketch.increment(key)
+        self._window[key] = None
+        if len(self._window) <= self._window_cap:
+            return []
+        candidate, _ = self._window.popitem(last=False)
+        if len(self._probation) + len(self._protected) < self._main_cap:
+            self._probation[candidate] = None
+            return []
+        victims = self._probation if self._probation else self._protected
+        if not victims:
+            return [candidate]
+        victim = next(iter(victims))
+        if self.sketch.estimate(candidate) > self.sketch.estimate(victim):
+            del victims[victim]
+            self._probation[candidate] = None
+            return [victim]
+        return [candidate]
+
+    def remove(self, key):
+        """Удаляет ключ.
+
+        Args:
+            key: Ключ
+        """
+        for segment in (self._window, self._probation, self._protected):
+            if key in segment:
+                del segment[key]
+                return
+
+
+POLICIES = {
+    "lru": LRUPolicy,
+    "lfu": LFUPolicy,
+    "arc": ARCPolicy,
+    "tinylfu": WTinyLFUPolicy,
+}
+
+
+class PolicyCache:
+    """Кэш фиксированной емкости с подключаемой политикой вытеснения.
+
+    Интерфейс совпадает с LRUCache: get возвращает None для
+    отсутствующих ключей, поддерживается синтаксис словаря.
+
+    Attributes:
+        limit (int): Максимальное количество элементов в кэше
+        policy: Объект политики вытеснения
+        data (dict): Хранимые значения
+    """
+
+    def __init__(self, limit=42, policy="lru"):
+        """Инициализация кэша.
+
+        Args:
+            limit (int): Максимальный размер кэша. По умолчанию 42.
+            policy: Имя политики из POLICIES или готовый объект политики
+
+        Raises:
+            ValueError: Если имя политики неизвестно
+        """
+        if isinstance(policy, str):
+            if policy not in POLICIES:
+                raise ValueError(f"Unknown eviction policy: {policy!r}")
+            policy = POLICIES[policy](limit)
+        self.limit = limit
+        self.policy = policy
+        self.data = {}
+
+    def get(self, key):
+        """Получает значение по ключу из кэша.
+
+        Args:
+            key: Ключ для поиска
+
+        Returns:
+            Значение, связанное с ключом, или None если ключ не найден
+        """
+        if key in self.data:
+            self.policy.access(key)
+            return self.data[key]
+        return None
+
+    def set(self, key, value):
+        """Устанавливает значение по ключу в кэше.
+
+        Политика может не принять новый ключ (W-TinyLFU), тогда
+        значение не сохраняется.
+
+        Args:
+            key: Ключ для установки
+            value: Значение для установки
+        """
+        if key in self.data:
+            self.data[key] = value
+            self.policy.access(key)
+            return
+        admitted = True
+        for victim in self.policy.insert(key):
+            if victim == key:
+                admitted = False
+            else:
+                del self.data[victim]
+        if admitted:
+            self.data[key] = value
+
+    def pop(self, key, default=None):
+        """Удаляет ключ из кэша и возвращает его значение.
+
+        Args:
+            key: Ключ для удаления
+            default: Значение, возвращаемое при отсутствии ключа
+
+        Returns:
+            Значение, связанное с ключом, или default
+        """
+        if key not in self.data:
+            return default
+        self.policy.remove(key)
+        return self.data.pop(key)
+
+    def __contains__(self, key):
+        """Проверяет наличие ключа без учета обращения.
+
+        Args:
+            key: Ключ для проверки
+
+        Returns:
+            bool: True, если ключ есть в кэше
+        """
+        return key in self.data
+
+    def __len__(self):
+        """Возвращает количество записей в кэше.
+
+        Returns:
+            int: Количество записей
+        """
+        return len(self.data)
+
+    def __getitem__(self, key):
+        """Получение значения через синтаксис словаря.
+
+        Args:
+            key: Ключ для поиска
+
+        Returns:
+            Значение, связанное с ключом, или None если ключ не найден
+        """
+        return self.get(key)
+
+    def __setitem__(self, key, value):
+        """Установка значения через синтаксис словаря.
+
+        Args:
+            key: Ключ для установки
+            value: Значение для установки
+        """
+        self.set(key, value)
@@ -0,0 +1,522 @@
+"""LRU-кэш в разделяемой памяти для нескольких процессов."""
+
+import multiprocessing
+import zlib
+from multiprocessing import resource_tracker, shared_memory
+
+
+# Поля заголовка (индексы в массиве int64)
+_MAGIC = 0
+_LIMIT = 1
+_BUCKETS = 2
+_KEY_SIZE = 3
+_VALUE_SIZE = 4
+_COUNT = 5
+_HEAD = 6  # самый новый слот
+_TAIL = 7  # самый старый слот
+_FREE = 8  # голова списка свободных слотов
+_UNUSED = 9  # следующий ни разу не использованный слот
+_HEADER_LEN = 16
+
+# Поля метаданных слота
+_HASH = 0
+_CHAIN = 1  # следующий слот в цепочке корзины
+_PREV = 2
+_NEXT = 3
+_KEY_LEN = 4
+_VALUE_LEN = 5
+_SLOT_LEN = 6
+
+_MAGIC_VALUE = 0x4C5255534843  # "LRUSHC"
+_NIL = -1
+
+
+def _encode(item):
+    """Кодирует ключ или значение в байты.
+
+    Args:
+        item (bytes | str): Ключ или значение
+
+    Returns:
+        tuple: (байты, признак строки)
+
+    Raises:
+        TypeError: Если тип не bytes и не str
+    """
+    if isinstance(item, str):
+        return item.encode("utf-8"), 1
+    if isinstance(item, (bytes, bytearray, memoryview)):
+        return bytes(item), 0
+    raise TypeError(
+        f"SharedLRUCache supports only bytes and str, got {type(item)!r}")
+
+
+def _attach_memory(name):
+    """Подключается к существующему блоку разделяемой памяти.
+
+    Подключившийся процесс не должен удалять блок при завершении,
+    поэтому блок снимается с учета resource_tracker.
+
+    Args:
+        name (str): Имя блока
+
+    Returns:
+        SharedMemory: Подключенный блок
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # До Python 3.13 параметра track нет
+        shm = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+class SharedLRUCache:
+    """LRU-кэш в разделяемой памяти с интерфейсом LRUCache.
+
+    Данные хранятся в одном блоке multiprocessing.shared_memory:
+    заголовок, таблица корзин хеш-таблицы с цепочками, метаданные
+    слотов (хеш, ссылки цепочки и списка давности, длины) и область
+    данных фиксированного размера на каждый слот. Ключи и значения -
+    bytes или str ограниченной длины. Все операции выполняются под
+    межпроцессной блокировкой.
+
+    Объект можно передать дочернему процессу аргументом
+    multiprocessing.Process: в нем он подключится к тому же блоку.
+
+    Attributes:
+        name (str): Имя блока разделяемой памяти
+        limit (int): Максимальное количество элементов
+        key_size (int): Максимальная длина ключа в байтах
+        value_size (int): Максимальная длина значения в байтах
+    """
+
+    def __init__(self, limit=1024, key_size=64, value_size=256,
+                 name=None, lock=None, _attach=False):
+        """Создает кэш в новом блоке разделяемой памяти.
+
+        Args:
+            limit (int): Максимальное количество элементов
+            key_size (int): Максимальная длина ключа в байтах
+            value_size (int): Максимальная длина значения в байтах
+            name (str): Имя блока. None - сгенерировать.
+            lock: Межпроцессная блокировка. None - создать новую.
+
+        Raises:
+            ValueError: Если размеры не положительны
+        """
+        self._lock = lock if lock is not None else multiprocessing.Lock()
+        if _attach:
+            self._shm = _attach_memory(name)
+            self._owner = False
+            self._map_layout()
+            return
+        if limit < 1 or key_size < 1 or value_size < 1:
+            raise ValueError("limit, key_size and value_size must be positive")
+        buckets = 2 * limit
+        int_count = _HEADER_LEN + buckets + _SLOT_LEN * limit
+        size = 8 * int_count + (key_size + value_size) * limit
+        self._shm = shared_memory.SharedMemory(name=name, create=True,
+                                               size=size)
+        self._owner = True
+        ints = self._shm.buf[:8 * _HEADER_LEN].cast("q")
+        ints[_MAGIC] = _MAGIC_VALUE
+        ints[_LIMIT] = limit
+        ints[_BUCKETS] = buckets
+        ints[_KEY_SIZE] = key_size
+        ints[_VALUE_SIZE] = value_size
+        ints[_COUNT] = 0
+        ints[_HEAD] = _NIL
+        ints[_TAIL] = _NIL
+        ints[_FREE] = _NIL
+        ints[_UNUSED] = 0
+        ints.release()
+        self._map_layout()
+        for bucket in range(buckets):
+            self._ints[self._bucket_base + bucket] = _NIL
+
+    @classmethod
+    def attach(cls, name, lock):
+        """Подключается к кэшу, созданному в другом процессе.
+
+        Args:
+            name (str): Имя блока разделяемой памяти
+            lock: Та же блокировка, что использует создатель кэша
+
+        Returns:
+            SharedLRUCache: Кэш, работающий с общим блоком
+        """
+        return cls(name=name, lock=lock, _attach=True)
+
+    def __reduce__(self):
+        """Передает в другой процесс имя блока и блокировку."""
+        return (self.attach, (self.name, self._lock))
+
+    def _map_layout(self):
+        """Вычисляет смещения областей блока по заголовку.
+
+        Raises:
+            ValueError: Если блок не содержит кэша
+        """
+        buf = self._shm.buf
+        header = buf[:8 * _HEADER_LEN].cast("q")
+        try:
+            if header[_MAGIC] != _MAGIC_VALUE:
+                raise ValueError(f"{self._shm.name} is not a SharedLRUCache")
+            self.limit = header[_LIMIT]
+            self._buckets = header[_BUCKETS]
+            self.key_size = header[_KEY_SIZE]
+            self.value_size = header[_VALUE_SIZE]
+        finally:
+            header.release()
+        self._bucket_base = _HEADER_LEN
+        self._slot_base = _HEADER_LEN + self._buckets
+        int_count = self._slot_base + _SLOT_LEN * self.limit
+        self._ints = buf[:8 * int_count].cast("q")
+        self._data = buf[8 * int_count:]
+        self._record_size = self.key_size + self.value_size
+
+    @property
+    def name(self):
+        """Имя блока разделяемой памяти."""
+        return self._shm.name
+
+    def _meta(self, slot):
+        """Возвращает индекс метаданных слота в массиве int64.
+
+        Args:
+            slot (int): Номер слота
+
+        Returns:
+            int: Индекс первого поля метаданных
+        """
+        return self._slot_base + slot * _SLOT_LEN
+
+    def _find(self, key_bytes, packed, key_hash):
+        """Ищет слот ключа в цепочке корзины.
+
+        Args:
+            key_bytes (bytes): Закодированный ключ
+            packed (int): Длина ключа и признак строки
+            key_hash (int): Хеш ключа
+
+        Returns:
+            tuple: (слот или _NIL, предыдущий слот в цепочке или _NIL)
+        """
+        ints = self._ints
+        data = self._data
+        prev = _NIL
+        slot = ints[self._bucket_base + key_hash % self._buckets]
+        key_len = len(key_bytes)
+        while slot != _NIL:
+            meta = self._meta(slot)
+            # str и bytes с одинаковыми байтами - разные ключи
+            if (ints[meta + _HASH] == key_hash
+                    and ints[meta + _KEY_LEN] == packed):
+                offset = slot * self._record_size
+                if data[offset:offset + key_len] == key_bytes:
+                    return slot, prev
+            prev = slot
+            slot = ints[meta + _CHAIN]
+        return _NIL, prev
+
+    def _unlink(self, slot):
+        """Исключает слот из списка давности.
+
+        Args:
+            slot (int): Номер слота
+        """
+        ints = self._ints
+        meta = self._meta(slot)
+        prev_slot = ints[meta + _PREV]
+        next_slot = ints[meta + _NEXT]
+        if prev_slot == _NIL:
+            ints[_HEAD] = next_slot
+        else:
+            ints[self._meta(prev_slot) + _NEXT] = next_slot
+        if next_slot == _NIL:
+            ints[_TAIL] = prev_slot
+        else:
+            ints[self._meta(next_slot) + _PREV] = prev_slot
+
+    def _link_to_head(self, slot):
+        """Вставляет слот в начало списка давности.
+
+        Args:
+            slot (int): Номер слота
+        """
+        ints = self._ints
+        meta = self._meta(slot)
+        first = ints[_HEAD]
+        ints[meta + _PREV] = _NIL
+        ints[meta + _NEXT] = first
+        if first == _NIL:
+            ints[_TAIL] = slot
+        else:
+            ints[self._meta(first) + _PREV] = slot
+        ints[_HEAD] = slot
+
+    def _drop(self, slot, chain_prev):
+        """Удаляет слот из цепочки корзины и списка давности.
+
+        Освобожденный слот помещается в список свободных.
+
+        Args:
+            slot (int): Номер слота
+            chain_prev (int): Предыдущий слот в цепочке или _NIL
+        """
+        ints = self._ints
+        meta = self._meta(slot)
+        chain_next = ints[meta + _CHAIN]
+        if chain_prev == _NIL:
+            bucket = ints[meta + _HASH] % self._buckets
+            ints[self._bucket_base + bucket] = chain_next
+        else:
+            ints[self._meta(chain_prev) + _CHAIN] = chain_next
+        self._unlink(slot)
+        ints[meta + _CHAIN] = ints[_FREE]
+        ints[_FREE] = slot
+        ints[_COUNT] -= 1
+
+    def _evict_tail(self):
+        """Вытесняет самый старый элемент."""
+        slot = self._ints[_TAIL]
+        meta = self._meta(slot)
+        packed = self._ints[meta + _KEY_LEN]
+        offset = slot * self._record_size
+        key_bytes = bytes(self._data[offset:offset + (packed >> 1)])
+        _, chain_prev = self._find(
+            key_bytes, packed, self._ints[meta + _HASH])
+        self._drop(slot, chain_prev)
+
+    def _allocate(self):
+        """Выделяет свободный слот.
+
+        Returns:
+            int: Номер слота
+        """
+        ints = self._ints
+        if ints[_FREE] != _NIL:
+            slot = ints[_FREE]
+            ints[_FREE] = ints[self._meta(slot) + _CHAIN]
+            return slot
+        slot = ints[_UNUSED]
+        ints[_UNUSED] = slot + 1
+        return slot
+
+    def _write_value(self, slot, value_bytes, is_str):
+        """Записывает значение в область данных слота.
+
+        Args:
+            slot (int): Номер слота
+            value_bytes (bytes): Закодированное значение
+            is_str (int): Признак строки
+        """
+        offset = slot * self._record_size + self.key_size
+        self._data[offset:offset + len(value_bytes)] = value_bytes
+        self._ints[self._meta(slot) + _VALUE_LEN] = (
+            len(value_bytes) << 1 | is_str)
+
+    def _read_value(self, slot):
+        """Читает значение слота.
+
+        Args:
+            slot (int): Номер слота
+
+        Returns:
+            bytes | str: Значение исходного типа
+        """
+        packed = self._ints[self._meta(slot) + _VALUE_LEN]
+        offset = slot * self._record_size + self.key_size
+        value = bytes(self._data[offset:offset + (packed >> 1)])
+        return value.decode("utf-8") if packed & 1 else value
+
+    def _key(self, key):
+        """Кодирует ключ и вычисляет его хеш.
+
+        Хеш не зависит от PYTHONHASHSEED, поэтому совпадает во всех
+        процессах.
+
+        Args:
+            key (bytes | str): Ключ
+
+        Returns:
+            tuple: (байты ключа, длина ключа с признаком строки, хеш)
+
+        Raises:
+            ValueError: Если ключ длиннее key_size
+        """
+        key_bytes, is_str = _encode(key)
+        if len(key_bytes) > self.key_size:
+            raise ValueError(
+                f"Key of {len(key_bytes)} bytes exceeds key_size "
+                f"{self.key_size}")
+        return key_bytes, len(key_bytes) << 1 | is_str, zlib.crc32(key_bytes)
+
+    def get(self, key):
+        """Получает значение по ключу из кэша.
+
+        Args:
+            key (bytes | str): Ключ для поиска
+
+        Returns:
+            Значение, связанное с ключом, или None если ключ не найден
+        """
+        key_bytes, packed, key_hash = self._key(key)
+        with self._lock:
+            slot, _ = self._find(key_bytes, packed, key_hash)
+            if slot == _NIL:
+                return None
+            self._unlink(slot)
+            self._link_to_head(slot)
+            return self._read_value(slot)
+
+    def set(self, key, value):
+        """Устанавливает значение по ключу в кэше.
+
+        Args:
+            key (bytes | str): Ключ для установки
+            value (bytes | str): Значение для установки
+
+        Raises:
+            ValueError: Если ключ или значение длиннее допустимого
+            TypeError: Если ключ или значение не bytes и не str
+        """
+        key_bytes, packed, key_hash = self._key(key)
+        value_bytes, value_is_str = _encode(value)
+        if len(value_bytes) > self.value_size:
+            raise ValueError(
+                f"Value of {len(value_bytes)} bytes exceeds value_size "
+                f"{self.value_size}")
+        with self._lock:
+            ints = self._ints
+            slot, _ = self._find(key_bytes, packed, key_hash)
+            if slot != _NIL:
+                self._unlink(slot)
+            else:
+                if ints[_COUNT] >= self.limit:
+                    self._evict_tail()
+                slot = self._allocate()
+                meta = self._meta(slot)
+                bucket = self._bucket_base + key_hash % self._buckets
+                ints[meta + _HASH] = key_hash
+                ints[meta + _CHAIN] = ints[bucket]
+                ints[bucket] = slot
+                ints[meta + _KEY_LEN] = packed
+                offset = slot * self._record_size
+                self._data[offset:offset + len(key_bytes)] = key_bytes
+                ints[_COUNT] += 1
+            self._write_value(slot, value_bytes, value_is_str)
+            self._link_to_head(slot)
+
+    def pop(self, key, default=None):
+        """Удаляет ключ из кэша и возвращает его значение.
+
+        Args:
+            key (bytes | str): Ключ для удаления
+            default: Значение, возвращаемое при отсутствии ключа
+
+        Returns:
+            Значение, связанное с ключом, или default
+        """
+        key_bytes, packed, key_hash = self._key(key)
+        with self._lock:
+            slot, chain_prev = self._find(key_bytes, packed, key_hash)
+            if slot == _NIL:
+                return default
+            value = self._read_value(slot)
+            self._drop(slot, chain_prev)
+            return value
+
+    def keys(self):
+        """Возвращает ключи от самого нового к самому старому.
+
+        Returns:
+            list: Ключи исходных типов
+        """
+        result = []
+        with self._lock:
+            ints = self._ints
+            slot = ints[_HEAD]
+            while slot != _NIL:
+                meta = self._meta(slot)
+                packed = ints[meta + _KEY_LEN]
+                offset = slot * self._record_size
+                key = bytes(self._data[offset:offset + (packed >> 1)])
+                result.append(key.decode("utf-8") if packed & 1 else key)
+                slot = ints[meta + _NEXT]
+        return result
+
+    def __contains__(self, key):
+        """Проверяет наличие ключа без изменения порядка.
+
+        Args:
+            key (bytes | str): Ключ для проверки
+
+        Returns:
+            bool: True, если ключ есть в кэше
+        """
+        key_bytes, packed, key_hash = self._key(key)
+        with self._lock:
+            return self._find(key_bytes, packed, key_hash)[0] != _NIL
+
+    def __len__(self):
+        """Возвращает количество записей в кэше.
+
+        Returns:
+            int: Количество записей
+        """
+        with self._lock:
+            return self._ints[_COUNT]
+
+    def __getitem__(self, key):
+        """Получение значения через синтаксис словаря.
+
+        Args:
+            key (bytes | str): Ключ для поиска
+
+        Returns:
+            Значение, связанное с ключом, или None если ключ не найден
+        """
+        return self.get(key)
+
+    def __setitem__(self, key, value):
+        """Установка значения через синтаксис словаря.
+
+        Args:
+            key (bytes | str): Ключ для установки
+            value (bytes | str): Значение для установки
+        """
+        self.set(key, value)
+
+    def __delitem__(self, key):
+        """Удаление ключа через синтаксис словаря.
+
+        Args:
+            key (bytes | str): Ключ для удаления
+
+        Raises:
+            KeyError: Если ключа нет в кэше
+        """
+        missing = object()
+        if self.pop(key, missing) is missing:
+            raise KeyError(key)
+
+    def close(self):
+        """Отключает процесс от блока разделяемой памяти."""
+        self._ints.release()
+        self._data.release()
+        self._shm.close()
+
+    def unlink(self):
+        """Удаляет блок разделяемой памяти (вызывает создатель кэша)."""
+        self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        if self._owner:
+            self.unlink()
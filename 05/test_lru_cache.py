@@ -1,12 +1,19 @@
 """Тесты для модуля LRU-кэша."""
 
+import threading
+
 import pytest
-from lru_cache import LRUCache
+from lru_cache import (CacheStats, CompactLRUCache, LRUCache,
+                       ShardedLRUCache)
+
+# Все реализации с публичным поведением LRUCache
+CACHE_CLASSES = [LRUCache, CompactLRUCache]
 
 
-def test_basic_operations():
+@pytest.mark.parametrize("cache_cls", CACHE_CLASSES)
+def test_basic_operations(cache_cls):
     """Тестирование базовых операций get и set."""
-    cache = LRUCache(2)
+    cache = cache_cls(2)
     cache.set("k1", "val1")
     cache.set("k2", "val2")
     
@@ -17,9 +24,10 @@ def test_basic_operations():
     assert cache.get("k1") == "val1"
 
 
-def test_lru_eviction():
+@pytest.mark.parametrize("cache_cls", CACHE_CLASSES)
+def test_lru_eviction(cache_cls):
     """Тестирование вытеснения по алгоритму LRU."""
-    cache = LRUCache(2)
+    cache = cache_cls(2)
     cache.set("k1", "val1")
     cache.set("k2", "val2")
     # Добавляем третий элемент - должен вытеснить k2 (самый старый)
@@ -31,9 +39,10 @@ def test_lru_eviction():
     assert cache.get("k1") == "val1"
 
 
-def test_dict_interface():
+@pytest.mark.parametrize("cache_cls", CACHE_CLASSES)
+def test_dict_interface(cache_cls):
     """Тестирование интерфейса аналогичного словарю."""
-    cache = LRUCache(2)
+    cache = cache_cls(2)
     # Используем синтаксис словаря
     cache["k1"] = "val1"
     cache["k2"] = "val2"
@@ -44,9 +53,10 @@ def test_dict_interface():
     assert cache["k3"] is None  # Отсутствующий ключ
 
 
-def test_update_existing():
+@pytest.mark.parametrize("cache_cls", CACHE_CLASSES)
+def test_update_existing(cache_cls):
     """Тестирование обновления существующего ключа."""
-    cache = LRUCache(2)
+    cache = cache_cls(2)
     cache.set("k1", "val1")
     # Обновляем значение существующего ключа
     cache.set("k1", "new_val")
@@ -55,9 +65,10 @@ def test_update_existing():
     assert cache.get("k1") == "new_val"
 
 
-def test_boundary_conditions():
+@pytest.mark.parametrize("cache_cls", CACHE_CLASSES)
+def test_boundary_conditions(cache_cls):
     """Тестирование граничных условий."""
-    cache = LRUCache(1)  # Кэш размером 1
+    cache = cache_cls(1)  # Кэш размером 1
     cache.set("k1", "val1")
     # Добавляем второй элемент - должен вытеснить первый
     cache.set("k2", "val2")
@@ -67,9 +78,10 @@ def test_boundary_conditions():
     assert cache.get("k2") == "val2"
 
 
-def test_lru_order_after_access():
+@pytest.mark.parametrize("cache_cls", CACHE_CLASSES)
+def test_lru_order_after_access(cache_cls):
     """Тестирование изменения порядка при доступе к элементам."""
-    cache = LRUCache(3)
+    cache = cache_cls(3)
     cache.set("k1", "val1")
     cache.set("k2", "val2")
     cache.set("k3", "val3")
@@ -87,5 +99,451 @@ def test_lru_order_after_access():
     assert cache.get("k4") == "val4"  # Новый элемент
 
 
+def test_compact_slot_reuse():
+    """Тестирование повторного использования слотов при вытеснении."""
+    cache = CompactLRUCache(2)
+    for i in range(10):
+        cache.set(i, i * 10)
+
+    assert len(cache.cache) == 2
+    assert sorted(cache.cache.values()) == [1, 2]
+    assert cache.get(8) == 80
+    assert cache.get(9) == 90
+    assert cache.get(7) is None
+
+
+def test_compact_pop_reuses_slot():
+    """Тестирование возврата слота в список свободных при удалении."""
+    cache = CompactLRUCache(3)
+    for key in ("k1", "k2", "k3"):
+        cache.set(key, key.upper())
+    freed = cache.cache["k2"]
+
+    assert cache.pop("k2") == "K2"
+    assert cache.pop("k2", "default") == "default"
+    with pytest.raises(KeyError):
+        del cache["k2"]
+
+    cache.set("k4", "K4")  # занимает освобожденный слот, без вытеснения
+    assert cache.cache["k4"] == freed
+    assert cache.get("k1") == "K1"
+    del cache["k3"]
+    cache.set("k5", "K5")
+    cache.set("k6", "K6")  # кэш снова полон - вытесняется k4
+    assert sorted(cache.cache) == ["k1", "k5", "k6"]
+    assert sorted(cache.cache.values()) == [1, 2, 3]
+
+
+def test_sharded_basic_operations():
+    """Тестирование get/set и словарного интерфейса сегментированного кэша."""
+    cache = ShardedLRUCache(8, shards=4)
+    cache.set("k1", "val1")
+    cache["k2"] = "val2"
+
+    assert cache.get("k1") == "val1"
+    assert cache["k2"] == "val2"
+    assert cache.get("k3") is None
+
+
+def test_sharded_capacity_split():
+    """Тестирование распределения емкости между сегментами."""
+    cache = ShardedLRUCache(10, shards=4)
+    assert sorted(seg.limit for seg in cache._segments) == [2, 2, 3, 3]
+
+    # Сегментов не может быть больше, чем емкость
+    small = ShardedLRUCache(2, shards=16)
+    assert small.shards == 2
+
+    with pytest.raises(ValueError):
+        ShardedLRUCache(0)
+
+
+def test_sharded_weight_only():
+    """Тестирование сегментированного кэша без ограничения количества."""
+    cache = ShardedLRUCache(None, shards=4, max_weight=100,
+                            weigher=lambda value: value)
+    assert cache.shards == 4
+    assert [seg.limit for seg in cache._segments] == [None] * 4
+    assert [seg.max_weight for seg in cache._segments] == [25] * 4
+
+    for i in range(50):
+        cache.set(i, 1)
+    assert sum(len(seg.cache) for seg in cache._segments) == 50
+
+    with pytest.raises(ValueError):
+        ShardedLRUCache(None, shards=0)
+
+
+def test_sharded_oversize_against_total_weight():
+    """Тестирование политики oversize по общему бюджету веса."""
+    cache = ShardedLRUCache(None, shards=16, max_weight=1000,
+                            weigher=lambda value: value)
+    assert [seg.max_weight for seg in cache._segments] == [62] * 16
+
+    # Тяжелее доли сегмента, но легче общего бюджета - сохраняется
+    cache.set("small", 10)
+    cache.set("big", 100)
+    assert cache.get("big") == 100
+    cache.set_many([("bulk", 200)])
+    assert cache.get("bulk") == 200
+    cache.set("huge", 1001)
+    assert "huge" not in cache
+
+    strict = ShardedLRUCache(None, shards=16, max_weight=1000,
+                             weigher=lambda value: value, oversize="raise")
+    strict.set("big", 100)
+    assert strict.get("big") == 100
+    with pytest.raises(ValueError, match="exceeds max_weight 1000$"):
+        strict.set("huge", 1001)
+
+    # Тяжелая запись вытесняет остальные записи своего сегмента
+    single = ShardedLRUCache(None, shards=2, max_weight=10,
+                             weigher=lambda value: value)
+    idx = single._index("big")
+    neighbour = next(key for key in range(100)
+                     if single._index(key) == idx)
+    single.set(neighbour, 3)
+    single.set("big", 8)
+    assert single.get("big") == 8
+    assert neighbour not in single
+
+
+def test_sharded_eviction_within_segment():
+    """Тестирование LRU-вытеснения внутри одного сегмента."""
+    cache = ShardedLRUCache(1, shards=1)
+    cache.set("k1", "val1")
+    cache.set("k2", "val2")
+
+    assert cache.get("k1") is None
+    assert cache.get("k2") == "val2"
+
+
+def test_sharded_concurrent_access():
+    """Тестирование параллельной записи и чтения из нескольких потоков."""
+    cache = ShardedLRUCache(1000, shards=8)
+
+    def worker(offset):
+        for i in range(100):
+            cache.set(offset + i, i)
+            assert cache.get(offset + i) == i
+
+    threads = [
+        threading.Thread(target=worker, args=(n * 100,)) for n in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert all(cache.get(i) == i % 100 for i in range(800))
+
+
+class FakeClock:
+    """Управляемые часы для детерминированной проверки TTL."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_lazy_expiration():
+    """Тестирование ленивого удаления просроченной записи при get."""
+    clock = FakeClock()
+    cache = LRUCache(10, ttl=5, clock=clock)
+    cache.set("k1", "val1")
+    cache.set("k2", "val2", ttl=20)
+
+    clock.now = 4.9
+    assert cache.get("k1") == "val1"
+    clock.now = 5.0
+    assert cache.get("k1") is None
+    assert "k1" not in cache.cache
+    assert cache.get("k2") == "val2"
+
+
+def test_ttl_update_resets_expiration():
+    """Тестирование продления срока жизни при перезаписи ключа."""
+    clock = FakeClock()
+    cache = LRUCache(10, clock=clock)
+    cache.set("k1", "val1", ttl=1)
+    clock.now = 0.5
+    cache.set("k1", "val2")  # без TTL запись больше не устаревает
+
+    clock.now = 100
+    assert cache.expire() == 0
+    assert cache.get("k1") == "val2"
+
+
+def test_ttl_incremental_sweep():
+    """Тестирование порционной очистки просроченных записей при set."""
+    clock = FakeClock()
+    cache = LRUCache(100, ttl=1, clock=clock, sweep_batch=2)
+    for i in range(5):
+        cache.set(i, i)
+
+    clock.now = 2
+    cache.set("fresh", 1, ttl=10)
+    # За одну вставку удаляется не больше sweep_batch записей
+    assert len(cache.cache) == 4
+    assert cache.expire() == 3
+    assert list(cache.cache) == ["fresh"]
+
+
+def test_ttl_heap_has_no_stale_entries():
+    """Тестирование удаления узлов из кучи сроков вместе с записями."""
+    clock = FakeClock()
+    cache = LRUCache(3, ttl=10, clock=clock)
+    for i in range(100):
+        cache.set(i, i)  # вытеснение по емкости
+        cache.set(i, i, ttl=i % 5 + 1)  # перезапись со сменой срока
+    cache.pop(99)
+
+    heap = cache._expiry_heap
+    assert sorted(node.key for node in heap) == [97, 98]
+    assert [node.heap_index for node in heap] == [0, 1]
+
+    clock.now = 100
+    assert cache.expire() == 2
+    assert heap == []
+
+
+def test_sharded_ttl():
+    """Тестирование TTL в сегментированном кэше."""
+    clock = FakeClock()
+    cache = ShardedLRUCache(8, shards=2, ttl=1, clock=clock)
+    cache.set("k1", "val1")
+    cache.set("k2", "val2", ttl=5)
+
+    clock.now = 2
+    assert cache.expire() == 1
+    assert cache.get("k1") is None
+    assert cache.get("k2") == "val2"
+
+
+def test_weighted_eviction():
+    """Тестирование вытеснения по суммарному весу значений."""
+    cache = LRUCache(None, max_weight=10)
+    cache.set("k1", "aaaa")
+    cache.set("k2", "bbbb")
+    assert cache.weight == 8
+
+    # Для вставки 6 единиц достаточно вытеснить самую старую запись
+    cache.set("k3", "cccccc")
+    assert cache.get("k1") is None
+    assert cache.get("k2") == "bbbb"
+    assert cache.weight == 10
+
+    cache.set("k4", "dddddddd")
+    assert list(cache.cache) == ["k4"]
+    assert cache.weight == 8
+
+
+def test_weighted_update_and_custom_weigher():
+    """Тестирование изменения веса при перезаписи и своей функции веса."""
+    cache = LRUCache(10, max_weight=100, weigher=lambda value: value)
+    cache.set("k1", 30)
+    cache.set("k2", 30)
+    cache.set("k1", 80)  # k1 стал новым, вытесняется k2
+
+    assert cache.get("k2") is None
+    assert cache.get("k1") == 80
+    assert cache.weight == 80
+
+
+def test_weighted_oversize_policies():
+    """Тестирование политик для значений тяжелее бюджета."""
+    cache = LRUCache(max_weight=4)
+    cache.set("k1", "ab")
+    cache.set("k1", "too long")
+    # Значение не сохранено, а старое удалено как устаревшее
+    assert cache.get("k1") is None
+    assert cache.weight == 0
+
+    strict = LRUCache(max_weight=4, oversize="raise")
+    with pytest.raises(ValueError):
+        strict.set("k1", "too long")
+
+    with pytest.raises(ValueError):
+        LRUCache(oversize="ignore")
+
+
+def test_get_many_and_set_many():
+    """Тестирование пакетных операций и их влияния на порядок LRU."""
+    cache = LRUCache(3)
+    cache.set_many({"k1": "val1", "k2": "val2"})
+    cache.set_many([("k3", "val3")])
+
+    assert cache.get_many(["k1", "k4", "k3"]) == {"k1": "val1", "k3": "val3"}
+    # k2 не запрашивался и стал самым старым
+    cache.set("k5", "val5")
+    assert "k2" not in cache
+    assert len(cache) == 3
+
+
+def test_bulk_ttl():
+    """Тестирование пакетных операций с истекшими записями."""
+    clock = FakeClock()
+    cache = LRUCache(10, clock=clock)
+    cache.set_many({"k1": 1, "k2": 2}, ttl=1)
+    cache.set("k3", 3)
+
+    clock.now = 1
+    assert cache.get_many(["k1", "k2", "k3"]) == {"k3": 3}
+    assert len(cache) == 1
+
+
+def test_pop_contains_delitem():
+    """Тестирование pop, in и del."""
+    clock = FakeClock()
+    cache = LRUCache(3, clock=clock)
+    cache.set("k1", "val1")
+    cache.set("k2", "val2", ttl=1)
+
+    assert "k1" in cache
+    assert cache.pop("k1") == "val1"
+    assert "k1" not in cache
+    assert cache.pop("k1", "default") == "default"
+
+    clock.now = 5
+    assert "k2" not in cache
+    with pytest.raises(KeyError):
+        del cache["k2"]
+    assert len(cache) == 0
+
+    cache["k3"] = "val3"
+    del cache["k3"]
+    assert cache.get("k3") is None
+
+
+def test_sharded_bulk_operations():
+    """Тестирование пакетных операций сегментированного кэша."""
+    cache = ShardedLRUCache(100, shards=4)
+    cache.set_many({i: i * 2 for i in range(10)})
+
+    assert cache.get_many(range(5, 15)) == {i: i * 2 for i in range(5, 10)}
+    assert len(cache) == 10
+    assert 3 in cache
+    assert cache.pop(3) == 6
+    del cache[4]
+    assert len(cache) == 8
+    with pytest.raises(KeyError):
+        del cache[4]
+
+
+def test_stats_counters():
+    """Тестирование счетчиков статистики."""
+    clock = FakeClock()
+    cache = LRUCache(2, clock=clock, stats=True)
+    cache.set("k1", "val1")
+    cache.set("k1", "val2")
+    cache.set("k2", "val2", ttl=1)
+    cache.get("k1")
+    cache.get("missing")
+    cache.get_many(["k1", "other"])
+    cache.set("k3", "val3")  # вытесняет k2
+
+    clock.now = 5
+    cache.set("k4", "val4", ttl=1)
+    clock.now = 10
+    cache.get("k4")  # просрочен
+
+    assert cache.stats() == CacheStats(
+        hits=2, misses=3, inserts=4, updates=1, evictions=2,
+        expirations=1, size=1, weight=0)
+
+
+def test_stats_set_many_matches_set():
+    """Тестирование одинакового подсчета в set_many и в серии set."""
+    items = [("a", "x"), ("a", "y"), ("b", "z" * 10)]
+    batch = LRUCache(max_weight=5, stats=True)
+    batch.set_many(items)
+    single = LRUCache(max_weight=5, stats=True)
+    for key, value in items:
+        single.set(key, value)
+
+    assert batch.stats() == single.stats()
+    assert (batch.stats().inserts, batch.stats().updates) == (1, 1)
+
+
+def test_stats_disabled_and_on_evict():
+    """Тестирование выключенной статистики и колбэка вытеснения."""
+    evicted = []
+    cache = LRUCache(1, on_evict=lambda *args: evicted.append(args))
+    cache.set("k1", "val1")
+    cache.set("k2", "val2")
+    cache.get("k2")
+
+    assert evicted == [("k1", "val1", "capacity")]
+    assert cache.stats() == CacheStats(0, 0, 0, 0, 0, 0, 1, 0)
+
+
+def test_sharded_stats():
+    """Тестирование суммирования статистики по сегментам."""
+    cache = ShardedLRUCache(8, shards=4, stats=True)
+    cache.set_many({i: i for i in range(4)})
+    cache.get_many(range(6))
+
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.inserts, stats.size) == \
+        (4, 2, 4, 4)
+
+
+@pytest.mark.parametrize("use_mmap", [False, True])
+def test_dump_load_preserves_order(tmp_path, use_mmap):
+    """Тестирование сохранения и восстановления порядка вытеснения."""
+    path = tmp_path / "cache.snap"
+    cache = LRUCache(3)
+    cache.set("k1", "val1")
+    cache.set("k2", {"nested": [1, 2]})
+    cache.set("k3", None)
+    cache.get("k1")  # порядок от старых к новым: k2, k3, k1
+    assert cache.dump(path) == 3
+
+    restored = LRUCache(3)
+    assert restored.load(path, use_mmap=use_mmap) == 3
+    assert restored.get("k2") == {"nested": [1, 2]}
+    # После обращения к k2 самым старым стал k3
+    restored.set("k4", "val4")
+    assert "k3" not in restored
+    assert restored.get("k1") == "val1"
+
+
+def test_dump_load_ttl_and_capacity(tmp_path):
+    """Тестирование переноса TTL и загрузки в кэш меньшего размера."""
+    path = tmp_path / "cache.snap"
+    clock = FakeClock()
+    cache = LRUCache(10, clock=clock)
+    cache.set("expired", 1, ttl=1)
+    cache.set("ttl", 2, ttl=10)
+    for i in range(3):
+        cache.set(i, i)
+    clock.now = 5
+    assert cache.dump(path) == 4
+
+    other_clock = FakeClock()
+    small = LRUCache(3, clock=other_clock)
+    small.load(path)
+    assert list(small.cache) == [0, 1, 2]
+
+    restored = LRUCache(10, clock=other_clock)
+    restored.load(path)
+    other_clock.now = 4.9
+    assert restored.get("ttl") == 2
+    other_clock.now = 5
+    assert restored.get("ttl") is None
+
+
+def test_load_rejects_foreign_file(tmp_path):
+    """Тестирование ошибки при загрузке постороннего файла."""
+    path = tmp_path / "other.bin"
+    path.write_bytes(b"not a snapshot")
+    with pytest.raises(ValueError):
+        LRUCache().load(path)
+    with pytest.raises(ValueError):
+        LRUCache().load(path, use_mmap=True)
+
+
 if __name__ == "__main__":
     pytest.main()
\ No newline at end of file
@@ -0,0 +1,170 @@
+"""Тесты для мемоизирующего декоратора."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+from memoize import CacheInfo, lru_memoize
+
+
+def test_sync_memoization_and_info():
+    """Тестирование кэширования результатов и статистики."""
+    calls = []
+
+    @lru_memoize(maxsize=2)
+    def square(x):
+        calls.append(x)
+        return x * x
+
+    assert square(2) == 4
+    assert square(2) == 4
+    assert square(3) == 9
+    assert calls == [2, 3]
+    assert square.cache_info() == CacheInfo(1, 2, 2, 2)
+
+    square.cache_clear()
+    assert square.cache_info() == CacheInfo(0, 0, 2, 0)
+    assert square(2) == 4
+    assert calls == [2, 3, 2]
+
+
+def test_none_result_is_cached():
+    """Тестирование кэширования результата None."""
+    calls = []
+
+    @lru_memoize()
+    def nothing(x):
+        calls.append(x)
+
+    nothing(1)
+    nothing(1)
+    assert calls == [1]
+
+
+def test_typed_and_key_function():
+    """Тестирование параметров typed и key."""
+    @lru_memoize(typed=True)
+    def ident(x):
+        return x
+
+    ident(1)
+    ident(1.0)
+    assert ident.cache_info().misses == 2
+
+    @lru_memoize(key=lambda url, k=5: url)
+    def fetch(url, k=5):
+        return (url, k)
+
+    assert fetch("a", k=1) == ("a", 1)
+    assert fetch("a", k=2) == ("a", 1)
+
+
+def test_exceptions_are_not_cached():
+    """Тестирование того, что исключения не кэшируются."""
+    attempts = []
+
+    @lru_memoize()
+    def flaky(x):
+        attempts.append(x)
+        if len(attempts) == 1:
+            raise RuntimeError("boom")
+        return x
+
+    with pytest.raises(RuntimeError):
+        flaky(1)
+    assert flaky(1) == 1
+    assert len(attempts) == 2
+
+
+def test_sync_single_flight():
+    """Тестирование разделения одного вычисления между потоками."""
+    calls = []
+    started = threading.Event()
+
+    @lru_memoize()
+    def slow(x):
+        calls.append(x)
+        started.set()
+        time.sleep(0.1)
+        return x * 10
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(slow(7)))
+        for _ in range(8)
+    ]
+    threads[0].start()
+    started.wait()
+    for thread in threads[1:]:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert calls == [7]
+    assert results == [70] * 8
+    assert slow.cache_info().misses == 1
+
+
+def test_async_single_flight():
+    """Тестирование разделения одного вычисления между корутинами."""
+    calls = []
+
+    @lru_memoize()
+    async def slow(x):
+        calls.append(x)
+        await asyncio.sleep(0.05)
+        return x * 10
+
+    async def scenario():
+        results = await asyncio.gather(*(slow(3) for _ in range(10)))
+        cached = await slow(3)
+        return results, cached
+
+    results, cached = asyncio.run(scenario())
+    assert calls == [3]
+    assert results == [30] * 10
+    assert cached == 30
+    assert slow.cache_info() == CacheInfo(10, 1, 128, 1)
+
+
+def test_async_leader_cancel():
+    """Тестирование отмены первого вызывающего без отмены остальных."""
+    calls = []
+
+    @lru_memoize()
+    async def slow(x):
+        calls.append(x)
+        await asyncio.sleep(0.05)
+        return x * 10
+
+    async def scenario():
+        leader = asyncio.ensure_future(slow(2))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(slow(2))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        result = await follower
+        return leader.cancelled(), result, await slow(2)
+
+    cancelled, result, cached = asyncio.run(scenario())
+    assert cancelled
+    assert result == 20
+    assert cached == 20
+    assert calls == [2]
+
+
+def test_async_exception_shared():
+    """Тестирование передачи исключения всем ожидающим корутинам."""
+    @lru_memoize()
+    async def failing(x):
+        await asyncio.sleep(0.01)
+        raise ValueError(x)
+
+    async def scenario():
+        return await asyncio.gather(
+            *(failing(1) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(res, ValueError) for res in results)
+    assert failing.cache_info().currsize == 0
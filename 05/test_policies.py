@@ -0,0 +1,113 @@
+"""Тесты для политик вытеснения."""
+
+import random
+
+import pytest
+from policies import POLICIES, ARCPolicy, CountMinSketch, PolicyCache
+
+
+@pytest.mark.parametrize("policy", sorted(POLICIES))
+def test_policy_cache_interface(policy):
+    """Тестирование интерфейса кэша для всех политик."""
+    cache = PolicyCache(2, policy)
+    cache["k1"] = "val1"
+    cache.set("k1", "new_val")
+
+    assert cache.get("k1") == "new_val"
+    assert cache["k2"] is None
+    assert "k1" in cache
+    assert cache.pop("k1") == "new_val"
+    assert len(cache) == 0
+
+
+@pytest.mark.parametrize("policy", sorted(POLICIES))
+def test_capacity_is_respected(policy):
+    """Тестирование соблюдения емкости на случайной трассе."""
+    rnd = random.Random(1)
+    cache = PolicyCache(50, policy)
+    for _ in range(5000):
+        key = rnd.randrange(200)
+        if cache.get(key) is None:
+            cache.set(key, key)
+        assert len(cache) <= 50
+        if rnd.random() < 0.01:
+            cache.pop(rnd.randrange(200))
+
+
+def test_lru_policy_order():
+    """Тестирование вытеснения самого старого ключа политикой LRU."""
+    cache = PolicyCache(2, "lru")
+    cache.set("k1", 1)
+    cache.set("k2", 2)
+    cache.get("k1")
+    cache.set("k3", 3)
+
+    assert cache.get("k2") is None
+    assert cache.get("k1") == 1
+
+
+def test_lfu_keeps_frequent_keys():
+    """Тестирование вытеснения наименее частого ключа политикой LFU."""
+    cache = PolicyCache(2, "lfu")
+    cache.set("hot", 1)
+    cache.set("cold", 2)
+    for _ in range(3):
+        cache.get("hot")
+    cache.set("new", 3)
+
+    assert cache.get("cold") is None
+    assert cache.get("hot") == 1
+
+
+@pytest.mark.parametrize("policy", ["arc", "tinylfu"])
+def test_scan_resistance(policy):
+    """Тестирование сохранения горячего набора после сканирования."""
+    cache = PolicyCache(100, policy)
+    hot = [f"hot{i}" for i in range(50)]
+    for _ in range(5):
+        for key in hot:
+            if cache.get(key) is None:
+                cache.set(key, True)
+    for i in range(1000):
+        cache.set(f"scan{i}", True)
+
+    survivors = sum(cache.get(key) is not None for key in hot)
+    assert survivors >= 40
+
+
+def test_arc_ghost_lists_are_bounded():
+    """Тестирование ограничения размеров списков-призраков ARC."""
+    rnd = random.Random(2)
+    arc = ARCPolicy(20)
+    resident = set()
+    for _ in range(5000):
+        key = int(rnd.paretovariate(1.2)) % 300
+        if key in resident:
+            arc.access(key)
+            continue
+        for victim in arc.insert(key):
+            resident.discard(victim)
+        resident.add(key)
+        assert len(arc._t1) + len(arc._t2) <= 20
+        assert len(arc._t1) + len(arc._b1) <= 20
+        assert len(arc._t1) + len(arc._t2) + len(arc._b1) + len(arc._b2) <= 40
+        assert 0 <= arc.target <= 20
+
+
+def test_count_min_sketch_aging():
+    """Тестирование оценки частоты и старения счетчиков."""
+    sketch = CountMinSketch(10)
+    for _ in range(5):
+        sketch.increment("a")
+    assert sketch.estimate("a") >= 5
+    assert sketch.estimate("b") <= sketch.estimate("a")
+
+    for i in range(sketch.sample_size):
+        sketch.increment(i)
+    assert sketch.estimate("a") < 5
+
+
+def test_unknown_policy():
+    """Тестирование ошибки при неизвестной политике."""
+    with pytest.raises(ValueError):
+        PolicyCache(10, "mru")
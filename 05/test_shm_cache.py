@@ -0,0 +1,101 @@
+"""Тесты для LRU-кэша в разделяемой памяти."""
+
+import multiprocessing
+
+import pytest
+from shm_cache import SharedLRUCache
+
+
+@pytest.fixture
+def cache():
+    """Кэш на 3 элемента, удаляемый после теста."""
+    with SharedLRUCache(3, key_size=16, value_size=32) as shared:
+        yield shared
+
+
+def test_basic_operations(cache):
+    """Тестирование get/set и сохранения типов."""
+    cache.set("k1", "val1")
+    cache[b"k2"] = b"val2"
+
+    assert cache.get("k1") == "val1"
+    assert cache[b"k2"] == b"val2"
+    assert cache.get(b"k1") is None
+    assert cache.get("k3") is None
+    assert len(cache) == 2
+
+
+def test_str_and_bytes_keys_distinct(cache):
+    """Тестирование того, что str и bytes с одинаковыми байтами различны."""
+    cache.set("a", "str")
+    cache.set(b"a", b"bytes")
+
+    assert cache.get("a") == "str"
+    assert cache.get(b"a") == b"bytes"
+    assert cache.keys() == [b"a", "a"]
+    assert cache.pop("a") == "str"
+    assert "a" not in cache
+    assert b"a" in cache
+    assert cache.keys() == [b"a"]
+
+
+def test_lru_eviction_and_update(cache):
+    """Тестирование порядка вытеснения и обновления значения."""
+    cache.set("k1", "val1")
+    cache.set("k2", "val2")
+    cache.set("k3", "val3")
+    cache.get("k1")
+    cache.set("k2", "new")
+    cache.set("k4", "val4")  # вытесняет k3
+
+    assert "k3" not in cache
+    assert cache.keys() == ["k4", "k2", "k1"]
+    assert cache.get("k2") == "new"
+
+
+def test_delete_and_slot_reuse(cache):
+    """Тестирование удаления и повторного использования слотов."""
+    for i in range(20):
+        cache.set(f"k{i}", f"val{i}")
+        if i % 2:
+            del cache[f"k{i}"]
+
+    # Вставка нечетного ключа в полный кэш вытесняет старый четный
+    assert cache.keys() == ["k18", "k16"]
+    assert cache.pop("k18") == "val18"
+    assert cache.pop("k18", "default") == "default"
+    with pytest.raises(KeyError):
+        del cache["k18"]
+
+
+def test_size_and_type_limits(cache):
+    """Тестирование ограничений на размер и тип данных."""
+    with pytest.raises(ValueError):
+        cache.set("k" * 17, "v")
+    with pytest.raises(ValueError):
+        cache.set("k", "v" * 33)
+    with pytest.raises(TypeError):
+        cache.set("k", 1)
+
+
+def _writer(shared, start):
+    for i in range(start, start + 50):
+        shared.set(f"k{i}", str(i))
+    shared.close()
+
+
+def test_cross_process_access():
+    """Тестирование записи в общий кэш из нескольких процессов."""
+    with SharedLRUCache(1000) as shared:
+        processes = [
+            multiprocessing.Process(target=_writer, args=(shared, n * 50))
+            for n in range(4)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+            assert process.exitcode == 0
+
+        assert len(shared) == 200
+        assert all(shared.get(f"k{i}") == str(i) for i in range(200))
@@ -0,0 +1,116 @@
+"""Прогон трассы ключей через кэши с разными политиками вытеснения.
+
+Трасса - текстовый файл, по одному ключу в строке. Без файла
+генерируется синтетическая трасса: зипфовское распределение горячих
+ключей, прерываемое однократными сканированиями холодных ключей.
+
+Пример запуска:
+    python trace_replay.py --limit 1000 trace.txt
+    python trace_replay.py --limit 1000 --length 200000
+"""
+
+import argparse
+import bisect
+import itertools
+import random
+import time
+
+from lru_cache import LRUCache
+from policies import POLICIES, PolicyCache
+
+
+def read_trace(path):
+    """Читает трассу из файла.
+
+    Args:
+        path (str): Путь к файлу
+
+    Returns:
+        list: Ключи трассы
+    """
+    with open(path, "r", encoding="utf-8") as file:
+        return [line.strip() for line in file if line.strip()]
+
+
+def synthetic_trace(length, keyspace, skew=1.0, scan_every=20000,
+                    scan_length=5000, seed=0):
+    """Генерирует трассу из зипфовских обращений и сканирований.
+
+    Args:
+        length (int): Длина трассы
+        keyspace (int): Количество горячих ключей
+        skew (float): Параметр распределения Зипфа
+        scan_every (int): Период сканирований (0 - без сканирований)
+        scan_length (int): Длина одного сканирования
+        seed (int): Зерно генератора
+
+    Returns:
+        list: Ключи трассы
+    """
+    rnd = random.Random(seed)
+    weights = [1 / (rank ** skew) for rank in range(1, keyspace + 1)]
+    cumulative = list(itertools.accumulate(weights))
+    total = cumulative[-1]
+    scan_ids = itertools.count()
+    trace = []
+    while len(trace) < length:
+        if scan_every and trace and len(trace) % scan_every == 0:
+            trace.extend(f"scan{next(scan_ids)}" for _ in range(scan_length))
+        idx = bisect.bisect_left(cumulative, rnd.random() * total)
+        trace.append(f"hot{min(idx, keyspace - 1)}")
+    return trace[:length]
+
+
+def replay(cache, trace):
+    """Прогоняет трассу через кэш по схеме "get, при промахе set".
+
+    Args:
+        cache: Кэш с методами get и set
+        trace (list): Ключи трассы
+
+    Returns:
+        tuple: (доля попаданий, операций в секунду)
+    """
+    hits = 0
+    start = time.perf_counter()
+    for key in trace:
+        if cache.get(key) is None:
+            cache.set(key, True)
+        else:
+            hits += 1
+    elapsed = time.perf_counter() - start
+    return hits / len(trace), len(trace) / elapsed
+
+
+def main():
+    """Точка входа."""
+    parser = argparse.ArgumentParser(description="Replay a key trace")
+    parser.add_argument("trace", nargs="?", help="Trace file, one key/line")
+    parser.add_argument("--limit", type=int, default=1000,
+                        help="Cache capacity")
+    parser.add_argument("--length", type=int, default=200000,
+                        help="Synthetic trace length")
+    parser.add_argument("--keyspace", type=int, default=10000,
+                        help="Synthetic hot keyspace")
+    parser.add_argument("--skew", type=float, default=1.0,
+                        help="Zipf skew of the synthetic trace")
+    args = parser.parse_args()
+
+    if args.trace:
+        trace = read_trace(args.trace)
+    else:
+        trace = synthetic_trace(args.length, args.keyspace, args.skew)
+
+    caches = {"LRUCache": LRUCache(args.limit)}
+    for name in POLICIES:
+        caches[name] = PolicyCache(args.limit, name)
+
+    print(f"{len(trace)} requests, capacity {args.limit}")
+    print(f"{'policy':>10} {'hit ratio':>10} {'ops/sec':>12}")
+    for name, cache in caches.items():
+        hit_ratio, ops = replay(cache, trace)
+        print(f"{name:>10} {hit_ratio:>10.4f} {ops:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
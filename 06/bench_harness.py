@@ -0,0 +1,246 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import socket
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from load_test import percentile
+from server import MasterServer
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    page = b""
+    latency = 0.0
+    jitter = 0.0
+
+    def do_GET(self):
+        delay = self.latency + random.uniform(0, self.jitter)
+        if delay:
+            time.sleep(delay)
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Content-Length', str(len(self.page)))
+        self.end_headers()
+        self.wfile.write(self.page)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_page(size, seed=0):
+    rnd = random.Random(seed)
+    words = [''.join(rnd.choice('abcdefghijklmnopqrstuvwxyz')
+                     for _ in range(rnd.randint(2, 9))) for _ in range(500)]
+    out = []
+    total = 0
+    while total < size:
+        # Skewed word choice so top-k has a clear answer
+        word = words[min(int(rnd.paretovariate(1.2)) - 1, len(words) - 1)]
+        out.append(word)
+        total += len(word) + 1
+    return " ".join(out).encode()[:size]
+
+
+def start_stub(page_size, latency, jitter):
+    handler = type('Handler', (StubHandler,), {
+        'page': make_page(page_size),
+        'latency': latency,
+        'jitter': jitter,
+    })
+    httpd = ThreadingHTTPServer(('localhost', 0), handler)
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
+
+
+def one_request(port, url, timeout):
+    with socket.create_connection(('localhost', port), timeout=timeout) as s:
+        s.sendall(url.encode())
+        chunks = []
+        while True:
+            chunk = s.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    return json.loads(b''.join(chunks).decode())
+
+
+def open_loop(port, urls, rate, duration, max_inflight, timeout,
+              poisson=True, seed=0):
+    # Requests are sent on a fixed schedule no matter how fast replies
+    # come back, and latency is measured from the scheduled send time,
+    # so a slow server cannot hide its queueing delay
+    rnd = random.Random(seed)
+    schedule = []
+    at = 0.0
+    while at < duration:
+        schedule.append(at)
+        at += rnd.expovariate(rate) if poisson else 1 / rate
+
+    latencies = []
+    errors = Counter()
+    lock = threading.Lock()
+
+    def send(index, due):
+        try:
+            result = one_request(port, urls[index % len(urls)], timeout)
+        except Exception as e:
+            with lock:
+                errors[type(e).__name__] += 1
+            return
+        finished = time.perf_counter()
+        with lock:
+            if isinstance(result, dict) and "error" in result:
+                errors[str(result["error"])] += 1
+            else:
+                latencies.append(finished - due)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_inflight) as pool:
+        for index, offset in enumerate(schedule):
+            due = start + offset
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(send, index, due)
+    elapsed = time.perf_counter() - start
+    return len(schedule), latencies, errors, elapsed
+
+
+def run(args):
+    httpd = start_stub(args.page_size, args.upstream_latency,
+                       args.upstream_jitter)
+    base = f"http://localhost:{httpd.server_port}/page"
+    urls = [f"{base}/{i}" for i in range(args.distinct_urls)]
+    server = MasterServer(
+        port=0, num_workers=args.workers, k=args.k, mode=args.mode,
+        cache_ttl=args.cache_ttl, stream=args.stream,
+        queue_size=args.queue_size, admission=args.admission,
+        scheduler=args.scheduler, coalesce=args.coalesce,
+        max_workers=args.max_workers)
+    thread = threading.Thread(target=server.run, daemon=True)
+    with open(os.devnull, 'w') as devnull, \
+            contextlib.redirect_stdout(devnull):
+        thread.start()
+        server.ready.wait(5)
+        try:
+            sent, latencies, errors, elapsed = open_loop(
+                server.port, urls, args.rate, args.duration,
+                args.max_inflight, args.timeout, not args.uniform,
+                args.seed)
+            stats = server.stats_counter.snapshot()
+            stats['pool_size'] = server.pool.size()
+        finally:
+            server.stop()
+            thread.join(5)
+            httpd.shutdown()
+            httpd.server_close()
+
+    failed = sum(errors.values())
+    return {
+        "meta": {
+            "python": sys.version,
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "settings": vars(args),
+        },
+        "sent": sent,
+        "completed": len(latencies),
+        "target_rate": args.rate,
+        "throughput": len(latencies) / elapsed,
+        "error_rate": failed / sent if sent else 0.0,
+        "errors": dict(errors),
+        "latency_ms": {
+            name: percentile(latencies, pct) * 1000
+            for name, pct in (("p50", 50), ("p90", 90), ("p99", 99),
+                              ("p999", 99.9), ("max", 100))
+        },
+        "server": stats,
+    }
+
+
+def compare(report, baseline_path):
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    print(f"Compared with {baseline_path}:", file=sys.stderr)
+    rows = [("throughput", report["throughput"], baseline["throughput"]),
+            ("error_rate", report["error_rate"], baseline["error_rate"])]
+    rows += [(f"latency {name}", value, baseline["latency_ms"][name])
+             for name, value in report["latency_ms"].items()]
+    for name, new, old in rows:
+        change = (new / old - 1) if old else 0.0
+        print(f"{name:>14} {old:>12.3f} -> {new:>12.3f} ({change:>+7.1%})",
+              file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='End-to-end open-loop benchmark of the URL server')
+    parser.add_argument('--rate', type=float, default=200,
+                        help='Target requests per second')
+    parser.add_argument('--duration', type=float, default=10,
+                        help='Seconds of load to generate')
+    parser.add_argument('--uniform', action='store_true',
+                        help='Evenly spaced arrivals instead of Poisson')
+    parser.add_argument('--max-inflight', type=int, default=256,
+                        help='Client threads available for requests')
+    parser.add_argument('--timeout', type=float, default=10,
+                        help='Client socket timeout')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Arrival schedule random seed')
+    parser.add_argument('--page-size', type=int, default=64 * 1024,
+                        help='Stub page size in bytes')
+    parser.add_argument('--upstream-latency', type=float, default=0.01,
+                        help='Stub response delay in seconds')
+    parser.add_argument('--upstream-jitter', type=float, default=0.0,
+                        help='Extra random stub delay up to this many '
+                             'seconds')
+    parser.add_argument('--distinct-urls', type=int, default=1000,
+                        help='Number of different URLs to cycle through')
+    parser.add_argument('-w', '--workers', type=int, default=4,
+                        help='Server worker threads')
+    parser.add_argument('--max-workers', type=int, default=None,
+                        help='Let the server pool grow up to this size')
+    parser.add_argument('-k', type=int, default=5,
+                        help='Number of top words to return')
+    parser.add_argument('--mode', choices=['threaded', 'selectors'],
+                        default='threaded', help='Server front end')
+    parser.add_argument('--scheduler', choices=['fifo', 'fair'],
+                        default='fifo', help='Server scheduler')
+    parser.add_argument('--queue-size', type=int, default=0,
+                        help='Server queue bound (0 is unbounded)')
+    parser.add_argument('--admission', default='block',
+                        choices=['block', 'reject', 'drop_oldest'],
+                        help='Server admission policy')
+    parser.add_argument('--cache-ttl', type=float, default=0,
+                        help='Server result cache TTL')
+    parser.add_argument('--stream', action='store_true',
+                        help='Server counts words while streaming')
+    parser.add_argument('--no-coalesce', dest='coalesce',
+                        action='store_false',
+                        help='Disable server request coalescing')
+    parser.add_argument('--output', help='Write the report to this file')
+    parser.add_argument('--compare', help='Baseline report to diff against')
+    args = parser.parse_args()
+
+    report = run(args)
+    print(json.dumps(report))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,48 +1,260 @@
 import socket
 import threading
 import argparse
+import asyncio
 import json
+import time
+from bisect import bisect
+from hashlib import md5
+from protocol import MAGIC, FrameDecoder, encode_frame
 
 
 class URLClient:
-    def __init__(self, host='localhost', port=8888):
+    def __init__(self, host='localhost', port=8888, client_id=None,
+                 priority=None):
         self.host = host
         self.port = port
+        self.client_id = client_id
+        self.priority = priority
 
-    def send_url(self, url):
+    def format_request(self, url):
+        options = []
+        if self.client_id is not None:
+            options.append(f"client={self.client_id}")
+        if self.priority is not None:
+            options.append(f"priority={self.priority}")
+        return " ".join(options + [url]).encode()
+
+    def request(self, url):
+        client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         try:
-            client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             client_socket.connect((self.host, self.port))
-            client_socket.send(url.encode())
-            
+            client_socket.send(self.format_request(url))
             response = client_socket.recv(4096).decode()
+        finally:
+            client_socket.close()
+        
+        return json.loads(response)
+
+    def send_url(self, url):
+        try:
+            result = self.request(url)
+            print(f"{url}: {result}")
+            return result
+        except Exception as e:
+            print(f"Error processing {url}: {e}")
+            return None
+
+    def send_urls(self, urls):
+        results = [None] * len(urls)
+        try:
+            client_socket = socket.create_connection((self.host, self.port))
+        except Exception as e:
+            for url in urls:
+                print(f"Error processing {url}: {e}")
+            return results
+
+        # Pipelining: frames go out from a separate thread so a slow reader
+        # never stalls the writer and vice versa
+        def send_all():
+            try:
+                client_socket.sendall(MAGIC)
+                for request_id, url in enumerate(urls):
+                    client_socket.sendall(encode_frame(
+                        request_id, self.format_request(url)))
+                client_socket.shutdown(socket.SHUT_WR)
+            except OSError:
+                pass
+
+        sender = threading.Thread(target=send_all, daemon=True)
+        sender.start()
+        decoder = FrameDecoder()
+        remaining = len(urls)
+        try:
+            while remaining:
+                data = client_socket.recv(65536)
+                if not data:
+                    break
+                for request_id, payload in decoder.feed(data):
+                    url = urls[request_id]
+                    try:
+                        result = json.loads(payload.decode())
+                    except Exception as e:
+                        print(f"Error processing {url}: {e}")
+                        result = None
+                    else:
+                        print(f"{url}: {result}")
+                    results[request_id] = result
+                    remaining -= 1
+        except Exception as e:
+            print(f"Connection error: {e}")
+        finally:
             client_socket.close()
-            
-            result = json.loads(response)
+            sender.join()
+        if remaining:
+            for url, result in zip(urls, results):
+                if result is None:
+                    print(f"Error processing {url}: no response")
+        return results
+
+
+class AsyncURLClient(URLClient):
+    address = None
+
+    async def resolve(self):
+        # Resolve once: open_connection() with a host name would run
+        # getaddrinfo in a thread pool for every single request
+        if self.address is None:
+            loop = asyncio.get_running_loop()
+            infos = await loop.getaddrinfo(self.host, self.port,
+                                           type=socket.SOCK_STREAM)
+            self.address = infos[0][4][:2]
+        return self.address
+
+    async def request_async(self, url):
+        host, port = await self.resolve()
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            writer.write(self.format_request(url))
+            await writer.drain()
+            response = await reader.read()
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+        return json.loads(response.decode())
+
+    async def send_url_async(self, url):
+        try:
+            result = await self.request_async(url)
+            print(f"{url}: {result}")
+            return result
+        except Exception as e:
+            print(f"Error processing {url}: {e}")
+            return None
+
+    async def send_urls_async(self, urls, concurrency):
+        # One thread, many sockets: a fixed set of coroutines share the URL
+        # iterator, so at most `concurrency` requests are in flight and no
+        # task is created per URL
+        results = [None] * len(urls)
+        pending = iter(enumerate(urls))
+
+        async def worker():
+            for i, url in pending:
+                results[i] = await self.send_url_async(url)
+
+        await asyncio.gather(*(worker()
+                               for _ in range(min(concurrency, len(urls)))))
+        return results
+
+
+def ring_hash(key):
+    return int.from_bytes(md5(key.encode()).digest()[:8], 'big')
+
+
+class HashRing:
+    def __init__(self, nodes, vnodes=100):
+        points = sorted((ring_hash(f"{node}#{i}"), node)
+                        for node in nodes for i in range(vnodes))
+        self.hashes = [point for point, _ in points]
+        self.nodes = [node for _, node in points]
+        self.distinct = len(set(nodes))
+
+    def nodes_for(self, key):
+        # Distinct nodes clockwise from the key: the owner, then failover
+        # candidates in a stable order
+        seen = []
+        start = bisect(self.hashes, ring_hash(key))
+        for i in range(len(self.nodes)):
+            node = self.nodes[(start + i) % len(self.nodes)]
+            if node not in seen:
+                seen.append(node)
+                if len(seen) == self.distinct:
+                    break
+        return seen
+
+
+class ClusterClient:
+    def __init__(self, endpoints, vnodes=100, client_id=None, priority=None,
+                 retry_after=5.0):
+        self.clients = {}
+        for endpoint in endpoints:
+            host, _, port = endpoint.rpartition(':')
+            self.clients[endpoint] = URLClient(host or 'localhost', int(port),
+                                               client_id, priority)
+        self.ring = HashRing(list(self.clients), vnodes)
+        self.retry_after = retry_after
+        self.down_until = {}
+
+    def route(self, url):
+        # Nodes that failed recently go last, but are still tried if every
+        # other node is down too
+        now = time.monotonic()
+        nodes = self.ring.nodes_for(url)
+        return ([n for n in nodes if self.down_until.get(n, 0) <= now] +
+                [n for n in nodes if self.down_until.get(n, 0) > now])
+
+    def request(self, url):
+        error = None
+        for endpoint in self.route(url):
+            try:
+                result = self.clients[endpoint].request(url)
+            except OSError as e:
+                self.down_until[endpoint] = time.monotonic() + \
+                    self.retry_after
+                error = e
+                continue
+            self.down_until.pop(endpoint, None)
+            return result
+        raise error or OSError("No servers configured")
+
+    def send_url(self, url):
+        try:
+            result = self.request(url)
             print(f"{url}: {result}")
             return result
         except Exception as e:
             print(f"Error processing {url}: {e}")
             return None
 
+    def send_urls(self, urls):
+        return [self.send_url(url) for url in urls]
+
 
 class ClientWorker(threading.Thread):
-    def __init__(self, worker_id, urls, client):
+    def __init__(self, worker_id, urls, client, persistent=False):
         super().__init__()
         self.worker_id = worker_id
         self.urls = urls
         self.client = client
+        self.persistent = persistent
 
     def run(self):
+        if self.persistent:
+            self.client.send_urls([url.strip() for url in self.urls])
+            return
         for url in self.urls:
             self.client.send_url(url.strip())
 
 
 class ClientManager:
-    def __init__(self, num_threads, urls_file, host='localhost', port=8888):
+    def __init__(self, num_threads, urls_file, host='localhost', port=8888,
+                 persistent=False, client_id=None, priority=None,
+                 servers=None, vnodes=100, use_async=False, concurrency=None):
         self.num_threads = num_threads
+        self.persistent = persistent
+        self.use_async = use_async
+        self.concurrency = concurrency or num_threads
         self.urls = self.load_urls(urls_file)
-        self.client = URLClient(host, port)
+        if use_async:
+            self.client = AsyncURLClient(host, port, client_id, priority)
+        elif servers:
+            self.client = ClusterClient(servers, vnodes, client_id, priority)
+        else:
+            self.client = URLClient(host, port, client_id, priority)
 
     @staticmethod
     def load_urls(urls_file):
@@ -56,12 +268,17 @@ class ClientManager:
         return chunks
 
     def run(self):
+        if self.use_async:
+            urls = [url.strip() for url in self.urls]
+            return asyncio.run(self.client.send_urls_async(urls,
+                                                           self.concurrency))
         url_chunks = self.distribute_urls()
         threads = []
         
         for i, chunk in enumerate(url_chunks):
             if chunk:
-                thread = ClientWorker(i, chunk, self.client)
+                thread = ClientWorker(i, chunk, self.client,
+                                      self.persistent)
                 thread.start()
                 threads.append(thread)
         
@@ -77,11 +294,35 @@ def main():
     parser.add_argument('--host', default='localhost', help='Server host')
     parser.add_argument('-p', '--port', type=int, default=8888, 
                        help='Server port')
+    parser.add_argument('--persistent', action='store_true',
+                       help='Pipeline each thread\'s URLs over one '
+                            'framed connection')
+    parser.add_argument('--client-id',
+                       help='Client id used by the server\'s fair scheduler')
+    parser.add_argument('--priority', type=int,
+                       help='Priority class for the fair scheduler')
+    parser.add_argument('--servers', nargs='+', metavar='HOST:PORT',
+                       help='Shard URLs across these servers by '
+                            'consistent hashing')
+    parser.add_argument('--vnodes', type=int, default=100,
+                       help='Virtual nodes per server on the hash ring')
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                       help='Send from one thread with asyncio instead of '
+                            'a thread per worker')
+    parser.add_argument('--concurrency', type=int, default=None,
+                       help='Requests in flight in --async mode '
+                            '(default: threads)')
     
     args = parser.parse_args()
+    if args.use_async and (args.persistent or args.servers):
+        parser.error('--async cannot be combined with --persistent or '
+                     '--servers')
     
     client_manager = ClientManager(args.threads, args.urls_file, 
-                                 args.host, args.port)
+                                 args.host, args.port, args.persistent,
+                                 args.client_id, args.priority,
+                                 args.servers, args.vnodes, args.use_async,
+                                 args.concurrency)
     client_manager.run()
 
 
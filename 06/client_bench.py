@@ -0,0 +1,99 @@
+import argparse
+import contextlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from client import ClientManager
+from server import MasterServer, URLProcessor
+
+
+def run_client(args):
+    manager = ClientManager(args.concurrency, args.urls_file, port=args.port,
+                            use_async=args.mode == 'async')
+    with open(os.devnull, 'w') as devnull, \
+            contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        manager.run()
+        elapsed = time.perf_counter() - start
+    print(json.dumps({"elapsed": elapsed,
+                      "threads": threading.active_count()}),
+          file=sys.stderr)
+
+
+def measure(mode, concurrency, port, urls_file, count):
+    # Each run is its own process, so peak RSS belongs to that client only
+    proc = subprocess.Popen(
+        [sys.executable, __file__, '--child', '--mode', mode,
+         '--concurrency', str(concurrency), '--port', str(port),
+         '--urls-file', urls_file],
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    with proc.stderr:
+        stderr = proc.stderr.read()
+    _, status, usage = os.wait4(proc.pid, 0)
+    # os.waitstatus_to_exitcode needs 3.9; CI still covers 3.8
+    proc.returncode = (os.WEXITSTATUS(status) if os.WIFEXITED(status)
+                       else -os.WTERMSIG(status))
+    child = json.loads(stderr.decode().strip().splitlines()[-1])
+    return {
+        "mode": mode,
+        "concurrency": concurrency,
+        "requests": count,
+        "requests_per_sec": count / child["elapsed"],
+        "peak_rss_mb": usage.ru_maxrss / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare threaded and asyncio client modes')
+    parser.add_argument('--requests', type=int, default=2000,
+                        help='URLs to send per run')
+    parser.add_argument('--concurrency', type=int, nargs='+',
+                        default=[10, 100, 1000],
+                        help='Threads (threaded) or in-flight limit (async)')
+    parser.add_argument('-w', '--workers', type=int, default=8,
+                        help='Server worker threads')
+    parser.add_argument('--child', action='store_true',
+                        help=argparse.SUPPRESS)
+    parser.add_argument('--mode', help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--urls-file', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        args.concurrency = args.concurrency[0]
+        run_client(args)
+        return
+
+    URLProcessor.fetch_url_content = staticmethod(
+        lambda url, session=None: "hello world hello")
+    server = MasterServer(port=0, num_workers=args.workers, mode='selectors',
+                          backlog=4096)
+    thread = threading.Thread(target=server.run, daemon=True)
+    with open(os.devnull, 'w') as devnull, \
+            contextlib.redirect_stdout(devnull):
+        thread.start()
+        server.ready.wait(5)
+
+    with tempfile.NamedTemporaryFile('w', suffix='.txt',
+                                     delete=False) as f:
+        for i in range(args.requests):
+            f.write(f"http://stub/{i}\n")
+    try:
+        for concurrency in args.concurrency:
+            for mode in ('threaded', 'async'):
+                print(json.dumps(measure(mode, concurrency, server.port,
+                                         f.name, args.requests)))
+    finally:
+        os.unlink(f.name)
+        server.stop()
+        thread.join(5)
+
+
+if __name__ == '__main__':
+    main()
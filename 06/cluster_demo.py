@@ -0,0 +1,83 @@
+import argparse
+import contextlib
+import json
+import os
+import threading
+import time
+
+from client import ClusterClient, HashRing
+from load_test import PAGE
+from server import MasterServer, URLProcessor
+
+
+def served(server):
+    workers, retired = server.pool.metrics()
+    return retired.processed + sum(m.processed for m in workers.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Consistent-hash sharding across local servers')
+    parser.add_argument('--servers', type=int, default=3,
+                        help='Local MasterServer instances to start')
+    parser.add_argument('--urls', type=int, default=300,
+                        help='Distinct URLs to route')
+    parser.add_argument('--vnodes', type=int, default=100,
+                        help='Virtual nodes per server')
+    args = parser.parse_args()
+
+    URLProcessor.fetch_url_content = staticmethod(
+        lambda url, session=None: PAGE)
+    servers, threads = [], []
+    with open(os.devnull, 'w') as devnull, \
+            contextlib.redirect_stdout(devnull):
+        for _ in range(args.servers):
+            server = MasterServer(port=0, num_workers=2)
+            thread = threading.Thread(target=server.run, daemon=True)
+            thread.start()
+            server.ready.wait(5)
+            servers.append(server)
+            threads.append(thread)
+    endpoints = [f"localhost:{server.port}" for server in servers]
+    by_endpoint = dict(zip(endpoints, servers))
+    cluster = ClusterClient(endpoints, args.vnodes)
+    urls = [f"http://site{i}.example/page" for i in range(args.urls)]
+
+    def run_pass(name):
+        before = {e: served(s) for e, s in by_endpoint.items()}
+        owners = {url: cluster.route(url)[0] for url in urls}
+        with open(os.devnull, 'w') as devnull, \
+                contextlib.redirect_stdout(devnull):
+            failed = sum(cluster.send_url(url) is None for url in urls)
+        # Workers count a request just after replying to it
+        time.sleep(0.1)
+        print(json.dumps({
+            "pass": name,
+            "failed": failed,
+            "served": {e: served(s) - before[e]
+                       for e, s in by_endpoint.items()},
+        }))
+        return owners
+
+    first = run_pass("initial")
+    second = run_pass("repeat")
+    print(json.dumps({"same_owner_on_repeat":
+                      sum(first[u] == second[u] for u in urls)}))
+
+    victim = endpoints[0]
+    by_endpoint[victim].stop()
+    threads[0].join(5)
+    run_pass(f"after stopping {victim}")
+    # Only the stopped server's URLs change owner; the rest stay put
+    remaining = HashRing(endpoints[1:], args.vnodes)
+    moved = sum(first[u] != remaining.nodes_for(u)[0] for u in urls)
+    owned = sum(first[u] == victim for u in urls)
+    print(json.dumps({"moved": moved, "previously_on_stopped": owned}))
+
+    for server, thread in zip(servers[1:], threads[1:]):
+        server.stop()
+        thread.join(5)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+import argparse
+import contextlib
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from server import StatsCounter, URLProcessor, Worker
+
+
+class NullSocket:
+    def send(self, data):
+        return len(data)
+
+    def close(self):
+        pass
+
+
+def make_page(size):
+    words = ["alpha", "beta", "gamma", "delta", "epsilon", "zeta", "eta",
+             "theta", "iota", "kappa", "lambda", "mu"]
+    chunk = " ".join(words[i % len(words)] * (1 + i % 3)
+                     for i in range(1000)) + "\n"
+    return (chunk * (size // len(chunk) + 1))[:size].encode()
+
+
+def run(cpu_workers, args, page):
+    text = page.decode()
+    fetch_bytes = URLProcessor.fetch_url_bytes
+    fetch_text = URLProcessor.fetch_url_content
+    URLProcessor.fetch_url_bytes = staticmethod(
+        lambda url, session=None: (page, 'utf-8'))
+    URLProcessor.fetch_url_content = staticmethod(
+        lambda url, session=None: text)
+    pool = ProcessPoolExecutor(cpu_workers) if cpu_workers else None
+    try:
+        if pool is not None:
+            # Warm the pool so process start-up is not measured
+            list(pool.map(abs, range(cpu_workers * 4)))
+        tasks = queue.Queue()
+        stats = StatsCounter()
+        workers = [Worker(i, tasks, stats, 10, cpu_pool=pool)
+                   for i in range(args.workers)]
+        for _ in range(args.pages):
+            tasks.put((NullSocket(), "http://stub/"))
+        shares = [args.pages // args.workers + (i < args.pages % args.workers)
+                  for i in range(args.workers)]
+        threads = [threading.Thread(target=drain, args=(w, n))
+                   for w, n in zip(workers, shares)]
+        with open(os.devnull, 'w') as devnull, \
+                contextlib.redirect_stdout(devnull):
+            start = time.perf_counter()
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            elapsed = time.perf_counter() - start
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        URLProcessor.fetch_url_bytes = staticmethod(fetch_bytes)
+        URLProcessor.fetch_url_content = staticmethod(fetch_text)
+    return {
+        "cpu_workers": cpu_workers,
+        "io_workers": args.workers,
+        "page_bytes": len(page),
+        "pages": args.pages,
+        "pages_per_sec": args.pages / elapsed,
+        "mb_per_sec": args.pages * len(page) / elapsed / 1e6,
+    }
+
+
+def drain(worker, count):
+    for _ in range(count):
+        worker._process_next_task()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare in-thread and process-pool word counting')
+    parser.add_argument('--pages', type=int, default=64,
+                        help='Pages to process per run')
+    parser.add_argument('--page-size', type=int, default=2 * 1024 * 1024,
+                        help='Page size in bytes')
+    parser.add_argument('-w', '--workers', type=int, default=8,
+                        help='I/O worker threads')
+    parser.add_argument('--cpu-workers', type=int, nargs='+',
+                        default=[0, 1, 2, 4, 8],
+                        help='Process pool sizes to compare (0 = threads)')
+    args = parser.parse_args()
+
+    print(json.dumps({"cpu_count": os.cpu_count()}))
+    page = make_page(args.page_size)
+    for cpu_workers in args.cpu_workers:
+        print(json.dumps(run(cpu_workers, args, page)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+import argparse
+import contextlib
+import json
+import os
+import threading
+import time
+
+from client import URLClient
+from load_test import PAGE, one_request, percentile
+from server import MasterServer, URLProcessor
+
+
+def run(scheduler, heavy, args):
+    server = MasterServer(port=0, num_workers=args.workers,
+                          scheduler=scheduler)
+    thread = threading.Thread(target=server.run, daemon=True)
+    with open(os.devnull, 'w') as devnull, \
+            contextlib.redirect_stdout(devnull):
+        thread.start()
+        server.ready.wait(5)
+
+        heavy_thread = None
+        if heavy:
+            # One pipelined burst that keeps every worker busy
+            client = URLClient('localhost', server.port, client_id='heavy')
+            urls = ["http://stub/heavy"] * args.burst
+            heavy_thread = threading.Thread(target=client.send_urls,
+                                            args=(urls,))
+            heavy_thread.start()
+            time.sleep(0.2)
+
+        latencies = []
+        for _ in range(args.requests):
+            latencies.append(one_request(
+                server.port, "client=light http://stub/light",
+                args.timeout))
+            time.sleep(args.interval)
+
+        if heavy_thread is not None:
+            heavy_thread.join()
+        server.stop()
+        thread.join(5)
+    return {
+        "scheduler": scheduler,
+        "heavy_client": heavy,
+        "light_requests": len(latencies),
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Light-client latency next to a heavy client')
+    parser.add_argument('--burst', type=int, default=10000,
+                        help='URLs the heavy client submits at once')
+    parser.add_argument('--requests', type=int, default=100,
+                        help='Sequential requests from the light client')
+    parser.add_argument('--interval', type=float, default=0.01,
+                        help='Pause between light-client requests')
+    parser.add_argument('--service-ms', type=float, default=2.0,
+                        help='Simulated upstream fetch time')
+    parser.add_argument('-w', '--workers', type=int, default=4,
+                        help='Server worker threads')
+    parser.add_argument('--timeout', type=float, default=60.0,
+                        help='Client socket timeout')
+    args = parser.parse_args()
+
+    def slow_fetch(url, session=None):
+        time.sleep(args.service_ms / 1000)
+        return PAGE
+
+    URLProcessor.fetch_url_content = staticmethod(slow_fetch)
+    print(json.dumps(run('fifo', False, args)))
+    for scheduler in ('fifo', 'fair'):
+        print(json.dumps(run(scheduler, True, args)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from load_test import PAGE, percentile
+from server import URLProcessor, make_session
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; without this, Nagle plus
+    # delayed ACKs add ~40ms to every keep-alive response
+    disable_nagle_algorithm = True
+    body = PAGE.encode()
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain')
+        self.send_header('Content-Length', str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run(name, url, args):
+    latencies = []
+    lock = threading.Lock()
+
+    def fetcher():
+        session = make_session(args.pool_size) if name == 'session' else None
+        local = []
+        for i in range(args.requests):
+            start = time.perf_counter()
+            URLProcessor.fetch_url_content(f"{url}page{i}", session)
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=fetcher) for _ in range(args.workers)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return {
+        "client": name,
+        "workers": args.workers,
+        "fetches": len(latencies),
+        "fetches_per_sec": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare per-request and pooled upstream fetches')
+    parser.add_argument('--requests', type=int, default=500,
+                        help='Fetches per worker')
+    parser.add_argument('-w', '--workers', type=int, default=4,
+                        help='Concurrent fetching workers')
+    parser.add_argument('--pool-size', type=int, default=10,
+                        help='Keep-alive connections per host per worker')
+    args = parser.parse_args()
+
+    httpd = ThreadingHTTPServer(('localhost', 0), KeepAliveHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    url = f"http://localhost:{httpd.server_port}/"
+    try:
+        for name in ('requests.get', 'session'):
+            print(json.dumps(run(name, url, args)))
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+if __name__ == '__main__':
+    main()
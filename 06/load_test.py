@@ -0,0 +1,112 @@
+import argparse
+import json
+import socket
+import threading
+import time
+
+from server import MasterServer, URLProcessor
+
+
+PAGE = "the quick brown fox jumps over the lazy dog " * 50
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def one_request(port, url, timeout):
+    start = time.perf_counter()
+    with socket.create_connection(('localhost', port), timeout=timeout) as s:
+        s.sendall(url.encode())
+        while s.recv(4096):
+            pass
+    return time.perf_counter() - start
+
+
+def run_mode(mode, args):
+    server = MasterServer(port=0, num_workers=args.workers, mode=mode,
+                          backlog=args.backlog)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    server.ready.wait(5)
+
+    idle = []
+    for _ in range(args.idle):
+        try:
+            idle.append(socket.create_connection(('localhost', server.port),
+                                                 timeout=args.timeout))
+        except OSError:
+            break
+
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def client():
+        for _ in range(args.requests):
+            try:
+                latency = one_request(server.port, "http://stub/",
+                                      args.timeout)
+            except OSError:
+                with lock:
+                    errors[0] += 1
+                continue
+            with lock:
+                latencies.append(latency)
+
+    clients = [threading.Thread(target=client) for _ in range(args.clients)]
+    start = time.perf_counter()
+    for c in clients:
+        c.start()
+    for c in clients:
+        c.join()
+    elapsed = time.perf_counter() - start
+
+    for conn in idle:
+        conn.close()
+    server.stop()
+    thread.join(5)
+    return {
+        "mode": mode,
+        "idle_connections": len(idle),
+        "completed": len(latencies),
+        "errors": errors[0],
+        "connections_per_sec": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare threaded and selectors front ends')
+    parser.add_argument('--clients', type=int, default=32,
+                        help='Concurrent client threads')
+    parser.add_argument('--requests', type=int, default=50,
+                        help='Requests per client')
+    parser.add_argument('--idle', type=int, default=0,
+                        help='Idle connections opened before the run')
+    parser.add_argument('-w', '--workers', type=int, default=4,
+                        help='Server worker threads')
+    parser.add_argument('--backlog', type=int, default=128,
+                        help='Listen backlog')
+    parser.add_argument('--timeout', type=float, default=5.0,
+                        help='Client socket timeout')
+    parser.add_argument('--modes', nargs='+',
+                        default=['threaded', 'selectors'],
+                        help='Server modes to compare')
+    args = parser.parse_args()
+
+    # Serve a fixed page so the test measures the server, not the network
+    URLProcessor.fetch_url_content = staticmethod(
+        lambda url, session=None: PAGE)
+    for mode in args.modes:
+        print(json.dumps(run_mode(mode, args)))
+
+
+if __name__ == '__main__':
+    main()
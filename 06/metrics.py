@@ -0,0 +1,98 @@
+from bisect import bisect_left
+from collections import Counter
+
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STAGES = ('queue_wait', 'fetch', 'tokenize', 'send')
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def merge(self, other):
+        # other may be a live worker's histogram: copy the counts first
+        for i, count in enumerate(list(other.counts)):
+            self.counts[i] += count
+        self.sum += other.sum
+        self.count += other.count
+
+
+class WorkerMetrics:
+    # Written only by the owning worker thread, so updates need no lock;
+    # readers merge all workers' metrics when rendering
+    def __init__(self):
+        self.stages = {stage: Histogram() for stage in STAGES}
+        self.processed = 0
+        self.errors = Counter()
+
+    def observe(self, stage, seconds):
+        self.stages[stage].observe(seconds)
+
+    def merge(self, other):
+        for stage, histogram in other.stages.items():
+            self.stages[stage].merge(histogram)
+        self.processed += other.processed
+        # dict() copies atomically under the GIL; iterating a live worker's
+        # Counter directly fails if it records a new exception type
+        self.errors.update(dict(other.errors))
+
+
+def render_prometheus(worker_metrics, stats, queue_depth, pool_size=None,
+                      retired=None, prefix='urlserver'):
+    # worker_metrics maps a live worker's id to its metrics; retired holds
+    # everything folded in from workers that have already exited
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP {prefix}_{name} {help_text}")
+        lines.append(f"# TYPE {prefix}_{name} {kind}")
+        for labels, value in samples:
+            lines.append(f"{prefix}_{name}{labels} {value}")
+
+    total = WorkerMetrics()
+    if retired is not None:
+        total.merge(retired)
+    for metrics in worker_metrics.values():
+        total.merge(metrics)
+
+    samples = []
+    for stage, histogram in total.stages.items():
+        cumulative = 0
+        for bound, count in zip(histogram.buckets + ('+Inf',),
+                                histogram.counts):
+            cumulative += count
+            samples.append((f'_bucket{{stage="{stage}",le="{bound}"}}',
+                            cumulative))
+        samples.append((f'_sum{{stage="{stage}"}}', histogram.sum))
+        samples.append((f'_count{{stage="{stage}"}}', histogram.count))
+    metric('stage_seconds', 'histogram', 'Request latency by stage.', samples)
+
+    metric('requests_total', 'counter', 'Requests answered successfully.',
+           [('', total.processed)])
+    metric('worker_requests_total', 'counter',
+           'Requests answered successfully per worker.',
+           [(f'{{worker="{i}"}}', m.processed)
+            for i, m in sorted(worker_metrics.items())])
+    metric('errors_total', 'counter', 'Failed requests by exception type.',
+           [(f'{{type="{name}"}}', count)
+            for name, count in sorted(total.errors.items())])
+    metric('queue_depth', 'gauge', 'Requests waiting for a worker.',
+           [('', queue_depth)])
+    if pool_size is not None:
+        metric('pool_size', 'gauge', 'Worker threads currently running.',
+               [('', pool_size)])
+    for name, value in stats.items():
+        metric(f'{name}_total', 'counter',
+               f"{name.replace('_', ' ').capitalize()}.",
+               [('', value)])
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,38 @@
+import struct
+
+
+# Sent once at the start of a connection to switch it to framed mode;
+# one-shot clients send a bare URL, which can never start with it
+MAGIC = b'\x00URF'
+HEADER = struct.Struct('!II')
+MAX_PAYLOAD = 16 * 1024 * 1024
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def encode_frame(request_id, payload):
+    if len(payload) > MAX_PAYLOAD:
+        raise ProtocolError(f"Frame payload too large: {len(payload)}")
+    return HEADER.pack(len(payload), request_id) + payload
+
+
+class FrameDecoder:
+    def __init__(self, max_payload=MAX_PAYLOAD):
+        self.max_payload = max_payload
+        self.buffer = bytearray()
+
+    def feed(self, data):
+        self.buffer += data
+        frames = []
+        while len(self.buffer) >= HEADER.size:
+            length, request_id = HEADER.unpack_from(self.buffer)
+            if length > self.max_payload:
+                raise ProtocolError(f"Frame payload too large: {length}")
+            end = HEADER.size + length
+            if len(self.buffer) < end:
+                break
+            frames.append((request_id, bytes(self.buffer[HEADER.size:end])))
+            del self.buffer[:end]
+        return frames
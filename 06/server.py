@@ -2,22 +2,87 @@ import socket
 import threading
 import json
 import argparse
-from collections import Counter
+import codecs
+import heapq
+import queue
+import selectors
+import signal
+import sys
+from concurrent.futures import ProcessPoolExecutor
+import time
+from collections import Counter, OrderedDict, deque, namedtuple
+from operator import itemgetter
 import re
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from urllib.parse import urlparse
+from protocol import MAGIC, FrameDecoder, ProtocolError, encode_frame
+from metrics import WorkerMetrics, render_prometheus
+
+
+STATS_COMMAND = 'STATS'
 
 
 class URLProcessor:
     @staticmethod
-    def fetch_url_content(url):
+    def fetch_url_content(url, session=None):
         try:
-            response = requests.get(url, timeout=5)
+            response = (session or requests).get(url, timeout=5)
             response.raise_for_status()
             return response.text
         except Exception:
             return ""
 
+    @staticmethod
+    def fetch_conditional(url, etag=None, last_modified=None, session=None):
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        try:
+            response = (session or requests).get(url, timeout=5,
+                                                 headers=headers)
+            if response.status_code == 304:
+                return 304, None, etag, last_modified
+            response.raise_for_status()
+            return (response.status_code, response.text,
+                    response.headers.get('ETag'),
+                    response.headers.get('Last-Modified'))
+        except Exception:
+            return None, "", None, None
+
+    @staticmethod
+    def fetch_url_bytes(url, session=None):
+        try:
+            response = (session or requests).get(url, timeout=5)
+            response.raise_for_status()
+            return response.content, response.encoding or 'utf-8'
+        except Exception:
+            return b"", 'utf-8'
+
+    @staticmethod
+    def fetch_top_k_streaming(url, k, session=None, chunk_size=65536,
+                              max_bytes=None):
+        counter = StreamingWordCounter()
+        try:
+            with (session or requests).get(url, timeout=5,
+                                           stream=True) as response:
+                response.raise_for_status()
+                counter.set_encoding(response.encoding or 'utf-8')
+                received = 0
+                for chunk in response.iter_content(chunk_size):
+                    if max_bytes is not None:
+                        chunk = chunk[:max_bytes - received]
+                    counter.feed(chunk)
+                    received += len(chunk)
+                    if max_bytes is not None and received >= max_bytes:
+                        break
+        except Exception:
+            return {}
+        return counter.top_k(k)
+
     @staticmethod
     def get_top_k_words(text, k):
         words = re.findall(r'\b[a-zA-Z]+\b', text.lower())
@@ -25,103 +90,1151 @@ class URLProcessor:
         return dict(word_counts.most_common(k))
 
 
+class StreamingWordCounter:
+    WORD = re.compile(r'\b[a-zA-Z]+\b')
+    LAST_BREAK = re.compile(r'.*\W', re.DOTALL)
+    LETTERS = re.compile(r'[a-z]*')
+    # Longer runs of letters are not counted, so a page of endless
+    # letters cannot grow the held-back tail without bound
+    MAX_WORD = 1 << 16
+    # Stands in for a held-back run that can no longer form a word
+    JUNK = '_'
+
+    def __init__(self, encoding='utf-8'):
+        self.counts = Counter()
+        self.tail = ''
+        self.set_encoding(encoding)
+
+    def set_encoding(self, encoding):
+        self.decoder = codecs.getincrementaldecoder(encoding)(
+            errors='replace')
+
+    def feed(self, data, final=False):
+        chunk = self.decoder.decode(data, final).lower()
+        # A trailing run of word characters may continue in the next chunk,
+        # so it is held back until a non-word character (or EOF) ends it.
+        # The tail never contains a non-word character, so only the new
+        # chunk needs searching for the last break
+        if final:
+            cut = len(chunk)
+        else:
+            last_break = self.LAST_BREAK.match(chunk)
+            if last_break is None:
+                self.tail = self._hold(self.tail + chunk)
+                return
+            cut = last_break.end()
+        self.counts.update(self.WORD.findall(self.tail + chunk[:cut]))
+        self.tail = self._hold(chunk[cut:])
+
+    def _hold(self, run):
+        # Only a run of ASCII letters can still become a word; a run with
+        # digits, '_' or other letters is collapsed to a marker that keeps
+        # the rest of it from counting
+        if len(run) > self.MAX_WORD or not self.LETTERS.fullmatch(run):
+            return self.JUNK
+        return run
+
+    def top_k(self, k):
+        self.feed(b'', final=True)
+        # Same selection as Counter.most_common(k), which is also stable
+        # for ties in first-seen order
+        return dict(heapq.nlargest(k, self.counts.items(),
+                                   key=itemgetter(1)))
+
+
+def count_top_words(data, k, encoding='utf-8'):
+    # Runs in the CPU pool: raw bytes pickle as a single copy and are only
+    # decoded in the child, keeping the I/O threads free
+    if isinstance(data, bytes):
+        data = data.decode(encoding, errors='replace')
+    return URLProcessor.get_top_k_words(data, k)
+
+
+def make_session(pool_size=10, retries=2):
+    # One keep-alive connection pool per worker: requests.Session is not
+    # guaranteed to be thread-safe, and per-worker pools need no locking
+    retry = Retry(total=retries, backoff_factor=0.1,
+                  status_forcelist=(502, 503, 504),
+                  allowed_methods=frozenset(['GET', 'HEAD']))
+    adapter = HTTPAdapter(pool_connections=pool_size,
+                          pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+CacheEntry = namedtuple('CacheEntry',
+                        ['expires_at', 'etag', 'last_modified', 'result'])
+
+
+class ResultCache:
+    def __init__(self, stats_counter, ttl=60, max_entries=1024,
+                 clock=time.monotonic):
+        self.stats_counter = stats_counter
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get_top_words(self, url, k, session=None, count=None):
+        key = (url, k)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry.expires_at > self.clock():
+                self.entries.move_to_end(key)
+                self._count('cache_hits')
+                return entry.result
+
+        # Expired entries keep their validators, so an unchanged page
+        # costs a 304 instead of a full download and recount
+        if entry is not None:
+            status, text, etag, last_modified = \
+                URLProcessor.fetch_conditional(url, entry.etag,
+                                               entry.last_modified, session)
+        else:
+            status, text, etag, last_modified = \
+                URLProcessor.fetch_conditional(url, session=session)
+        if status == 304:
+            result = entry.result
+            self._count('cache_revalidations')
+        else:
+            result = (count or URLProcessor.get_top_k_words)(text, k)
+            self._count('cache_misses')
+        if status is None:
+            return result
+
+        with self.lock:
+            self.entries[key] = CacheEntry(self.clock() + self.ttl, etag,
+                                           last_modified, result)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return result
+
+    def _count(self, name):
+        with self.stats_counter.lock:
+            setattr(self.stats_counter, name,
+                    getattr(self.stats_counter, name) + 1)
+
+
+Task = namedtuple('Task', ['client', 'url', 'deadline', 'enqueued_at',
+                           'client_id', 'priority'],
+                  defaults=[None, None, None, 0])
+
+
+def parse_request(text):
+    # Optional "client=<id> priority=<n>" words may precede the URL
+    client_id = None
+    priority = 0
+    while True:
+        head, sep, rest = text.partition(' ')
+        name, eq, value = head.partition('=')
+        if not sep or not eq:
+            break
+        if name == 'client':
+            client_id = value
+        elif name == 'priority' and value.lstrip('-').isdigit():
+            priority = int(value)
+        else:
+            break
+        text = rest.lstrip()
+    return text, client_id, priority
+
+
+def peer_host(sock):
+    try:
+        return sock.getpeername()[0]
+    except (OSError, IndexError):
+        return None
+
+
+class FifoScheduler:
+    def __init__(self):
+        self.tasks = deque()
+
+    def __len__(self):
+        return len(self.tasks)
+
+    def put(self, task):
+        self.tasks.append(task)
+
+    def get(self):
+        return self.tasks.popleft()
+
+    def drop(self):
+        return self.tasks.popleft()
+
+    def oldest(self):
+        return self.tasks[0] if self.tasks else None
+
+
+class FairScheduler:
+    # Deficit round-robin over per-client flows; priority classes are
+    # served strictly highest first, with DRR inside each class
+    def __init__(self, quantum=1):
+        if quantum < 1:
+            raise ValueError(f"Quantum must be at least 1: {quantum}")
+        self.quantum = quantum
+        self.classes = {}
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def put(self, task):
+        flows = self.classes.setdefault(task.priority, DRRClass())
+        flows.put(task.client_id, task)
+        self.size += 1
+
+    def get(self):
+        priority = max(self.classes)
+        return self._take(priority, self.classes[priority].get(self.quantum))
+
+    def drop(self):
+        # Shed from the longest flow of the lowest class, so the heaviest
+        # client pays for the overload
+        priority = min(self.classes)
+        return self._take(priority, self.classes[priority].drop())
+
+    def oldest(self):
+        heads = [flow[0] for flows in self.classes.values()
+                 for flow in flows.flows.values()]
+        return min(heads, key=lambda task: task.enqueued_at, default=None)
+
+    def _take(self, priority, task):
+        self.size -= 1
+        if not self.classes[priority].flows:
+            del self.classes[priority]
+        return task
+
+
+class DRRClass:
+    def __init__(self):
+        self.flows = {}
+        self.deficits = {}
+        self.active = deque()
+
+    def put(self, client_id, task):
+        flow = self.flows.get(client_id)
+        if flow is None:
+            flow = self.flows[client_id] = deque()
+            self.deficits[client_id] = 0
+            self.active.append(client_id)
+        flow.append(task)
+
+    def get(self, quantum):
+        while True:
+            client_id = self.active[0]
+            if self.deficits[client_id] < 1:
+                self.deficits[client_id] += quantum
+                self.active.rotate(-1)
+                continue
+            self.deficits[client_id] -= 1
+            return self._pop(client_id, self.flows[client_id].popleft)
+
+    def drop(self):
+        client_id = max(self.flows, key=lambda c: len(self.flows[c]))
+        return self._pop(client_id, self.flows[client_id].popleft)
+
+    def _pop(self, client_id, pop):
+        task = pop()
+        if not self.flows[client_id]:
+            del self.flows[client_id]
+            del self.deficits[client_id]
+            self.active.remove(client_id)
+        return task
+
+
+class AdmissionQueue(queue.Queue):
+    POLICIES = ('block', 'reject', 'drop_oldest')
+    SCHEDULERS = ('fifo', 'fair')
+
+    def __init__(self, stats_counter, maxsize=0, policy='block',
+                 deadline=None, scheduler='fifo', quantum=1):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown admission policy: {policy}")
+        if scheduler not in self.SCHEDULERS:
+            raise ValueError(f"Unknown scheduler: {scheduler}")
+        self.scheduler = (FairScheduler(quantum) if scheduler == 'fair'
+                          else FifoScheduler())
+        super().__init__(maxsize)
+        self.stats_counter = stats_counter
+        self.policy = policy
+        self.deadline = deadline
+
+    def _init(self, maxsize):
+        pass
+
+    def _qsize(self):
+        return len(self.scheduler)
+
+    def _put(self, task):
+        self.scheduler.put(task)
+
+    def _get(self):
+        return self.scheduler.get()
+
+    def oldest_wait(self):
+        with self.mutex:
+            task = self.scheduler.oldest()
+        if task is None:
+            return 0.0
+        enqueued_at = Task(*task).enqueued_at
+        return 0.0 if enqueued_at is None else time.monotonic() - enqueued_at
+
+    def submit(self, client, url, client_id=None, priority=0):
+        now = time.monotonic()
+        deadline = None
+        if self.deadline is not None:
+            deadline = now + self.deadline
+        task = Task(client, url, deadline, now, client_id, priority)
+        if self.policy == 'block':
+            self.put(task)
+            return True
+        if self.policy == 'reject':
+            try:
+                self.put_nowait(task)
+                return True
+            except queue.Full:
+                self.reject(client)
+                return False
+        with self.mutex:
+            dropped = None
+            if 0 < self.maxsize <= self._qsize():
+                dropped = self.scheduler.drop()
+                self.unfinished_tasks -= 1
+            self._put(task)
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+        if dropped is not None:
+            self.reject(dropped[0])
+        return True
+
+    def reject(self, client):
+        with self.stats_counter.lock:
+            self.stats_counter.rejected += 1
+        try:
+            client.send(json.dumps({"error": "busy"}).encode())
+        except OSError:
+            pass
+        finally:
+            client.close()
+
+
+class Coalescer:
+    def __init__(self):
+        self.pending = {}
+        self.lock = threading.Lock()
+
+    def join(self, key, client):
+        # True if the caller should do the work, False if it attached to
+        # a request that is already in flight
+        with self.lock:
+            waiters = self.pending.get(key)
+            if waiters is not None:
+                waiters.append(client)
+                return False
+            self.pending[key] = [client]
+            return True
+
+    def finish(self, key):
+        with self.lock:
+            return self.pending.pop(key)
+
+
 class Worker(threading.Thread):
-    def __init__(self, worker_id, task_queue, stats_counter, k):
+    def __init__(self, worker_id, task_queue, stats_counter, k, cache=None,
+                 session=None, cpu_pool=None, stream=False, max_bytes=None,
+                 coalescer=None):
         super().__init__()
         self.worker_id = worker_id
         self.task_queue = task_queue
         self.stats_counter = stats_counter
         self.k = k
+        self.cache = cache
+        self.session = session
+        self.cpu_pool = cpu_pool
+        self.stream = stream
+        self.max_bytes = max_bytes
+        self.coalescer = coalescer
+        self.metrics = WorkerMetrics()
+        self.pool = None
+        self.poll_interval = None
+        self.last_active = time.monotonic()
         self.daemon = True
 
     def run(self):
         while True:
-            client_socket, url = self.task_queue.get()
             try:
-                content = URLProcessor.fetch_url_content(url)
-                top_words = URLProcessor.get_top_k_words(content, self.k)
-                
-                response_data = json.dumps(top_words)
-                client_socket.send(response_data.encode())
-                
+                self._process_next_task(self.poll_interval)
+            except queue.Empty:
+                if self.pool is not None and self.pool.should_exit(self):
+                    return
+
+    def _process_next_task(self, timeout=None):
+        client_socket, url, deadline, enqueued_at = \
+            Task(*self.task_queue.get(timeout=timeout))[:4]
+        metrics = self.metrics
+        started = time.monotonic()
+        if enqueued_at is not None:
+            metrics.observe('queue_wait', started - enqueued_at)
+        key = (url, self.k)
+        leader = False
+        waiters = [client_socket]
+        try:
+            if deadline is not None and time.monotonic() > deadline:
+                # Already waited past its deadline: skip the fetch
                 with self.stats_counter.lock:
-                    self.stats_counter.count += 1
-                    print(f"Total URLs processed: {self.stats_counter.count}")
-                    
-            except Exception as e:
-                error_response = json.dumps({"error": str(e)})
-                client_socket.send(error_response.encode())
-            finally:
-                client_socket.close()
-            self.task_queue.task_done()
+                    self.stats_counter.expired += 1
+                raise TimeoutError("deadline exceeded")
+            if self.coalescer is not None:
+                leader = self.coalescer.join(key, client_socket)
+                if not leader:
+                    # The worker already fetching this URL answers us too
+                    waiters = []
+            if waiters:
+                top_words = self._top_words(url, started)
+                if leader:
+                    waiters = self.coalescer.finish(key)
+                    leader = False
+                response_data = json.dumps(top_words)
+                for waiter in waiters:
+                    sending = time.monotonic()
+                    self._send(waiter, response_data.encode())
+                    metrics.observe('send', time.monotonic() - sending)
+                    metrics.processed += 1
+
+        except Exception as e:
+            if leader:
+                waiters = self.coalescer.finish(key)
+            metrics.errors[type(e).__name__] += 1
+            error_response = json.dumps({"error": str(e)})
+            for waiter in waiters:
+                self._send(waiter, error_response.encode())
+        finally:
+            for waiter in waiters:
+                waiter.close()
+        self.last_active = time.monotonic()
+        self.task_queue.task_done()
+
+    def _top_words(self, url, started):
+        metrics = self.metrics
+        if self.cache is not None:
+            count = (self._count_in_pool if self.cpu_pool is not None
+                     else None)
+            top_words = self.cache.get_top_words(url, self.k,
+                                                 self.session, count)
+        elif self.stream:
+            top_words = URLProcessor.fetch_top_k_streaming(
+                url, self.k, self.session, max_bytes=self.max_bytes)
+        elif self.cpu_pool is not None:
+            data, encoding = URLProcessor.fetch_url_bytes(url, self.session)
+            fetched = time.monotonic()
+            metrics.observe('fetch', fetched - started)
+            top_words = self.cpu_pool.submit(
+                count_top_words, data, self.k, encoding).result()
+            metrics.observe('tokenize', time.monotonic() - fetched)
+            return top_words
+        else:
+            content = URLProcessor.fetch_url_content(url, self.session)
+            fetched = time.monotonic()
+            metrics.observe('fetch', fetched - started)
+            top_words = URLProcessor.get_top_k_words(content, self.k)
+            metrics.observe('tokenize', time.monotonic() - fetched)
+            return top_words
+        # Counting is interleaved with fetching on these paths
+        metrics.observe('fetch', time.monotonic() - started)
+        return top_words
+
+    @staticmethod
+    def _send(client, data):
+        try:
+            client.send(data)
+        except OSError:
+            pass
+
+    def _count_in_pool(self, text, k):
+        return self.cpu_pool.submit(count_top_words, text, k).result()
+
+
+class WorkerPool:
+    def __init__(self, factory, task_queue, stats_counter, min_workers,
+                 max_workers=None, scale_up_wait=0.05, idle_timeout=30.0,
+                 interval=0.1, poll_interval=0.5):
+        self.factory = factory
+        self.task_queue = task_queue
+        self.stats_counter = stats_counter
+        self.min_workers = min_workers
+        self.max_workers = max(max_workers or min_workers, min_workers)
+        self.scale_up_wait = scale_up_wait
+        self.idle_timeout = idle_timeout
+        self.interval = interval
+        self.poll_interval = poll_interval
+        # Only running workers are kept; an exiting worker's metrics are
+        # folded into retired and its upstream connections are closed
+        self.workers = []
+        self.retired = WorkerMetrics()
+        self.lock = threading.Lock()
+        self.closing = threading.Event()
+        self.monitor = None
+
+    def size(self):
+        with self.lock:
+            return len(self.workers)
+
+    def start(self):
+        with self.lock:
+            for _ in range(self.min_workers):
+                self._spawn()
+        if self.max_workers > self.min_workers:
+            self.monitor = threading.Thread(target=self._monitor,
+                                            daemon=True)
+            self.monitor.start()
+
+    def should_exit(self, worker):
+        with self.lock:
+            if self.closing.is_set():
+                self._retire(worker)
+                return True
+            idle = time.monotonic() - worker.last_active
+            if len(self.workers) > self.min_workers and \
+                    idle >= self.idle_timeout:
+                self._retire(worker)
+                self._count('scale_downs')
+                return True
+            return False
+
+    def metrics(self):
+        # Snapshot retired so a worker exiting mid-render is not counted
+        # twice
+        retired = WorkerMetrics()
+        with self.lock:
+            retired.merge(self.retired)
+            workers = {w.worker_id: w.metrics for w in self.workers}
+        return workers, retired
+
+    def close(self, timeout=None):
+        self.closing.set()
+        with self.lock:
+            workers = list(self.workers)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for worker in workers:
+            remaining = None
+            if deadline is not None:
+                remaining = max(0.0, deadline - time.monotonic())
+            worker.join(remaining)
+        # Workers still busy past the deadline are abandoned; release
+        # their connections rather than leave them to the interpreter
+        with self.lock:
+            workers = list(self.workers)
+        for worker in workers:
+            if worker.session is not None:
+                worker.session.close()
+
+    def _monitor(self):
+        # Grow by one worker per tick while the oldest queued request has
+        # waited too long; idle workers retire themselves in should_exit
+        while not self.closing.wait(self.interval):
+            if self.task_queue.oldest_wait() <= self.scale_up_wait:
+                continue
+            with self.lock:
+                if len(self.workers) < self.max_workers and \
+                        not self.closing.is_set():
+                    self._spawn()
+                    self._count('scale_ups')
+
+    def _spawn(self):
+        # Reuse the lowest free id so per-worker metric labels stay bounded
+        # by max_workers under scale-up/scale-down churn
+        used = {worker.worker_id for worker in self.workers}
+        worker_id = next(i for i in range(len(used) + 1) if i not in used)
+        worker = self.factory(worker_id)
+        worker.pool = self
+        worker.poll_interval = min(self.poll_interval, self.idle_timeout)
+        self.workers.append(worker)
+        worker.start()
+
+    def _retire(self, worker):
+        # Runs on the exiting worker's own thread, so its metrics are no
+        # longer being written
+        self.workers.remove(worker)
+        self.retired.merge(worker.metrics)
+        if worker.session is not None:
+            worker.session.close()
+
+    def _count(self, name):
+        with self.stats_counter.lock:
+            setattr(self.stats_counter, name,
+                    getattr(self.stats_counter, name) + 1)
 
 
 class StatsCounter:
     def __init__(self):
-        self.count = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_revalidations = 0
+        self.rejected = 0
+        self.expired = 0
+        self.scale_ups = 0
+        self.scale_downs = 0
+        self.lock = threading.Lock()
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'cache_hits': self.cache_hits,
+                'cache_misses': self.cache_misses,
+                'cache_revalidations': self.cache_revalidations,
+                'rejected': self.rejected,
+                'expired': self.expired,
+                'scale_ups': self.scale_ups,
+                'scale_downs': self.scale_downs,
+            }
+
+
+def read_preamble(sock, data):
+    # Make sure a possibly split MAGIC prefix has fully arrived
+    while data and len(data) < len(MAGIC) and MAGIC.startswith(data):
+        more = sock.recv(len(MAGIC) - len(data))
+        if not more:
+            break
+        data += more
+    return data
+
+
+class FramedConnection(threading.Thread):
+    def __init__(self, sock, submit, initial=b''):
+        super().__init__()
+        self.sock = sock
+        self.submit = submit
+        self.peer = peer_host(sock)
+        self.initial = initial
+        self.decoder = FrameDecoder()
+        self.send_lock = threading.Lock()
         self.lock = threading.Lock()
+        self.pending = 0
+        self.eof = False
+        self.daemon = True
+
+    def run(self):
+        data = self.initial
+        try:
+            while True:
+                for request_id, payload in self.decoder.feed(data):
+                    with self.lock:
+                        self.pending += 1
+                    url = payload.decode(errors='replace').strip()
+                    self.submit(FramedReply(self, request_id), url,
+                                self.peer)
+                data = self.sock.recv(65536)
+                if not data:
+                    break
+        except (OSError, ProtocolError):
+            pass
+        with self.lock:
+            self.eof = True
+            done = self.pending == 0
+        if done:
+            self.sock.close()
+
+    def send_frame(self, request_id, data):
+        with self.send_lock:
+            try:
+                self.sock.sendall(encode_frame(request_id, data))
+            except OSError:
+                pass
+
+    def finish(self):
+        with self.lock:
+            self.pending -= 1
+            done = self.eof and self.pending == 0
+        if done:
+            self.sock.close()
+
+
+class FramedReply:
+    def __init__(self, connection, request_id):
+        self.connection = connection
+        self.request_id = request_id
+
+    def send(self, data):
+        self.connection.send_frame(self.request_id, data)
+        return len(data)
+
+    def close(self):
+        self.connection.finish()
+
+
+class LoopReply:
+    # Socket stand-in for workers: send()/close() are queued and the
+    # actual non-blocking I/O happens on the loop thread
+    def __init__(self, loop, conn):
+        self.loop = loop
+        self.conn = conn
+
+    def send(self, data):
+        self.loop.schedule(self.conn, data)
+        return len(data)
+
+    def close(self):
+        self.loop.schedule(self.conn, None)
+
+
+class LoopFrameReply(LoopReply):
+    def __init__(self, loop, conn, request_id):
+        super().__init__(loop, conn)
+        self.request_id = request_id
+
+    def send(self, data):
+        self.loop.schedule(self.conn, encode_frame(self.request_id, data))
+        return len(data)
+
+
+class LoopConnection:
+    def __init__(self, sock, peer=None):
+        self.sock = sock
+        self.peer = peer
+        self.inbuf = b''
+        self.outbuf = bytearray()
+        self.closing = False
+        self.events = 0
+        self.decoder = None
+        self.pending = 0
+        self.eof = False
+
+
+class SelectorLoop:
+    def __init__(self, server_socket, submit):
+        self.server_socket = server_socket
+        self.submit = submit
+        self.selector = selectors.DefaultSelector()
+        self.completions = deque()
+        self.wake_r, self.wake_w = socket.socketpair()
+        self.wake_r.setblocking(False)
+        self.wake_w.setblocking(False)
+        self.running = False
+
+    def schedule(self, conn, data):
+        self.completions.append((conn, data))
+        try:
+            self.wake_w.send(b'\0')
+        except (BlockingIOError, OSError):
+            pass
+
+    def run(self):
+        self.server_socket.setblocking(False)
+        self.selector.register(self.server_socket, selectors.EVENT_READ,
+                               self._accept)
+        self.selector.register(self.wake_r, selectors.EVENT_READ,
+                               self._drain_completions)
+        self.running = True
+        try:
+            while self.running:
+                for key, mask in self.selector.select(timeout=0.5):
+                    if isinstance(key.data, LoopConnection):
+                        self._on_event(key.data, mask)
+                    else:
+                        key.data(key.fileobj, mask)
+        finally:
+            for key in list(self.selector.get_map().values()):
+                if isinstance(key.data, LoopConnection):
+                    key.fileobj.close()
+            self.selector.close()
+            self.wake_r.close()
+            self.wake_w.close()
+
+    def stop(self):
+        self.running = False
+        self.schedule(None, None)
+
+    def stop_accepting(self):
+        self.schedule(None, self._stop_accepting)
+
+    def _stop_accepting(self):
+        if self.server_socket.fileno() != -1:
+            self.selector.unregister(self.server_socket)
+            self.server_socket.close()
+
+    def _accept(self, server_socket, mask):
+        while True:
+            try:
+                client_socket, addr = server_socket.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            client_socket.setblocking(False)
+            conn = LoopConnection(client_socket, addr[0])
+            self._watch(conn, selectors.EVENT_READ)
+
+    def _drain_completions(self, wake_r, mask):
+        try:
+            while wake_r.recv(4096):
+                pass
+        except (BlockingIOError, InterruptedError):
+            pass
+        while self.completions:
+            conn, data = self.completions.popleft()
+            if conn is None:
+                if data is not None:
+                    data()
+                continue
+            if data is None:
+                if conn.decoder is None:
+                    conn.closing = True
+                else:
+                    conn.pending -= 1
+                    conn.closing = conn.eof and conn.pending == 0
+            else:
+                conn.outbuf += data
+            self._flush(conn)
+
+    def _on_event(self, conn, mask):
+        if mask & selectors.EVENT_READ:
+            self._read(conn)
+        if mask & selectors.EVENT_WRITE:
+            self._flush(conn)
+
+    def _read(self, conn):
+        try:
+            data = conn.sock.recv(65536 if conn.decoder else 1024)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data = b''
+        if conn.decoder is not None:
+            self._read_frames(conn, data)
+            return
+        conn.inbuf += data
+        if data and len(conn.inbuf) < len(MAGIC) and \
+                MAGIC.startswith(conn.inbuf):
+            return
+        if conn.inbuf.startswith(MAGIC):
+            conn.decoder = FrameDecoder()
+            rest, conn.inbuf = conn.inbuf[len(MAGIC):], b''
+            if rest:
+                self._read_frames(conn, rest)
+            return
+        url = conn.inbuf.decode(errors='replace').strip()
+        if not url:
+            self._close(conn)
+            return
+        # One-shot protocol: a single request per connection, so stop
+        # watching it until the worker hands back the response
+        self._watch(conn, 0)
+        self.submit(LoopReply(self, conn), url, conn.peer)
+
+    def _read_frames(self, conn, data):
+        if not data:
+            conn.eof = True
+            if conn.pending == 0 and not conn.outbuf:
+                self._close(conn)
+            else:
+                conn.closing = conn.pending == 0
+                self._watch(conn, conn.events & ~selectors.EVENT_READ)
+            return
+        try:
+            frames = conn.decoder.feed(data)
+        except ProtocolError:
+            self._close(conn)
+            return
+        for request_id, payload in frames:
+            conn.pending += 1
+            url = payload.decode(errors='replace').strip()
+            self.submit(LoopFrameReply(self, conn, request_id), url,
+                        conn.peer)
+
+    def _flush(self, conn):
+        if conn.sock.fileno() == -1:
+            return
+        while conn.outbuf:
+            try:
+                sent = conn.sock.send(conn.outbuf)
+            except (BlockingIOError, InterruptedError):
+                self._watch(conn, conn.events | selectors.EVENT_WRITE)
+                return
+            except OSError:
+                self._close(conn)
+                return
+            del conn.outbuf[:sent]
+        if conn.closing:
+            self._close(conn)
+        elif conn.events & selectors.EVENT_WRITE:
+            self._watch(conn, conn.events & ~selectors.EVENT_WRITE)
+
+    def _watch(self, conn, events):
+        if events == conn.events:
+            return
+        if not conn.events:
+            self.selector.register(conn.sock, events, conn)
+        elif not events:
+            self.selector.unregister(conn.sock)
+        else:
+            self.selector.modify(conn.sock, events, conn)
+        conn.events = events
+
+    def _close(self, conn):
+        if conn.sock.fileno() != -1:
+            self._watch(conn, 0)
+            conn.sock.close()
 
 
 class MasterServer:
-    def __init__(self, host='localhost', port=8888, num_workers=4, k=5):
+    def __init__(self, host='localhost', port=8888, num_workers=4, k=5,
+                 mode='threaded', backlog=128, cache_ttl=0,
+                 cache_size=1024, pool_size=10, retries=2, cpu_workers=0,
+                 stream=False, max_bytes=None, queue_size=0,
+                 admission='block', deadline=None, scheduler='fifo',
+                 quantum=1, coalesce=True, max_workers=None,
+                 scale_up_wait=0.05, idle_timeout=30.0):
         self.host = host
         self.port = port
         self.num_workers = num_workers
         self.k = k
-        self.task_queue = queue.Queue()
+        self.mode = mode
+        self.backlog = backlog
+        self.pool_size = pool_size
+        self.retries = retries
+        self.cpu_workers = cpu_workers
+        self.cpu_pool = None
+        self.stream = stream
+        self.max_bytes = max_bytes
         self.stats_counter = StatsCounter()
-        self.workers = []
+        self.task_queue = AdmissionQueue(self.stats_counter, queue_size,
+                                         admission, deadline, scheduler,
+                                         quantum)
+        self.cache = None
+        if cache_ttl > 0:
+            self.cache = ResultCache(self.stats_counter, cache_ttl,
+                                     cache_size)
+        self.coalescer = Coalescer() if coalesce else None
+        self.pool = WorkerPool(self._make_worker, self.task_queue,
+                               self.stats_counter, num_workers, max_workers,
+                               scale_up_wait, idle_timeout)
+        self.workers = self.pool.workers
+        self.ready = threading.Event()
+        self.stopped = threading.Event()
+        self.running = False
+        self.accepting = False
+        self.draining = False
+        self.server_socket = None
+        self.loop = None
 
     def start_workers(self):
-        for i in range(self.num_workers):
-            worker = Worker(i, self.task_queue, self.stats_counter, self.k)
-            worker.start()
-            self.workers.append(worker)
+        if self.cpu_workers > 0:
+            self.cpu_pool = ProcessPoolExecutor(self.cpu_workers)
+        self.pool.start()
+
+    def _make_worker(self, worker_id):
+        session = make_session(self.pool_size, self.retries)
+        return Worker(worker_id, self.task_queue, self.stats_counter, self.k,
+                      self.cache, session, self.cpu_pool, self.stream,
+                      self.max_bytes, self.coalescer)
+
+    def dispatch(self, client, request, peer=None):
+        url, client_id, priority = parse_request(request)
+        # Stats are answered by the front end itself, so they stay
+        # available while every worker is busy
+        if url == STATS_COMMAND:
+            try:
+                client.send(self.render_metrics().encode())
+            except OSError:
+                pass
+            finally:
+                client.close()
+            return True
+        if client_id is None:
+            client_id = peer
+        return self.task_queue.submit(client, url, client_id, priority)
+
+    def render_metrics(self):
+        workers, retired = self.pool.metrics()
+        return render_prometheus(workers, self.stats_counter.snapshot(),
+                                 self.task_queue.qsize(), len(workers),
+                                 retired)
 
     def handle_client(self, client_socket):
         try:
-            data = client_socket.recv(1024).decode().strip()
+            data = read_preamble(client_socket, client_socket.recv(1024))
+            if data.startswith(MAGIC):
+                FramedConnection(client_socket, self.dispatch,
+                                 data[len(MAGIC):]).start()
+                return
+            data = data.decode().strip()
             if data:
-                self.task_queue.put((client_socket, data))
+                self.dispatch(client_socket, data, peer_host(client_socket))
         except Exception:
             client_socket.close()
 
     def run(self):
         self.start_workers()
-        
+
         server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         server_socket.bind((self.host, self.port))
-        server_socket.listen(5)
-        
-        print(f"Server listening on {self.host}:{self.port}")
-        
+        server_socket.listen(self.backlog)
+        self.port = server_socket.getsockname()[1]
+        self.server_socket = server_socket
+        self.running = True
+        self.accepting = True
+
+        print(f"Server listening on {self.host}:{self.port} "
+              f"({self.mode} mode)")
+        self.ready.set()
+
         try:
-            while True:
-                client_socket, addr = server_socket.accept()
-                self.handle_client(client_socket)
+            if self.mode == 'selectors':
+                self.loop = SelectorLoop(server_socket, self.dispatch)
+                self.loop.run()
+            else:
+                self._accept_loop(server_socket)
         except KeyboardInterrupt:
             print("Shutting down server...")
         finally:
+            self.running = False
             server_socket.close()
+            if self.draining:
+                self.stopped.wait()
+            if self.cpu_pool is not None:
+                self._shutdown_cpu_pool()
+
+    def _shutdown_cpu_pool(self):
+        # cancel_futures is new in 3.9; on 3.8 already-queued counts still
+        # run, but nothing waits for them
+        if sys.version_info >= (3, 9):
+            self.cpu_pool.shutdown(wait=False, cancel_futures=True)
+        else:
+            self.cpu_pool.shutdown(wait=False)
+
+    def _accept_loop(self, server_socket):
+        while self.running:
+            try:
+                client_socket, addr = server_socket.accept()
+            except OSError:
+                if not self.running or not self.accepting:
+                    break
+                raise
+            self.handle_client(client_socket)
+
+    def stop(self, drain=False, timeout=10.0):
+        # With drain, stop accepting but keep serving until every queued
+        # and in-flight request has been answered (or the timeout passes)
+        self.draining = drain
+        if drain:
+            self._stop_accepting()
+            self._wait_for_drain(timeout)
+        self.running = False
+        if self.loop is not None:
+            self.loop.stop()
+        elif self.server_socket is not None:
+            self._close_listener()
+        self.pool.close(timeout if drain else 0)
+        self.stopped.set()
+
+    def _stop_accepting(self):
+        self.accepting = False
+        if self.loop is not None:
+            self.loop.stop_accepting()
+        elif self.server_socket is not None:
+            self._close_listener()
+
+    def _close_listener(self):
+        try:
+            self.server_socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.server_socket.close()
+
+    def _wait_for_drain(self, timeout):
+        deadline = time.monotonic() + timeout
+        with self.task_queue.all_tasks_done:
+            while self.task_queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self.task_queue.all_tasks_done.wait(remaining)
 
 
 def main():
     parser = argparse.ArgumentParser(description='URL Processing Server')
-    parser.add_argument('-w', '--workers', type=int, default=4, 
+    parser.add_argument('-w', '--workers', type=int, default=4,
                        help='Number of worker threads')
-    parser.add_argument('-k', type=int, default=5, 
+    parser.add_argument('-k', type=int, default=5,
                        help='Number of top words to return')
     parser.add_argument('--host', default='localhost', help='Server host')
-    parser.add_argument('-p', '--port', type=int, default=8888, 
+    parser.add_argument('-p', '--port', type=int, default=8888,
                        help='Server port')
-    
+    parser.add_argument('--mode', choices=['threaded', 'selectors'],
+                       default='threaded',
+                       help='Connection handling front end')
+    parser.add_argument('--backlog', type=int, default=128,
+                       help='Listen backlog')
+    parser.add_argument('--cache-ttl', type=float, default=0,
+                       help='Seconds to cache results per URL (0 disables)')
+    parser.add_argument('--cache-size', type=int, default=1024,
+                       help='Maximum number of cached results')
+    parser.add_argument('--pool-size', type=int, default=10,
+                       help='Keep-alive connections per host per worker')
+    parser.add_argument('--retries', type=int, default=2,
+                       help='Retries for failed upstream fetches')
+    parser.add_argument('--cpu-workers', type=int, default=0,
+                       help='Processes for word counting (0 counts on the '
+                            'worker threads)')
+    parser.add_argument('--stream', action='store_true',
+                       help='Count words over the response body in chunks')
+    parser.add_argument('--max-bytes', type=int, default=None,
+                       help='Stop reading a streamed page after this many '
+                            'bytes')
+    parser.add_argument('--queue-size', type=int, default=0,
+                       help='Maximum queued requests (0 is unbounded)')
+    parser.add_argument('--admission', choices=AdmissionQueue.POLICIES,
+                       default='block',
+                       help='What to do with new requests when the queue '
+                            'is full')
+    parser.add_argument('--deadline', type=float, default=None,
+                       help='Seconds a request may wait before it is '
+                            'answered with an error instead of fetched')
+    parser.add_argument('--scheduler', choices=AdmissionQueue.SCHEDULERS,
+                       default='fifo',
+                       help='Order in which queued requests reach workers')
+    parser.add_argument('--quantum', type=int, default=1,
+                       help='Requests a client may take per round with the '
+                            'fair scheduler')
+    parser.add_argument('--no-coalesce', dest='coalesce',
+                       action='store_false',
+                       help='Fetch duplicate in-flight URLs separately')
+    parser.add_argument('--max-workers', type=int, default=None,
+                       help='Grow the pool up to this many workers under '
+                            'load (default: fixed at --workers)')
+    parser.add_argument('--scale-up-wait', type=float, default=0.05,
+                       help='Queue wait in seconds that triggers adding a '
+                            'worker')
+    parser.add_argument('--idle-timeout', type=float, default=30.0,
+                       help='Seconds a worker above --workers may idle '
+                            'before it exits')
+
     args = parser.parse_args()
-    
-    server = MasterServer(args.host, args.port, args.workers, args.k)
+    if args.quantum < 1:
+        parser.error('--quantum must be at least 1')
+
+    server = MasterServer(args.host, args.port, args.workers, args.k,
+                          args.mode, args.backlog, args.cache_ttl,
+                          args.cache_size, args.pool_size, args.retries,
+                          args.cpu_workers, args.stream, args.max_bytes,
+                          args.queue_size, args.admission, args.deadline,
+                          args.scheduler, args.quantum, args.coalesce,
+                          args.max_workers, args.scale_up_wait,
+                          args.idle_timeout)
+
+    def shutdown(signum, frame):
+        print("Shutting down server...")
+        threading.Thread(target=server.stop, kwargs={'drain': True},
+                         daemon=True).start()
+
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGTERM, shutdown)
     server.run()
 
 
 if __name__ == '__main__':
-    import queue
-    main()
\ No newline at end of file
+    main()
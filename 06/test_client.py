@@ -1,7 +1,10 @@
 import unittest
 from unittest.mock import patch, MagicMock
 import json
-from client import URLClient, ClientWorker, ClientManager
+from client import (URLClient, ClientWorker, ClientManager, HashRing,
+                    ClusterClient, AsyncURLClient)
+import asyncio
+from collections import Counter
 import tempfile
 import os
 
@@ -21,6 +24,18 @@ class TestURLClient(unittest.TestCase):
         mock_client_socket.send.assert_called_once_with(b"http://test.com")
         mock_client_socket.close.assert_called_once()
 
+    @patch('client.socket.socket')
+    def test_send_url_with_client_id(self, mock_socket):
+        mock_client_socket = MagicMock()
+        mock_socket.return_value = mock_client_socket
+        mock_client_socket.recv.return_value = b'{}'
+
+        client = URLClient(client_id="alice", priority=1)
+        client.send_url("http://test.com")
+
+        mock_client_socket.send.assert_called_once_with(
+            b"client=alice priority=1 http://test.com")
+
     @patch('client.socket.socket')
     def test_send_url_failure(self, mock_socket):
         mock_socket.side_effect = Exception("Connection failed")
@@ -31,6 +46,95 @@ class TestURLClient(unittest.TestCase):
         self.assertIsNone(result)
 
 
+class TestAsyncURLClient(unittest.TestCase):
+    def run_against_server(self, urls, concurrency):
+        stats = {"active": 0, "peak": 0, "requests": []}
+
+        async def handle(reader, writer):
+            stats["active"] += 1
+            stats["peak"] = max(stats["peak"], stats["active"])
+            stats["requests"].append((await reader.read(1024)).decode())
+            await asyncio.sleep(0.01)
+            writer.write(json.dumps({"hello": 2}).encode())
+            await writer.drain()
+            writer.close()
+            stats["active"] -= 1
+
+        async def main():
+            server = await asyncio.start_server(handle, 'localhost', 0)
+            port = server.sockets[0].getsockname()[1]
+            client = AsyncURLClient('localhost', port, client_id="a")
+            async with server:
+                return await client.send_urls_async(urls, concurrency)
+
+        return asyncio.run(main()), stats
+
+    def test_send_urls_async(self):
+        urls = [f"http://test{i}.com" for i in range(20)]
+        results, stats = self.run_against_server(urls, 5)
+        self.assertEqual(results, [{"hello": 2}] * 20)
+        self.assertLessEqual(stats["peak"], 5)
+        self.assertEqual(sorted(stats["requests"]),
+                         sorted(f"client=a {url}" for url in urls))
+
+    def test_connection_error(self):
+        client = AsyncURLClient('localhost', 1)
+        result = asyncio.run(client.send_url_async("http://test.com"))
+        self.assertIsNone(result)
+
+
+class TestHashRing(unittest.TestCase):
+    def setUp(self):
+        self.nodes = ["a:1", "b:2", "c:3"]
+        self.urls = [f"http://site{i}.com" for i in range(3000)]
+
+    def test_stable_and_balanced(self):
+        ring = HashRing(self.nodes)
+        owners = {url: ring.nodes_for(url)[0] for url in self.urls}
+        self.assertEqual(owners, {url: HashRing(self.nodes).nodes_for(url)[0]
+                                  for url in self.urls})
+        counts = Counter(owners.values())
+        self.assertEqual(set(counts), set(self.nodes))
+        self.assertGreater(min(counts.values()), 700)
+
+    def test_removing_node_only_moves_its_keys(self):
+        ring = HashRing(self.nodes)
+        smaller = HashRing(self.nodes[:2])
+        for url in self.urls:
+            before = ring.nodes_for(url)
+            self.assertEqual(sorted(before), sorted(self.nodes))
+            if before[0] != "c:3":
+                self.assertEqual(smaller.nodes_for(url)[0], before[0])
+            else:
+                self.assertEqual(smaller.nodes_for(url)[0], before[1])
+
+
+class TestClusterClient(unittest.TestCase):
+    def test_failover(self):
+        cluster = ClusterClient(["localhost:1", "localhost:2"])
+        url = "http://test.com"
+        primary, backup = cluster.route(url)
+        calls = []
+
+        def fake_request(client, url):
+            calls.append(f"{client.host}:{client.port}")
+            if calls[-1] == primary:
+                raise ConnectionRefusedError("down")
+            return {"ok": 1}
+
+        with patch.object(URLClient, 'request', fake_request):
+            self.assertEqual(cluster.request(url), {"ok": 1})
+            self.assertEqual(cluster.route(url), [backup, primary])
+            self.assertEqual(cluster.request(url), {"ok": 1})
+        self.assertEqual(calls, [primary, backup, backup])
+
+    def test_all_down(self):
+        cluster = ClusterClient(["localhost:1"])
+        with patch.object(URLClient, 'request',
+                          side_effect=ConnectionRefusedError("down")):
+            self.assertIsNone(cluster.send_url("http://test.com"))
+
+
 class TestClientManager(unittest.TestCase):
     def setUp(self):
         self.urls_content = "http://test1.com\nhttp://test2.com\nhttp://test3.com\n"
@@ -0,0 +1,31 @@
+import unittest
+from protocol import (MAGIC, HEADER, FrameDecoder, ProtocolError,
+                      encode_frame)
+
+
+class TestFraming(unittest.TestCase):
+    def test_roundtrip(self):
+        decoder = FrameDecoder()
+        data = encode_frame(1, b'http://a.com') + encode_frame(2, b'')
+        self.assertEqual(decoder.feed(data),
+                         [(1, b'http://a.com'), (2, b'')])
+
+    def test_split_frames(self):
+        decoder = FrameDecoder()
+        data = encode_frame(7, b'hello') + encode_frame(8, b'world')
+        frames = []
+        for i in range(len(data)):
+            frames.extend(decoder.feed(data[i:i + 1]))
+        self.assertEqual(frames, [(7, b'hello'), (8, b'world')])
+
+    def test_oversized_frame(self):
+        decoder = FrameDecoder(max_payload=4)
+        with self.assertRaises(ProtocolError):
+            decoder.feed(HEADER.pack(5, 1))
+
+    def test_magic_is_not_a_url(self):
+        self.assertFalse(MAGIC.decode(errors='replace').isprintable())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,19 @@
 import unittest
 from unittest.mock import patch, MagicMock
 import json
-from server import URLProcessor, Worker, StatsCounter
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from server import (URLProcessor, Worker, StatsCounter, MasterServer,
+                    ResultCache, make_session, count_top_words,
+                    StreamingWordCounter, AdmissionQueue, Task,
+                    FairScheduler, parse_request)
+import random
+from concurrent.futures import ProcessPoolExecutor
+from protocol import MAGIC, FrameDecoder, encode_frame
+from client import URLClient
+from metrics import Histogram, WorkerMetrics, render_prometheus
 import queue
 
 
@@ -23,6 +35,20 @@ class TestURLProcessor(unittest.TestCase):
         content = URLProcessor.fetch_url_content("http://test.com")
         self.assertEqual(content, "")
 
+    def test_fetch_url_content_with_session(self):
+        session = MagicMock()
+        session.get.return_value.text = "pooled"
+
+        content = URLProcessor.fetch_url_content("http://test.com", session)
+        self.assertEqual(content, "pooled")
+        session.get.assert_called_once_with("http://test.com", timeout=5)
+
+    def test_make_session(self):
+        session = make_session(pool_size=3, retries=1)
+        adapter = session.get_adapter("http://test.com")
+        self.assertEqual(adapter._pool_maxsize, 3)
+        self.assertEqual(adapter.max_retries.total, 1)
+
     def test_get_top_k_words(self):
         text = "hello world hello test world test test"
         result = URLProcessor.get_top_k_words(text, 2)
@@ -35,6 +61,64 @@ class TestURLProcessor(unittest.TestCase):
         self.assertEqual(result, {})
 
 
+class TestStreamingWordCounter(unittest.TestCase):
+    def count(self, data, chunk_size, k):
+        counter = StreamingWordCounter()
+        for i in range(0, len(data), chunk_size):
+            counter.feed(data[i:i + chunk_size])
+        return counter.top_k(k)
+
+    def test_matches_get_top_k_words(self):
+        rnd = random.Random(0)
+        pieces = ["Hello", "world", "héllo", "it's", "a1b", "snake_case",
+                  "ÜBER", " ", "  ", ",", ".\n", "-", "42", "WoRlD", "x"]
+        text = "".join(rnd.choice(pieces) for _ in range(2000))
+        data = text.encode()
+        for k in (0, 1, 5, 100):
+            expected = URLProcessor.get_top_k_words(text, k)
+            for chunk_size in (1, 2, 3, 7, 64, len(data)):
+                result = self.count(data, chunk_size, k)
+                self.assertEqual(list(result.items()),
+                                 list(expected.items()))
+
+    def test_word_split_across_chunks(self):
+        counter = StreamingWordCounter()
+        for chunk in (b"hel", b"lo wor", b"ld hel", b"lo"):
+            counter.feed(chunk)
+        self.assertEqual(counter.top_k(2), {"hello": 2, "world": 1})
+
+    def test_tail_stays_bounded(self):
+        counter = StreamingWordCounter()
+        chunks = (b"12", b"ab", b"c d_", b"e f\xc3", b"\xa9x y")
+        for chunk in chunks:
+            counter.feed(chunk)
+            self.assertLessEqual(len(counter.tail), 1)
+        self.assertEqual(counter.top_k(5), URLProcessor.get_top_k_words(
+            b"".join(chunks).decode(), 5))
+
+        counter = StreamingWordCounter()
+        for _ in range(64):
+            counter.feed(b"a" * 65536)
+            self.assertLessEqual(len(counter.tail),
+                                 StreamingWordCounter.MAX_WORD)
+        counter.feed(b" tail")
+        self.assertEqual(counter.top_k(5), {"tail": 1})
+
+    def test_fetch_streaming_max_bytes(self):
+        response = MagicMock()
+        response.__enter__.return_value = response
+        response.encoding = 'utf-8'
+        response.iter_content.return_value = [b"hello hello wor", b"ld bye"]
+        session = MagicMock()
+        session.get.return_value = response
+
+        result = URLProcessor.fetch_top_k_streaming(
+            "http://test.com", 3, session, max_bytes=14)
+        self.assertEqual(result, {"hello": 2, "wo": 1})
+        session.get.assert_called_once_with("http://test.com", timeout=5,
+                                            stream=True)
+
+
 class TestWorker(unittest.TestCase):
     def setUp(self):
         self.task_queue = queue.Queue()
@@ -63,15 +147,514 @@ class TestWorker(unittest.TestCase):
         result = json.loads(sent_data.decode())
         self.assertEqual(result, {"test": 1, "content": 1})
 
+    @patch('server.URLProcessor.fetch_url_bytes',
+           return_value=("héllo world hello".encode('latin-1'), 'latin-1'))
+    def test_worker_cpu_pool(self, mock_fetch):
+        mock_socket = MagicMock()
+        with ProcessPoolExecutor(1) as pool:
+            worker = Worker(1, self.task_queue, self.stats_counter, 2,
+                            cpu_pool=pool)
+            self.task_queue.put((mock_socket, "http://test.com"))
+            worker._process_next_task()
+
+        sent_data = mock_socket.send.call_args[0][0]
+        self.assertEqual(json.loads(sent_data.decode()),
+                         {"world": 1, "hello": 1})
+
+    def test_count_top_words(self):
+        text = "hello world hello test"
+        self.assertEqual(count_top_words(text.encode(), 1), {"hello": 2})
+        self.assertEqual(count_top_words(text, 1),
+                         URLProcessor.get_top_k_words(text, 1))
+
+    @patch('server.URLProcessor.fetch_url_content')
+    def test_worker_skips_expired_task(self, mock_fetch):
+        mock_socket = MagicMock()
+        worker = Worker(1, self.task_queue, self.stats_counter, self.k)
+        self.task_queue.put((mock_socket, "http://test.com", 0))
+        worker._process_next_task()
+
+        mock_fetch.assert_not_called()
+        sent_data = mock_socket.send.call_args[0][0]
+        self.assertEqual(json.loads(sent_data.decode()),
+                         {"error": "deadline exceeded"})
+        mock_socket.close.assert_called_once()
+        self.assertEqual(self.stats_counter.expired, 1)
+
+
+class TestAdmissionQueue(unittest.TestCase):
+    def setUp(self):
+        self.stats = StatsCounter()
+
+    def assert_busy(self, client):
+        client.send.assert_called_once_with(b'{"error": "busy"}')
+        client.close.assert_called_once()
+
+    def test_reject(self):
+        tasks = AdmissionQueue(self.stats, maxsize=1, policy='reject')
+        first, second = MagicMock(), MagicMock()
+        self.assertTrue(tasks.submit(first, "http://a.com"))
+        self.assertFalse(tasks.submit(second, "http://b.com"))
+        self.assert_busy(second)
+        self.assertEqual(tasks.get().client, first)
+        self.assertEqual(self.stats.rejected, 1)
+
+    def test_drop_oldest(self):
+        tasks = AdmissionQueue(self.stats, maxsize=2, policy='drop_oldest')
+        clients = [MagicMock() for _ in range(3)]
+        for i, client in enumerate(clients):
+            self.assertTrue(tasks.submit(client, f"http://{i}.com"))
+        self.assert_busy(clients[0])
+        self.assertEqual([tasks.get().url, tasks.get().url],
+                         ["http://1.com", "http://2.com"])
+        tasks.task_done()
+        tasks.task_done()
+        tasks.join()
+        self.assertEqual(self.stats.snapshot()['rejected'], 1)
+
+    def test_deadline(self):
+        tasks = AdmissionQueue(self.stats, deadline=5)
+        tasks.submit(MagicMock(), "http://a.com")
+        self.assertIsNotNone(tasks.get().deadline)
+
+    def test_fair_scheduler_round_robin(self):
+        tasks = AdmissionQueue(self.stats, scheduler='fair')
+        for i in range(3):
+            tasks.submit(MagicMock(), f"http://heavy{i}.com", 'heavy')
+        tasks.submit(MagicMock(), "http://light.com", 'light')
+        order = [tasks.get().client_id for _ in range(4)]
+        self.assertEqual(order, ['heavy', 'light', 'heavy', 'heavy'])
+
+    def test_fair_drop_sheds_heaviest(self):
+        tasks = AdmissionQueue(self.stats, maxsize=3, policy='drop_oldest',
+                               scheduler='fair')
+        clients = [MagicMock() for _ in range(4)]
+        tasks.submit(clients[0], "http://light.com", 'light')
+        tasks.submit(clients[1], "http://heavy0.com", 'heavy')
+        tasks.submit(clients[2], "http://heavy1.com", 'heavy')
+        tasks.submit(clients[3], "http://light2.com", 'light2')
+        self.assert_busy(clients[1])
+        self.assertEqual(tasks.qsize(), 3)
+
+    def test_unknown_policy(self):
+        with self.assertRaises(ValueError):
+            AdmissionQueue(self.stats, policy='lifo')
+
+
+class TestFairScheduler(unittest.TestCase):
+    def test_priority_classes(self):
+        scheduler = FairScheduler()
+        scheduler.put(Task(None, "low", client_id='a'))
+        scheduler.put(Task(None, "high", client_id='b', priority=1))
+        scheduler.put(Task(None, "low2", client_id='a'))
+        self.assertEqual([scheduler.get().url for _ in range(3)],
+                         ["high", "low", "low2"])
+        self.assertEqual(len(scheduler), 0)
+
+    def test_quantum(self):
+        scheduler = FairScheduler(quantum=2)
+        for client_id in 'aaab':
+            scheduler.put(Task(None, client_id, client_id=client_id))
+        self.assertEqual([scheduler.get().url for _ in range(4)],
+                         ['a', 'a', 'b', 'a'])
+
+    def test_invalid_quantum(self):
+        for quantum in (0, -1):
+            with self.assertRaises(ValueError):
+                FairScheduler(quantum)
+            with self.assertRaises(ValueError):
+                AdmissionQueue(StatsCounter(), scheduler='fair',
+                               quantum=quantum)
+
+    def test_parse_request(self):
+        self.assertEqual(parse_request("http://a.com"),
+                         ("http://a.com", None, 0))
+        self.assertEqual(parse_request("client=x priority=2 http://a.com"),
+                         ("http://a.com", "x", 2))
+        self.assertEqual(parse_request("STATS"), ("STATS", None, 0))
+        self.assertEqual(parse_request("hello world"),
+                         ("hello world", None, 0))
+
 
 class TestStatsCounter(unittest.TestCase):
     def test_stats_counter(self):
         counter = StatsCounter()
-        self.assertEqual(counter.count, 0)
+        self.assertEqual(counter.rejected, 0)
         
         with counter.lock:
-            counter.count = 5
-        self.assertEqual(counter.count, 5)
+            counter.rejected = 5
+        self.assertEqual(counter.rejected, 5)
+
+
+def start_server(**kwargs):
+    server = MasterServer(port=0, **kwargs)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    server.ready.wait(5)
+    return server, thread
+
+
+def request(port, url, timeout=5):
+    with socket.create_connection(('localhost', port), timeout=timeout) as s:
+        s.sendall(url.encode())
+        chunks = []
+        while True:
+            chunk = s.recv(4096)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    return json.loads(b''.join(chunks).decode())
+
+
+@patch('server.URLProcessor.fetch_url_content',
+       return_value="hello world hello")
+class TestMasterServerModes(unittest.TestCase):
+    def check_mode(self, mode):
+        server, thread = start_server(num_workers=2, k=1, mode=mode)
+        try:
+            for _ in range(3):
+                self.assertEqual(request(server.port, "http://test.com"),
+                                 {"hello": 2})
+        finally:
+            server.stop()
+            thread.join(5)
+        self.assertFalse(thread.is_alive())
+
+    def test_threaded_mode(self, mock_fetch):
+        self.check_mode('threaded')
+
+    def test_selectors_mode(self, mock_fetch):
+        self.check_mode('selectors')
+
+    def test_selectors_idle_connections_do_not_block(self, mock_fetch):
+        server, thread = start_server(num_workers=2, k=1, mode='selectors')
+        idle = [socket.create_connection(('localhost', server.port))
+                for _ in range(20)]
+        try:
+            self.assertEqual(request(server.port, "http://test.com",
+                                     timeout=2), {"hello": 2})
+        finally:
+            for conn in idle:
+                conn.close()
+            server.stop()
+            thread.join(5)
+
+
+    def test_cpu_pool_shutdown_on_python_38(self, mock_fetch):
+        server = MasterServer(port=0, num_workers=1)
+        server.cpu_pool = MagicMock()
+        with patch('server.sys.version_info', (3, 8, 18)):
+            server._shutdown_cpu_pool()
+        server.cpu_pool.shutdown.assert_called_once_with(wait=False)
+
+class SlowHandler(BaseHTTPRequestHandler):
+    hits = 0
+
+    def do_GET(self):
+        SlowHandler.hits += 1
+        time.sleep(0.5)
+        body = b"hello world hello"
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestCoalescing(unittest.TestCase):
+    def setUp(self):
+        SlowHandler.hits = 0
+        self.httpd = ThreadingHTTPServer(('localhost', 0), SlowHandler)
+        threading.Thread(target=self.httpd.serve_forever,
+                         daemon=True).start()
+        self.url = f"http://localhost:{self.httpd.server_port}/"
+
+    def tearDown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def concurrent_requests(self, count, **kwargs):
+        server, thread = start_server(num_workers=count, k=1, **kwargs)
+        results = []
+        try:
+            clients = [threading.Thread(
+                target=lambda: results.append(request(server.port,
+                                                      self.url)))
+                for _ in range(count)]
+            for client in clients:
+                client.start()
+            for client in clients:
+                client.join()
+        finally:
+            server.stop()
+            thread.join(5)
+        return results
+
+    def test_one_upstream_hit(self):
+        results = self.concurrent_requests(8)
+        self.assertEqual(results, [{"hello": 2}] * 8)
+        self.assertEqual(SlowHandler.hits, 1)
+
+    def test_disabled(self):
+        results = self.concurrent_requests(8, coalesce=False)
+        self.assertEqual(results, [{"hello": 2}] * 8)
+        self.assertEqual(SlowHandler.hits, 8)
+
+
+def slow_fetch(url, session=None):
+    time.sleep(0.2)
+    return "hello world hello"
+
+
+@patch('server.URLProcessor.fetch_url_content', side_effect=slow_fetch)
+class TestWorkerPool(unittest.TestCase):
+    def fire(self, port, count):
+        results = []
+        clients = [threading.Thread(
+            target=lambda i=i: results.append(
+                request(port, f"http://test{i}.com")))
+            for i in range(count)]
+        for client in clients:
+            client.start()
+        return clients, results
+
+    def test_scales_up_and_down(self, mock_fetch):
+        server, thread = start_server(num_workers=1, k=1, max_workers=4,
+                                      scale_up_wait=0.02, idle_timeout=0.3)
+        try:
+            clients, results = self.fire(server.port, 8)
+            for client in clients:
+                client.join()
+            self.assertEqual(results, [{"hello": 2}] * 8)
+            self.assertGreater(server.stats_counter.scale_ups, 0)
+            self.assertGreater(len(server.workers), 1)
+            peak = list(server.workers)
+            for worker in peak:
+                worker.session.close = MagicMock(wraps=worker.session.close)
+
+            deadline = time.monotonic() + 5
+            while server.pool.size() > 1 and time.monotonic() < deadline:
+                time.sleep(0.05)
+            self.assertEqual(server.pool.size(), 1)
+            self.assertEqual(server.stats_counter.scale_downs,
+                             server.stats_counter.scale_ups)
+            for worker in peak:
+                retired = worker not in server.workers
+                self.assertEqual(worker.session.close.called, retired)
+            lines = server.render_metrics().splitlines()
+            self.assertIn('urlserver_pool_size 1', lines)
+            self.assertIn('urlserver_requests_total 8', lines)
+            self.assertEqual(
+                len([line for line in lines
+                     if line.startswith('urlserver_worker_requests_total{')]),
+                1)
+        finally:
+            server.stop()
+            thread.join(5)
+
+    def check_drain(self, mode):
+        server, thread = start_server(num_workers=1, k=1, mode=mode)
+        clients, results = self.fire(server.port, 3)
+        time.sleep(0.1)
+        server.stop(drain=True)
+        for client in clients:
+            client.join()
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(results, [{"hello": 2}] * 3)
+        self.assertEqual(server.pool.size(), 0)
+
+    def test_threaded_drain(self, mock_fetch):
+        self.check_drain('threaded')
+
+    def test_selectors_drain(self, mock_fetch):
+        self.check_drain('selectors')
+
+
+class TestMetrics(unittest.TestCase):
+    def test_histogram(self):
+        histogram = Histogram(buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 2.0):
+            histogram.observe(value)
+        self.assertEqual(histogram.counts, [2, 1, 1])
+        self.assertEqual(histogram.count, 4)
+        self.assertAlmostEqual(histogram.sum, 2.65)
+
+    def test_render_prometheus(self):
+        first, second = WorkerMetrics(), WorkerMetrics()
+        first.observe('fetch', 0.002)
+        second.observe('fetch', 20)
+        first.processed, second.processed = 3, 1
+        second.errors['TimeoutError'] += 2
+        retired = WorkerMetrics()
+        retired.processed = 5
+        retired.errors['TimeoutError'] += 1
+        text = render_prometheus({0: first, 1: second}, {'rejected': 4}, 7,
+                                 retired=retired)
+        lines = text.splitlines()
+
+        self.assertIn('urlserver_stage_seconds_bucket'
+                      '{stage="fetch",le="0.0025"} 1', lines)
+        self.assertIn('urlserver_stage_seconds_bucket'
+                      '{stage="fetch",le="+Inf"} 2', lines)
+        self.assertIn('urlserver_stage_seconds_count{stage="fetch"} 2',
+                      lines)
+        self.assertIn('urlserver_requests_total 9', lines)
+        self.assertIn('urlserver_worker_requests_total{worker="1"} 1', lines)
+        self.assertIn('urlserver_errors_total{type="TimeoutError"} 3', lines)
+        self.assertIn('urlserver_queue_depth 7', lines)
+        self.assertIn('urlserver_rejected_total 4', lines)
+        self.assertIn('# TYPE urlserver_stage_seconds histogram', lines)
+
+
+@patch('server.URLProcessor.fetch_url_content',
+       return_value="hello world hello")
+class TestStatsCommand(unittest.TestCase):
+    def check_stats(self, mode):
+        server, thread = start_server(num_workers=2, k=1, mode=mode)
+        try:
+            for _ in range(3):
+                request(server.port, "http://test.com")
+            with socket.create_connection(('localhost', server.port),
+                                          timeout=5) as s:
+                s.sendall(b'STATS')
+                chunks = []
+                while True:
+                    chunk = s.recv(4096)
+                    if not chunk:
+                        break
+                    chunks.append(chunk)
+            lines = b''.join(chunks).decode().splitlines()
+            self.assertIn('urlserver_requests_total 3', lines)
+            self.assertIn('urlserver_stage_seconds_count{stage="send"} 3',
+                          lines)
+            self.assertIn('urlserver_stage_seconds_count'
+                          '{stage="queue_wait"} 3', lines)
+        finally:
+            server.stop()
+            thread.join(5)
+
+    def test_threaded_stats(self, mock_fetch):
+        self.check_stats('threaded')
+
+    def test_selectors_stats(self, mock_fetch):
+        self.check_stats('selectors')
+
+
+@patch('server.URLProcessor.fetch_url_content',
+       return_value="hello world hello")
+class TestFramedProtocol(unittest.TestCase):
+    def check_pipelining(self, mode):
+        server, thread = start_server(num_workers=3, k=1, mode=mode)
+        urls = [f"http://test{i}.com" for i in range(20)]
+        try:
+            with socket.create_connection(('localhost', server.port),
+                                          timeout=5) as s:
+                s.sendall(MAGIC[:2])
+                s.sendall(MAGIC[2:] + b''.join(
+                    encode_frame(i, url.encode())
+                    for i, url in enumerate(urls)))
+                s.shutdown(socket.SHUT_WR)
+                decoder = FrameDecoder()
+                frames = []
+                while True:
+                    chunk = s.recv(4096)
+                    if not chunk:
+                        break
+                    frames.extend(decoder.feed(chunk))
+            self.assertEqual(sorted(i for i, _ in frames), list(range(20)))
+            for _, payload in frames:
+                self.assertEqual(json.loads(payload), {"hello": 2})
+            self.assertEqual(request(server.port, "http://test.com"),
+                             {"hello": 2})
+            results = URLClient('localhost', server.port).send_urls(urls)
+            self.assertEqual(results, [{"hello": 2}] * 20)
+        finally:
+            server.stop()
+            thread.join(5)
+
+    def test_threaded_pipelining(self, mock_fetch):
+        self.check_pipelining('threaded')
+
+    def test_selectors_pipelining(self, mock_fetch):
+        self.check_pipelining('selectors')
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    body = b"hello world hello"
+    etag = '"v1"'
+    requests = []
+
+    def do_GET(self):
+        conditional = self.headers.get('If-None-Match')
+        StubHandler.requests.append(conditional)
+        if conditional == StubHandler.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('ETag', StubHandler.etag)
+        self.send_header('Content-Length', str(len(StubHandler.body)))
+        self.end_headers()
+        self.wfile.write(StubHandler.body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        StubHandler.requests = []
+        StubHandler.body = b"hello world hello"
+        StubHandler.etag = '"v1"'
+        self.httpd = ThreadingHTTPServer(('localhost', 0), StubHandler)
+        threading.Thread(target=self.httpd.serve_forever,
+                         daemon=True).start()
+        self.url = f"http://localhost:{self.httpd.server_port}/"
+        self.clock = FakeClock()
+        self.stats = StatsCounter()
+        self.cache = ResultCache(self.stats, ttl=10, clock=self.clock)
+
+    def tearDown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def test_hit_within_ttl(self):
+        self.assertEqual(self.cache.get_top_words(self.url, 1), {"hello": 2})
+        self.assertEqual(self.cache.get_top_words(self.url, 1), {"hello": 2})
+        self.assertEqual(StubHandler.requests, [None])
+        snapshot = self.stats.snapshot()
+        self.assertEqual(snapshot['cache_hits'], 1)
+        self.assertEqual(snapshot['cache_misses'], 1)
+
+    def test_revalidation_after_ttl(self):
+        self.cache.get_top_words(self.url, 1)
+        self.clock.now = 11
+        self.assertEqual(self.cache.get_top_words(self.url, 1), {"hello": 2})
+        self.assertEqual(StubHandler.requests, [None, '"v1"'])
+        self.assertEqual(self.stats.cache_revalidations, 1)
+
+        StubHandler.body = b"bye bye world"
+        StubHandler.etag = '"v2"'
+        self.clock.now = 22
+        self.assertEqual(self.cache.get_top_words(self.url, 1), {"bye": 2})
+        self.assertEqual(self.stats.cache_misses, 2)
+
+    def test_keyed_by_k(self):
+        self.cache.get_top_words(self.url, 1)
+        self.assertEqual(self.cache.get_top_words(self.url, 2),
+                         {"hello": 2, "world": 1})
+        self.assertEqual(len(StubHandler.requests), 2)
 
 
 if __name__ == '__main__':